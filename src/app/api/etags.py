@@ -0,0 +1,37 @@
+from typing import Optional, Set
+from fastapi import Response
+
+# ETags derivados de las revisiones del repositorio: "<revision>" (global en /lists, de la lista en el resto)
+
+
+def make_etag(revision: int) -> str:
+    return f'"{revision}"'
+
+def _parse_tags(header: str, weak: bool) -> Set[int]:
+    revisiones = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            # If-None-Match compara en modo debil; If-Match exige ETags fuertes
+            if not weak:
+                continue
+            tag = tag[2:]
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            revisiones.add(int(tag[1:-1]))
+    return revisiones
+
+def etag_matches(if_none_match: Optional[str], revision: int) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return revision in _parse_tags(if_none_match, weak=True)
+
+def expected_revisions(if_match: Optional[str]) -> Optional[Set[int]]:
+    # None: sin condicion (sin header o "*"; que el recurso exista ya lo valida el caso de uso)
+    if if_match is None or if_match.strip() == "*":
+        return None
+    return _parse_tags(if_match, weak=False)
+
+def not_modified(revision: int) -> Response:
+    return Response(status_code=304, headers={"ETag": make_etag(revision)})
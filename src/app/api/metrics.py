@@ -0,0 +1,113 @@
+import time
+from typing import Iterator, Optional, Tuple
+from anyio import to_thread
+from app.infrastructure.metrics import RequestTimings, current_request, registry
+from app.config import getenv
+
+# Metricas HTTP (middleware ASGI puro, sin BaseHTTPMiddleware: no agrega tareas ni copia el body) y gauges
+# del threadpool y del repositorio que se calculan al momento del scrape.
+
+# Las estadisticas del repositorio recorren indices (o dbstat en SQLite): se recalculan como mucho cada tanto
+METRICS_REPOSITORY_TTL = float(getenv("METRICS_REPOSITORY_TTL", 15))
+
+REQUESTS_TOTAL = registry.counter("http_requests_total", "Requests atendidos", ["method", "route", "status"])
+REQUEST_SECONDS = registry.histogram("http_request_duration_seconds", "Duracion total del request", ["method", "route"])
+SERIALIZATION_SECONDS = registry.histogram(
+    "app_serialization_duration_seconds", "Desde el fin del ultimo caso de uso hasta el inicio de la respuesta", ["method", "route"]
+)
+
+# Rutas sin match (404) comparten un label, asi una URL inventada no crea series nuevas
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope) -> str:
+    # FastAPI deja la ruta resuelta en el scope: se usa el path con parametros ("/tasks/{list_id}")
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = current_request.set(timings)
+        inicio = time.perf_counter()
+        response_start: Optional[float] = None
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal response_start, status_code
+            if message["type"] == "http.response.start":
+                response_start = time.perf_counter()
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            method, route = scope["method"], route_template(scope)
+            REQUESTS_TOTAL.inc(method, route, str(status_code))
+            REQUEST_SECONDS.observe(time.perf_counter() - inicio, method, route)
+            if timings.use_case_end is not None and response_start is not None:
+                SERIALIZATION_SECONDS.observe(response_start - timings.use_case_end, method, route)
+
+# GAUGES
+
+def _threadpool_stats() -> Iterator[Tuple[Tuple[str, ...], float]]:
+    # Limiter por defecto de anyio: lo usan run_in_threadpool y las dependencias sync de FastAPI
+    stats = to_thread.current_default_thread_limiter().statistics()
+    yield ("busy",), stats.borrowed_tokens
+    yield ("waiting",), stats.tasks_waiting
+
+registry.gauge("app_threadpool_tasks", "Threadpool: hilos ocupados y tareas esperando uno", _threadpool_stats, ["state"])
+registry.gauge(
+    "app_threadpool_size", "Hilos maximos del threadpool",
+    lambda: [((), to_thread.current_default_thread_limiter().total_tokens)],
+)
+
+
+class RepositoryStats:
+    # get_stats del repositorio con cache por TTL; el endpoint /metrics lo actualiza antes de renderizar si vencio
+
+    def __init__(self, ttl: float = METRICS_REPOSITORY_TTL):
+        self.ttl = ttl
+        self.stats: dict = {}
+        self._updated = float("-inf")
+
+    def stale(self) -> bool:
+        return time.monotonic() - self._updated >= self.ttl
+
+    def update(self, stats: dict):
+        self.stats = stats
+        self._updated = time.monotonic()
+
+    def value(self, key: str):
+        if key in self.stats:
+            yield (), self.stats[key]
+
+    def indexes(self, key: str):
+        for name, size in sorted(self.stats.get(key, {}).items()):
+            yield (name,), size
+
+
+repository_stats = RepositoryStats()
+
+registry.gauge("app_repository_lists", "Listas en el repositorio", lambda: repository_stats.value("lists"))
+registry.gauge("app_repository_tasks", "Tareas en el repositorio", lambda: repository_stats.value("tasks"))
+registry.gauge(
+    "app_repository_index_entries", "Entradas por indice (repositorio en memoria)",
+    lambda: repository_stats.indexes("index_entries"), ["index"],
+)
+registry.gauge(
+    "app_repository_index_bytes", "Bytes en disco por indice (SQLite)",
+    lambda: repository_stats.indexes("index_bytes"), ["index"],
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
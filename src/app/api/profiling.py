@@ -0,0 +1,62 @@
+import hmac
+import random
+import threading
+from starlette.concurrency import run_in_threadpool
+from app.api.metrics import route_template
+from app.infrastructure.profiling import (
+    PROFILING_SAMPLE_RATE, PROFILING_TOKEN, ProfileRing, RequestProfile, current_profile
+)
+
+# Middleware de perfilado: un request con "X-Profile: <token>" (y que entra en el muestreo) corre bajo
+# cProfile desde que llega hasta que se envia la respuesta: dependencias (JWTBearer, get_current_user),
+# caso de uso y serializacion. El id del perfil vuelve en el header X-Profile-Id.
+# cProfile ve el hilo del event loop completo: si hay otros requests en vuelo, su trabajo tambien aparece.
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, app, token: str = PROFILING_TOKEN, sample_rate: float = PROFILING_SAMPLE_RATE, ring: ProfileRing = None):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.ring = ring if ring is not None else ProfileRing()
+        # Un perfil a la vez: cProfile no se puede anidar (y desde 3.12 es global al interprete)
+        self._lock = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return bool(self.token) and hmac.compare_digest(value, self.token) and random.random() < self.sample_rate
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope) or not self._lock.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profile_id = self.ring.new_id()
+        request_profile = RequestProfile()
+        token = current_profile.set(request_profile)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            request_profile.profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                request_profile.profile.disable()
+        finally:
+            current_profile.reset(token)
+            self._lock.release()
+            # La respuesta ya salio: escribir el archivo no la demora
+            await run_in_threadpool(
+                self.ring.write, profile_id, scope["method"], route_template(scope), status_code, request_profile.stats()
+            )
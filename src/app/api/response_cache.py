@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+from app.config import getenv
+
+RESPONSE_CACHE_SIZE = int(getenv("RESPONSE_CACHE_SIZE", 1024))
+
+
+class CachedResponse(NamedTuple):
+    revision: int
+    body: bytes
+    next_cursor: Optional[str]
+
+
+class ResponseCache:
+    # LRU de respuestas JSON ya serializadas: clave (ruta + parametros) -> cuerpo, valido mientras la
+    # revision del repositorio sea la misma con la que se armo
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, revision: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.revision != revision:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, revision: int, body: bytes, next_cursor: Optional[str] = None) -> CachedResponse:
+        entry = CachedResponse(revision, body, next_cursor)
+        if self.maxsize <= 0:
+            return entry
+        with self._lock:
+            # Una lectura lenta no pisa una entrada mas nueva
+            actual = self._entries.get(key)
+            if actual is None or actual.revision <= revision:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
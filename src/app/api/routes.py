@@ -1,53 +1,49 @@
-import os
-from fastapi import APIRouter, Body, HTTPException, Query, Depends
-from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from fastapi import APIRouter, Body, Header, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
 from app.auth.auth_handler import create_access_token
-from app.auth.auth_bearer import JWTBearer
-from typing import Annotated, List
+from app.auth.auth_bearer import jwt_bearer
+from typing import Annotated, List, Optional, Union
 from uuid import UUID
-from passlib.context import CryptContext
-from app.infrastructure.repository import fake_db_users
-from jose import jwt, JWTError
+from pydantic import TypeAdapter
 from fastapi import HTTPException, status
-from dotenv import load_dotenv
 
 
-from app.domain.models import ListaCreate, TareaCreate, Lista, Tarea, User
-from app.application.use_cases import (
-    get_lists, create_list, update_list, delete_list, get_list_completion,
-    get_tasks, create_task, update_task, update_task_status, delete_task, filter_tasks
+from app.domain.models import (
+    Cambios, Importacion, ListaCreate, TareaCreate, Lista, ListaResumen, ResultadoBusqueda, Tarea, User, TareaBulkUpdate, TareaEstadoBulk, ResultadoBulk
+)
+from app.api.etags import etag_matches, expected_revisions, make_etag, not_modified
+from app.api.response_cache import CachedResponse, response_cache
+from app.api.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, repository_stats
+from app.infrastructure.metrics import registry
+from app.domain.exceptions import UsuarioNoEncontradoException
+from app.application.async_use_cases import (
+    authenticate_user, get_user_by_username, get_revision, get_changes, get_repository_stats, get_list_revision, get_lists_page, get_tasks_page, export_workspace, create_list, update_list, delete_list, get_list_completion, get_lists_completion,
+    create_task, update_task, update_task_status, delete_task, filter_tasks, search_tasks,
+    create_tasks, update_tasks, update_tasks_status, delete_tasks, import_tasks, get_import,
+    subscribe_list_events
 )
 
 ## Descriptar ##
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
-
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Could not validate credentials",
     headers={"WWW-Authenticate": "Bearer"},
 )
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# Tope de items por pagina en endpoints paginados
+MAX_PAGE_SIZE = 1000
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    print("Token recibido:", token)
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("username")
-        if username is None:
-            raise credentials_exception
-        
-    except JWTError:
+async def get_current_user(payload: dict = Depends(jwt_bearer)):
+    # Reutiliza el payload ya verificado por jwt_bearer, el token no se decodifica de nuevo
+    username: str = payload.get("username")
+    if username is None:
         raise credentials_exception
-    user = get_user_by_username(username)
-    if user is None:
+    try:
+        return await get_user_by_username(username)
+    except UsuarioNoEncontradoException:
         raise credentials_exception
-    return user
 
 ##### Rutas ####
 
@@ -56,31 +52,28 @@ public_router = APIRouter()
 
 # Privada - Aca aplicamos a todos los endpoints que necesitas JWT #
 router = APIRouter(
-    dependencies=[Depends(JWTBearer())]
+    dependencies=[Depends(jwt_bearer)]
 )
 
 ##### Home ####
 
 @public_router.get("/", tags=["Main"])
-def home():
+async def home():
     return {"message": "Servidor levantado :)"}
 
-##### Login #####
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+##### Metricas #####
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+@public_router.get("/metrics", tags=["Main"], summary="Metricas en formato Prometheus")
+async def metrics():
+    if repository_stats.stale():
+        repository_stats.update(await get_repository_stats())
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
 
-def get_user_by_username(username: str):
-    for user in fake_db_users:
-        if user.username == username:
-            return user
-    return None
+##### Login #####
 
 @public_router.post("/login", tags=["Login para obtener JWT"], summary="Login de usuario para obtener JWT")
-def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    user = get_user_by_username(form_data.username)
+async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    user = await authenticate_user(form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
@@ -99,50 +92,188 @@ def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
 
 ##### Listas #####
 
-@router.get("/lists", response_model=List[Lista], tags=["Endpoints de lista"], summary="Traer todas las listas")
-def api_get_lists():
-    return get_lists()
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+# Las lecturas de listas y tareas se sirven desde response_cache mientras no cambie la revision:
+# un poll sobre datos sin cambios no arma modelos ni vuelve a serializar
+
+LISTAS_JSON = TypeAdapter(List[Lista])
+RESUMENES_JSON = TypeAdapter(List[ListaResumen])
+TAREAS_JSON = TypeAdapter(List[Tarea])
+
+def cached_json_response(entry: CachedResponse) -> Response:
+    response = Response(entry.body, media_type="application/json", headers={"ETag": make_etag(entry.revision)})
+    set_next_cursor(response, entry.next_cursor)
+    return response
+
+@router.get("/lists", response_model=Union[List[ListaResumen], List[Lista]], tags=["Endpoints de lista"], summary="Traer todas las listas")
+async def api_get_lists(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    summary: bool = Query(False, description="Devuelve solo id, nombre y cantidad de tareas"),
+    if_none_match: Optional[str] = Header(None),
+):
+    # La revision se lee antes que los datos: si cambian en el medio, la entrada queda vieja y no se reutiliza
+    key = ("lists", limit, cursor, summary)
+    revision = await get_revision()
+    if etag_matches(if_none_match, revision):
+        return not_modified(revision)
+    entry = response_cache.get(key, revision)
+    if entry is None:
+        listas, next_cursor = await get_lists_page(limit, cursor, summary)
+        body = (RESUMENES_JSON if summary else LISTAS_JSON).dump_json(listas)
+        entry = response_cache.set(key, revision, body, next_cursor)
+    return cached_json_response(entry)
 
 @router.post("/list", response_model=Lista, tags=["Endpoints de lista"], summary="Crear una lista")
-def api_create_list(lista_data: ListaCreate):
-    return create_list(lista_data)
+async def api_create_list(lista_data: ListaCreate):
+    return await create_list(lista_data)
 
 @router.put("/lists/{list_id}", response_model=Lista, tags=["Endpoints de lista"], summary="Editar una lista")
-def api_update_list(list_id: UUID, lista_data: ListaCreate):
-    return update_list(list_id, lista_data)
+async def api_update_list(list_id: UUID, lista_data: ListaCreate, if_match: Optional[str] = Header(None)):
+    return await update_list(list_id, lista_data, expected_revisions(if_match))
 
 @router.delete("/lists/{list_id}", tags=["Endpoints de lista"], summary="Eliminar una lista", status_code=204)
-def api_delete_list(list_id: UUID):
-    delete_list(list_id)
+async def api_delete_list(list_id: UUID):
+    await delete_list(list_id)
     return None
 
 @router.get("/lists/completion/{list_id}", tags=["Endpoints de lista"], summary="Porcentaje de tareas completadas")
-def api_get_list_completion(list_id: UUID):
-    return {"completion": get_list_completion(list_id)}
+async def api_get_list_completion(list_id: UUID, response: Response, if_none_match: Optional[str] = Header(None)):
+    revision = await get_list_revision(list_id)
+    if etag_matches(if_none_match, revision):
+        return not_modified(revision)
+    response.headers["ETag"] = make_etag(revision)
+    return {"completion": await get_list_completion(list_id)}
+
+@router.post("/lists/completion", tags=["Endpoints de lista"], summary="Porcentaje de tareas completadas de varias listas")
+async def api_get_lists_completion(list_ids: List[UUID] = Body(..., embed=True)):
+    return {"completion": await get_lists_completion(list_ids)}
+
+##### Sincronizacion #####
+
+@router.get("/changes", response_model=Cambios, tags=["Sincronizacion"], summary="Cambios desde una revision (sincronizacion incremental)")
+async def api_get_changes(
+    since: int = Query(..., ge=0, description="revision del ultimo /changes (o de la ultima descarga completa)"),
+    list_id: Optional[UUID] = Query(None, description="Limita los cambios a una lista"),
+):
+    return await get_changes(since, list_id)
+
+##### Exportacion #####
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+@router.get("/export", tags=["Exportacion"], summary="Exportar listas y tareas en streaming (NDJSON o CSV)")
+async def api_export(format: str = Query("ndjson", description="ndjson o csv")):
+    contenido = await export_workspace(format)
+    return StreamingResponse(
+        contenido,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="export.{format}"'},
+    )
+
+##### Importacion #####
+
+@router.post(
+    "/tasks/{list_id}/import", response_model=Importacion, status_code=202, tags=["Importacion"],
+    summary="Importar tareas a una lista desde un archivo CSV o NDJSON (el body es el archivo)",
+)
+async def api_import_tasks(
+    list_id: UUID, request: Request, response: Response, format: str = Query("ndjson", description="ndjson o csv")
+):
+    # El body se lee en streaming (request.stream()), sin pasar por multipart ni juntarlo en memoria
+    importacion = await import_tasks(list_id, format, request.stream())
+    response.headers["Location"] = f"/imports/{importacion.id}"
+    return importacion
+
+@router.get("/imports/{job_id}", response_model=Importacion, tags=["Importacion"], summary="Progreso y errores de una importacion")
+async def api_get_import(job_id: UUID):
+    return await get_import(job_id)
+
+##### Eventos #####
+
+@router.get("/events/{list_id}", tags=["Eventos"], summary="Cambios de una lista en tiempo real (Server-Sent Events)")
+async def api_list_events(list_id: UUID, last_event_id: Optional[int] = Header(None)):
+    # Con Last-Event-ID se reenvia lo que paso desde ese evento, o "resync" si ya no esta en memoria
+    eventos = await subscribe_list_events(list_id, last_event_id)
+    return StreamingResponse(
+        eventos, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 ##### Tareas #####
 
+# Los endpoints en lote y la busqueda se declaran antes que /tasks/{task_id} para que "bulk" o "search"
+# no se tomen como id
+
+@router.get("/tasks/search", response_model=List[ResultadoBusqueda], tags=["Endpoints de tareas"], summary="Buscar tareas por texto")
+async def api_search_tasks(
+    q: str = Query(..., min_length=1, description="Texto a buscar en titulo, descripcion, partner y rol"),
+    list_id: Optional[UUID] = Query(None, description="Limita la busqueda a una lista"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    return await search_tasks(q, list_id, limit)
+
+@router.post("/tasks/{list_id}/bulk", response_model=List[ResultadoBulk], tags=["Endpoints de tareas"], summary="Crear varias tareas en una lista")
+async def api_create_tasks(list_id: UUID, tareas_data: List[TareaCreate], current_user: User = Depends(get_current_user)):
+    return await create_tasks(list_id, tareas_data, current_user)
+
+@router.put("/tasks/bulk", response_model=List[ResultadoBulk], tags=["Endpoints de tareas"], summary="Actualizar varias tareas")
+async def api_update_tasks(tareas_data: List[TareaBulkUpdate], current_user: User = Depends(get_current_user)):
+    return await update_tasks(tareas_data, current_user)
+
+@router.patch("/tasks/status/bulk", response_model=List[ResultadoBulk], tags=["Endpoints de tareas"], summary="Modificar estado de varias tareas")
+async def api_update_tasks_status(cambios: List[TareaEstadoBulk]):
+    return await update_tasks_status(cambios)
+
+@router.delete("/tasks/bulk", response_model=List[ResultadoBulk], tags=["Endpoints de tareas"], summary="Eliminar varias tareas")
+async def api_delete_tasks(task_ids: List[UUID] = Body(...)):
+    return await delete_tasks(task_ids)
+
 @router.get("/tasks/{list_id}", response_model=List[Tarea], tags=["Endpoints de tareas"], summary="Traer todas las tareas de una lista")
-def api_get_tasks(list_id: UUID):
-    return get_tasks(list_id)
+async def api_get_tasks(
+    list_id: UUID,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    key = ("tasks", list_id, limit, cursor)
+    revision = await get_list_revision(list_id)
+    if etag_matches(if_none_match, revision):
+        return not_modified(revision)
+    entry = response_cache.get(key, revision)
+    if entry is None:
+        tareas, next_cursor = await get_tasks_page(list_id, limit, cursor)
+        entry = response_cache.set(key, revision, TAREAS_JSON.dump_json(tareas), next_cursor)
+    return cached_json_response(entry)
 
 @router.post("/tasks/{list_id}/", response_model=Tarea, tags=["Endpoints de tareas"], summary="Crear tareas en una lista")
-def api_create_task(list_id: UUID, tarea_data: TareaCreate, current_user: User = Depends(get_current_user)):
-    return create_task(list_id, tarea_data, current_user)
+async def api_create_task(list_id: UUID, tarea_data: TareaCreate, current_user: User = Depends(get_current_user)):
+    return await create_task(list_id, tarea_data, current_user)
 
 @router.put("/tasks/{task_id}", response_model=Tarea, tags=["Endpoints de tareas"], summary="Actualizar tarea por ID")
-def api_update_task(task_id: UUID, tarea_data: TareaCreate, current_user: User = Depends(get_current_user)):
-    return update_task(task_id, tarea_data, current_user)
+async def api_update_task(
+    task_id: UUID,
+    tarea_data: TareaCreate,
+    current_user: User = Depends(get_current_user),
+    if_match: Optional[str] = Header(None, description="ETag de la lista de la tarea"),
+):
+    return await update_task(task_id, tarea_data, current_user, expected_revisions(if_match))
 
 @router.patch("/tasks/status/{task_id}", response_model=Tarea, tags=["Endpoints de tareas"], summary="Modificar estado de una tarea por ID")
-def api_update_task_status(task_id: UUID, status: str = Body(..., embed=True)):
-    return update_task_status(task_id, status)
+async def api_update_task_status(
+    task_id: UUID,
+    status: str = Body(..., embed=True),
+    if_match: Optional[str] = Header(None, description="ETag de la lista de la tarea"),
+):
+    return await update_task_status(task_id, status, expected_revisions(if_match))
 
 @router.delete("/tasks/{task_id}", tags=["Endpoints de tareas"], summary="Eliminar tarea por ID", status_code=204)
-def api_delete_task(task_id: UUID):
-    delete_task(task_id)
+async def api_delete_task(task_id: UUID):
+    await delete_task(task_id)
     return None
 
-@router.get("/tasks/filter/{list_id}", response_model=List[Tarea], tags=["Endpoints de tareas"], summary="Filtrar tareas por estado o prioridad")
-def api_filter_tasks(list_id: UUID, status: str = Query(None), priority: str = Query(None)):
-    return filter_tasks(list_id, status, priority)
+@router.get("/tasks/filter/{list_id}", response_model=List[Tarea], tags=["Endpoints de tareas"], summary="Filtrar tareas por estado, prioridad o responsable")
+async def api_filter_tasks(list_id: UUID, status: str = Query(None), priority: str = Query(None), assigned_to: str = Query(None)):
+    return await filter_tasks(list_id, status, priority, assigned_to)
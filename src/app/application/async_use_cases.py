@@ -0,0 +1,187 @@
+import asyncio
+from typing import AsyncIterator, Collection, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.application import use_cases
+from app.auth.password_pool import password_verifier
+from app.infrastructure.events import broker
+from app.infrastructure.import_jobs import import_jobs
+from app.infrastructure.metrics import mark_use_case_end, timed_use_case
+from app.infrastructure.profiling import run_profiled
+from app.domain.models import (
+    Cambios, Importacion, Lista, ListaCreate, ListaResumen, ResultadoBusqueda, Tarea, TareaCreate, TareaBulkUpdate, TareaEstadoBulk, ResultadoBulk, User, UserInDB
+)
+from app.domain.exceptions import ImportacionNoEncontradaException, UsuarioNoEncontradoException
+
+# Versiones async de los casos de uso. Con un repositorio en memoria se ejecutan directo en el event loop;
+# si el repositorio hace I/O bloqueante (repository.blocking) se mandan al threadpool, un salto por request.
+
+# Cada cuantas lineas de exportacion se le devuelve el control al event loop
+EXPORT_YIELD_EVERY = 500
+
+# Hash bcrypt fijo (mismo costo que el de los usuarios) contra el que se verifica si el usuario no existe
+DUMMY_PASSWORD_HASH = "$2b$12$ozjm4cchUMjsMJqxIYGBUOcWWClA6bWClQ2RAFlLnsoTUSu6Ibtji"
+
+
+def _blocking() -> bool:
+    return getattr(use_cases.repository, "blocking", False)
+
+async def _run(use_case, *args, **kwargs):
+    # Se mide la ejecucion del caso de uso; lo que pasa despues de mark_use_case_end cuenta como serializacion
+    if not _blocking():
+        result = timed_use_case(use_case, *args, **kwargs)
+    else:
+        result = await run_in_threadpool(run_profiled, timed_use_case, use_case, *args, **kwargs)
+    mark_use_case_end()
+    return result
+
+# USUARIOS
+# Viven en un dict en memoria fuera del repositorio: la busqueda se hace directo, sin threadpool
+
+async def get_user_by_username(username: str) -> UserInDB:
+    return use_cases.get_user_by_username(username)
+
+async def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
+    # bcrypt corre en el pool de procesos acotado; si esta saturado se propaga LoginSaturadoException (503).
+    # Un usuario inexistente tambien paga una verificacion (contra DUMMY_PASSWORD_HASH) y pasa por el mismo
+    # cupo: el tiempo de respuesta no revela que usernames existen
+    try:
+        user = use_cases.get_user_by_username(username)
+    except UsuarioNoEncontradoException:
+        await password_verifier.verify(password, DUMMY_PASSWORD_HASH)
+        return None
+    if not await password_verifier.verify(password, user.hashed_password):
+        return None
+    return user
+
+# REVISIONES
+
+async def get_revision() -> int:
+    return await _run(use_cases.get_revision)
+
+async def get_list_revision(list_id: UUID) -> int:
+    return await _run(use_cases.get_list_revision, list_id)
+
+async def get_changes(since: int, list_id: Optional[UUID] = None) -> Cambios:
+    return await _run(use_cases.get_changes, since, list_id)
+
+# METRICAS
+
+async def get_repository_stats() -> dict:
+    return await _run(use_cases.get_repository_stats)
+
+# LISTAS
+
+async def get_lists_page(
+    limit: Optional[int] = None, cursor: Optional[str] = None, summary: bool = False
+) -> Tuple[Union[List[Lista], List[ListaResumen]], Optional[str]]:
+    return await _run(use_cases.get_lists_page, limit, cursor, summary)
+
+async def create_list(lista_data: ListaCreate) -> Lista:
+    return await _run(use_cases.create_list, lista_data)
+
+async def update_list(
+    list_id: UUID, lista_data: ListaCreate, expected_revisions: Optional[Collection[int]] = None
+) -> Lista:
+    return await _run(use_cases.update_list, list_id, lista_data, expected_revisions)
+
+async def delete_list(list_id: UUID):
+    return await _run(use_cases.delete_list, list_id)
+
+async def get_list_completion(list_id: UUID) -> str:
+    return await _run(use_cases.get_list_completion, list_id)
+
+async def get_lists_completion(list_ids: List[UUID]) -> Dict[UUID, Optional[str]]:
+    return await _run(use_cases.get_lists_completion, list_ids)
+
+# TAREAS
+
+async def get_tasks_page(
+    list_id: UUID, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List[Tarea], Optional[str]]:
+    return await _run(use_cases.get_tasks_page, list_id, limit, cursor)
+
+async def create_task(list_id: UUID, tarea_data: TareaCreate, current_user: Optional[User] = None) -> Tarea:
+    return await _run(use_cases.create_task, list_id, tarea_data, current_user)
+
+async def update_task(
+    task_id: UUID,
+    tarea_data: TareaCreate,
+    current_user: Optional[User] = None,
+    expected_revisions: Optional[Collection[int]] = None,
+) -> Tarea:
+    return await _run(use_cases.update_task, task_id, tarea_data, current_user, expected_revisions)
+
+async def update_task_status(task_id: UUID, status: str, expected_revisions: Optional[Collection[int]] = None) -> Tarea:
+    return await _run(use_cases.update_task_status, task_id, status, expected_revisions)
+
+async def delete_task(task_id: UUID):
+    return await _run(use_cases.delete_task, task_id)
+
+async def filter_tasks(
+    list_id: UUID, status: Optional[str] = None, priority: Optional[str] = None, assigned_to: Optional[str] = None
+) -> List[Tarea]:
+    return await _run(use_cases.filter_tasks, list_id, status, priority, assigned_to)
+
+async def search_tasks(query: str, list_id: Optional[UUID] = None, limit: int = 20) -> List[ResultadoBusqueda]:
+    return await _run(use_cases.search_tasks, query, list_id, limit)
+
+# TAREAS EN LOTE
+
+async def create_tasks(list_id: UUID, tareas_data: List[TareaCreate], current_user: Optional[User] = None) -> List[ResultadoBulk]:
+    return await _run(use_cases.create_tasks, list_id, tareas_data, current_user)
+
+async def update_tasks(tareas_data: List[TareaBulkUpdate], current_user: Optional[User] = None) -> List[ResultadoBulk]:
+    return await _run(use_cases.update_tasks, tareas_data, current_user)
+
+async def update_tasks_status(cambios: List[TareaEstadoBulk]) -> List[ResultadoBulk]:
+    return await _run(use_cases.update_tasks_status, cambios)
+
+async def delete_tasks(task_ids: List[UUID]) -> List[ResultadoBulk]:
+    return await _run(use_cases.delete_tasks, task_ids)
+
+# EXPORTACION
+
+async def _iterate_inline(lineas) -> AsyncIterator[str]:
+    for i, linea in enumerate(lineas, 1):
+        yield linea
+        if i % EXPORT_YIELD_EVERY == 0:
+            await asyncio.sleep(0)
+
+async def export_workspace(format: str) -> AsyncIterator[str]:
+    # El formato se valida antes de empezar a mandar la respuesta
+    lineas = use_cases.export_workspace(format)
+    if _blocking():
+        return iterate_in_threadpool(lineas)
+    return _iterate_inline(lineas)
+
+# IMPORTACION
+
+async def import_tasks(list_id: UUID, format: str, chunks: AsyncIterator[bytes]) -> Importacion:
+    # Formato y lista se validan antes de leer el body; el body se guarda tal como llega y se responde apenas
+    # termina de subir, sin esperar a que se procese
+    await _run(use_cases.validar_importacion, list_id, format)
+    job = import_jobs.create(list_id, format)
+    try:
+        async for chunk in chunks:
+            if not job.write_nowait(chunk):
+                # Ya no entra en memoria: se escribe al archivo temporal fuera del event loop
+                await run_in_threadpool(job.write, chunk)
+    except BaseException:
+        job.abort()
+        raise
+    job.start(lambda lineas: use_cases.import_tasks(list_id, format, lineas))
+    return job.snapshot()
+
+async def get_import(job_id: UUID) -> Importacion:
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise ImportacionNoEncontradaException()
+    return job.snapshot()
+
+# EVENTOS
+
+async def subscribe_list_events(list_id: UUID, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    # La lista se valida antes de empezar la respuesta; despues cada suscriptor solo espera en el event loop
+    await _run(use_cases.get_list_revision, list_id)
+    return broker.subscribe(list_id, last_event_id)
@@ -1,170 +1,498 @@
-from typing import List, Optional
+import base64
+import binascii
+import csv
+import io
+import json
+from typing import Collection, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from uuid import UUID
-from app.domain.models import Lista, ListaCreate, Tarea, TareaCreate, User, UserCreate, task_status, task_progress, task_priority
+from fastapi import HTTPException
+from pydantic import ValidationError
+from app.domain.models import (
+    Cambios, ErrorImportacion, Lista, ListaCreate, ListaResumen, ResultadoBusqueda, Tarea, TareaCreate, TareaBulkUpdate, TareaEstadoBulk, ResultadoBulk,
+    User, UserCreate, UserInDB, task_status, task_status_codes, task_progress_codes, task_priority_codes
+)
 from app.domain.exceptions import (
     ListaNoEncontradaException, TareaNoEncontradaException,
-    EstadoInvalidoException, ProgresoInvalidoException, PrioridadInvalidaException, UsuarioNoEncontradoException
+    EstadoInvalidoException, ProgresoInvalidoException, PrioridadInvalidaException, UsuarioNoEncontradoException,
+    CursorInvalidoException, FormatoInvalidoException
 )
-from app.infrastructure.repository import fake_db, fake_db_users
+from app.auth.auth_handler import get_password_hash
+from app.infrastructure.repository import repository, fake_db_users
+from app.infrastructure.notifications import notifier
+from app.infrastructure.events import broker
 
 
 # Validacioness
 def validar_estado(status: str):
-    if status not in task_status:
+    if status not in task_status_codes:
         raise EstadoInvalidoException()
 
 def validar_progreso(progress: str):
-    if progress not in task_progress:
+    if progress not in task_progress_codes:
         raise ProgresoInvalidoException()
 
 def validar_prioridad(priority: str):
-    if priority not in task_priority:
+    if priority not in task_priority_codes:
         raise PrioridadInvalidaException()
 
+# Paginacion: el cursor es opaco para el cliente, internamente es la secuencia del ultimo item
+def encode_cursor(after: Optional[int]) -> Optional[str]:
+    if after is None:
+        return None
+    return base64.urlsafe_b64encode(str(after).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalidoException()
+
 # USUARIOS
 
 def create_user(user_data: UserCreate) -> User:
-    user = User(
+    user = UserInDB(
         username        =   user_data.username,
         full_name       =   user_data.full_name,
-        email           =   user_data.email
+        email           =   user_data.email,
+        hashed_password =   get_password_hash(user_data.password)
     )
-    fake_db_users.append(user)
+    fake_db_users[user.username] = user
+    return User(**user.model_dump(exclude={"hashed_password"}))
+
+def get_user_by_username(username: str) -> UserInDB:
+    user = fake_db_users.get(username)
+    if user is None:
+        raise UsuarioNoEncontradoException()
     return user
 
-def get_user_by_username(username: str) -> User:
-    for user in fake_db_users:
-        if user.username == username:
-            return user
-    raise UsuarioNoEncontradoException()
+# REVISIONES
+# Cada mutacion del repositorio sube la revision global y la de su lista; sirven para cachear lecturas
+
+def get_revision() -> int:
+    return repository.get_revision()
+
+def get_list_revision(list_id: UUID) -> int:
+    revision = repository.get_list_revision(list_id)
+    if revision is None:
+        raise ListaNoEncontradaException()
+    return revision
+
+def get_changes(since: int, list_id: Optional[UUID] = None) -> Cambios:
+    # Sincronizacion incremental: lo creado, modificado o borrado despues de la revision since (de todas las
+    # listas o de una). Si el journal ya no llega hasta since, resync=True y el cliente vuelve a bajar todo
+    return repository.get_changes(since, list_id)
+
+# METRICAS
+
+def get_repository_stats() -> dict:
+    return repository.get_stats()
+
+# EVENTOS
+# Los cambios se publican en el broker solo si alguien escucha esa lista; sin suscriptores no se busca la
+# lista de la tarea ni se serializa nada
+
+def _lista_de_tarea(task_id: UUID) -> Optional[UUID]:
+    return repository.get_task_list_id(task_id) if broker.active else None
+
+def _publicar_tareas(list_id: Optional[UUID], event_type: str, tareas: List[Tarea]):
+    if list_id is None or not broker.subscribers(list_id):
+        return
+    if len(tareas) > broker.buffer:
+        # Un lote mas grande que el anillo: mas barato que los clientes vuelvan a pedir la lista
+        broker.publish(list_id, "resync")
+        return
+    for tarea in tareas:
+        broker.publish(list_id, event_type, task=tarea.model_dump(mode="json"))
+
+def _publicar_baja(list_id: Optional[UUID], task_id: UUID):
+    if list_id is not None:
+        broker.publish(list_id, "task.deleted", task_id=str(task_id))
 
 # LISTAS
 
 def get_lists() -> List[Lista]:
-    return fake_db
+    return repository.get_lists()
+
+def get_lists_page(
+    limit: Optional[int] = None, cursor: Optional[str] = None, summary: bool = False
+) -> Tuple[Union[List[Lista], List[ListaResumen]], Optional[str]]:
+    after = decode_cursor(cursor)
+    if summary:
+        listas, next_after = repository.page_list_summaries(after, limit)
+    else:
+        listas, next_after = repository.page_lists(after, limit)
+    return listas, encode_cursor(next_after)
 
 def create_list(lista_data: ListaCreate) -> Lista:
     nueva_lista = Lista(name=lista_data.name, tasks=[])
-    fake_db.append(nueva_lista)
+    repository.add_list(nueva_lista)
     return nueva_lista
 
-def update_list(list_id: UUID, lista_data: ListaCreate) -> Lista:
-    for i, lista in enumerate(fake_db):
-        if lista.id == list_id:
-            lista_actualizada = Lista(id=lista.id, name=lista_data.name, tasks=lista.tasks)
-            fake_db[i] = lista_actualizada
-            return lista_actualizada
-    raise ListaNoEncontradaException()
+def update_list(
+    list_id: UUID, lista_data: ListaCreate, expected_revisions: Optional[Collection[int]] = None
+) -> Lista:
+    # expected_revisions: si se indica, la escritura solo se aplica si la lista sigue en alguna de esas revisiones
+    lista_actualizada = repository.rename_list(list_id, lista_data.name, expected_revisions)
+    if lista_actualizada is None:
+        raise ListaNoEncontradaException()
+    broker.publish(list_id, "list.updated", name=lista_actualizada.name)
+    return lista_actualizada
 
 def delete_list(list_id: UUID):
-    for i, lista in enumerate(fake_db):
-        if lista.id == list_id:
-            del fake_db[i]
-            return
-    raise ListaNoEncontradaException()
+    if not repository.delete_list(list_id):
+        raise ListaNoEncontradaException()
+    broker.publish(list_id, "list.deleted")
 
 def get_list_completion(list_id: UUID) -> str:
-    for lista in fake_db:
-        if lista.id == list_id:
-            total = len(lista.tasks)
-            if total == 0:
-                return "0%"
-            completadas = sum(1 for t in lista.tasks if t.status == task_status[0])
-            porcentaje = round((completadas / total) * 100)
-            return f"{porcentaje}%"
-    raise ListaNoEncontradaException()
+    total = repository.count_tasks(list_id)
+    if total is None:
+        raise ListaNoEncontradaException()
+    if total == 0:
+        return "0%"
+    completadas = repository.count_tasks(list_id, status=task_status[0])
+    porcentaje = round((completadas / total) * 100)
+    return f"{porcentaje}%"
+
+def get_lists_completion(list_ids: List[UUID]) -> Dict[UUID, Optional[str]]:
+    # Las listas inexistentes devuelven None en lugar de cortar todo el lote
+    completions = {}
+    for list_id in list_ids:
+        try:
+            completions[list_id] = get_list_completion(list_id)
+        except ListaNoEncontradaException:
+            completions[list_id] = None
+    return completions
 
 # TAREAS
 
 def get_tasks(list_id: UUID) -> List[Tarea]:
-    for lista in fake_db:
-        if lista.id == list_id:
-            return lista.tasks
-    raise ListaNoEncontradaException()
+    tareas = repository.get_tasks(list_id)
+    if tareas is None:
+        raise ListaNoEncontradaException()
+    return tareas
 
-def create_task(list_id: UUID, tarea_data: TareaCreate, current_user: User) -> Tarea:
+def get_tasks_page(
+    list_id: UUID, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List[Tarea], Optional[str]]:
+    page = repository.page_tasks(list_id, decode_cursor(cursor), limit)
+    if page is None:
+        raise ListaNoEncontradaException()
+    tareas, next_after = page
+    return tareas, encode_cursor(next_after)
+
+def _validar_tarea(tarea_data: TareaCreate):
     validar_estado(tarea_data.status)
     validar_progreso(tarea_data.progress)
     validar_prioridad(tarea_data.priority)
 
-    assigned_user = current_user
-    if tarea_data.assigned_to:
-        assigned_user = get_user_by_username(tarea_data.assigned_to)
+def _resolver_responsable(
+    tarea_data: TareaCreate, current_user: Optional[User], usuarios: Optional[Dict[str, User]] = None
+) -> Optional[User]:
+    # usuarios: cache opcional para resolver cada responsable una sola vez por lote
+    if not tarea_data.assigned_to:
+        return current_user
+    if usuarios is None:
+        return get_user_by_username(tarea_data.assigned_to)
+    if tarea_data.assigned_to not in usuarios:
+        usuarios[tarea_data.assigned_to] = get_user_by_username(tarea_data.assigned_to)
+    return usuarios[tarea_data.assigned_to]
 
-    for lista in fake_db:
-        if lista.id == list_id:
-            nueva_tarea = Tarea(
-                title       = tarea_data.title,
-                description = tarea_data.description,
-                partner     = tarea_data.partner,
-                rol         = tarea_data.rol,
-                status      = tarea_data.status,
-                progress    = tarea_data.progress,
-                priority    = tarea_data.priority,
-                assigned_to = assigned_user.username if assigned_user else None
-            )
-            lista.tasks.append(nueva_tarea)
+def _build_tarea(tarea_data: TareaCreate, assigned_user: Optional[User], task_id: Optional[UUID] = None) -> Tarea:
+    campos = dict(
+        title       = tarea_data.title,
+        description = tarea_data.description,
+        partner     = tarea_data.partner,
+        rol         = tarea_data.rol,
+        status      = tarea_data.status,
+        progress    = tarea_data.progress,
+        priority    = tarea_data.priority,
+        assigned_to = assigned_user.username if assigned_user else None
+    )
+    if task_id is not None:
+        campos["id"] = task_id
+    return Tarea(**campos)
 
-            print(f"[Notificación] Se asignó la tarea '{tarea_data.title}' al usuario '{assigned_user.username}'")
+def _notificar_asignacion(tarea: Tarea, responsable: Optional[User]):
+    # Solo encola: la entrega la hace el hilo de notificaciones, la request no la espera
+    if responsable is not None:
+        notifier.notify(responsable.username, responsable.email, tarea.title)
 
-            return nueva_tarea
+def create_task(list_id: UUID, tarea_data: TareaCreate, current_user: Optional[User] = None) -> Tarea:
+    _validar_tarea(tarea_data)
+    assigned_user = _resolver_responsable(tarea_data, current_user)
 
-    raise ListaNoEncontradaException()
+    nueva_tarea = _build_tarea(tarea_data, assigned_user)
+    if repository.add_task(list_id, nueva_tarea) is None:
+        raise ListaNoEncontradaException()
 
-def update_task(task_id: UUID, tarea_data: TareaCreate, current_user: User) -> Tarea:
-    validar_estado(tarea_data.status)
-    validar_progreso(tarea_data.progress)
-    validar_prioridad(tarea_data.priority)
+    _notificar_asignacion(nueva_tarea, assigned_user)
+    _publicar_tareas(list_id, "task.created", [nueva_tarea])
+    return nueva_tarea
 
-    assigned_user = current_user
-    if tarea_data.assigned_to:
-        assigned_user = get_user_by_username(tarea_data.assigned_to)
-
-    for lista in fake_db:
-        for i, tarea in enumerate(lista.tasks):
-            if tarea.id == task_id:
-                tarea_actualizada = Tarea(
-                    id = tarea.id,
-                    title = tarea_data.title,
-                    description = tarea_data.description,
-                    partner = tarea_data.partner,
-                    rol = tarea_data.rol,
-                    status = tarea_data.status,
-                    progress = tarea_data.progress,
-                    priority = tarea_data.priority,
-                    assigned_to = assigned_user.username if assigned_user else None
-                )
-                lista.tasks[i] = tarea_actualizada
-                return tarea_actualizada
-
-    raise TareaNoEncontradaException()
-
-def update_task_status(task_id: UUID, status: str) -> Tarea:
+def update_task(
+    task_id: UUID,
+    tarea_data: TareaCreate,
+    current_user: Optional[User] = None,
+    expected_revisions: Optional[Collection[int]] = None,
+) -> Tarea:
+    _validar_tarea(tarea_data)
+    assigned_user = _resolver_responsable(tarea_data, current_user)
+
+    tarea_actualizada = _build_tarea(tarea_data, assigned_user, task_id)
+    if repository.replace_task(tarea_actualizada, expected_revisions) is None:
+        raise TareaNoEncontradaException()
+    _publicar_tareas(_lista_de_tarea(task_id), "task.updated", [tarea_actualizada])
+    return tarea_actualizada
+
+def update_task_status(task_id: UUID, status: str, expected_revisions: Optional[Collection[int]] = None) -> Tarea:
     validar_estado(status)
-    for lista in fake_db:
-        for tarea in lista.tasks:
-            if tarea.id == task_id:
-                tarea.status = status
-                return tarea
-    raise TareaNoEncontradaException()
+    tarea = repository.update_task_status(task_id, status, expected_revisions)
+    if tarea is None:
+        raise TareaNoEncontradaException()
+    _publicar_tareas(_lista_de_tarea(task_id), "task.updated", [tarea])
+    return tarea
 
 def delete_task(task_id: UUID):
-    for lista in fake_db:
-        for i, tarea in enumerate(lista.tasks):
-            if tarea.id == task_id:
-                del lista.tasks[i]
-                return
-    raise TareaNoEncontradaException()
-
-def filter_tasks(list_id: UUID, status: Optional[str] = None, priority: Optional[str] = None) -> List[Tarea]:
-    for lista in fake_db:
-        if lista.id == list_id:
-            tareas = lista.tasks
-            if status:
-                validar_estado(status)
-                tareas = [t for t in tareas if t.status == status]
-            if priority:
-                validar_prioridad(priority)
-                tareas = [t for t in tareas if t.priority == priority]
-            return tareas
-    raise ListaNoEncontradaException()
+    # La lista se busca antes de borrar (despues la tarea ya no esta)
+    list_id = _lista_de_tarea(task_id)
+    if not repository.delete_task(task_id):
+        raise TareaNoEncontradaException()
+    _publicar_baja(list_id, task_id)
+
+def filter_tasks(
+    list_id: UUID, status: Optional[str] = None, priority: Optional[str] = None, assigned_to: Optional[str] = None
+) -> List[Tarea]:
+    if status:
+        validar_estado(status)
+    if priority:
+        validar_prioridad(priority)
+    tareas = repository.filter_tasks(list_id, status=status, priority=priority, assigned_to=assigned_to)
+    if tareas is None:
+        raise ListaNoEncontradaException()
+    return tareas
+
+def search_tasks(query: str, list_id: Optional[UUID] = None, limit: int = 20) -> List[ResultadoBusqueda]:
+    # Busqueda de texto sin acentos sobre title, description, partner y rol, ordenada por relevancia
+    resultados = repository.search_tasks(query, list_id, limit)
+    if resultados is None:
+        raise ListaNoEncontradaException()
+    return resultados
+
+# TAREAS EN LOTE
+# Cada item se valida por separado: un item invalido no corta el lote
+
+def _resultado_error(index: int, error: HTTPException, task_id: Optional[UUID] = None) -> ResultadoBulk:
+    return ResultadoBulk(index=index, id=task_id, ok=False, error=error.detail)
+
+def create_tasks(list_id: UUID, tareas_data: List[TareaCreate], current_user: Optional[User] = None) -> List[ResultadoBulk]:
+    if repository.count_tasks(list_id) is None:
+        raise ListaNoEncontradaException()
+
+    usuarios: Dict[str, User] = {}
+    resultados: List[Optional[ResultadoBulk]] = []
+    nuevas: List[Tuple[int, Tarea]] = []
+    for index, tarea_data in enumerate(tareas_data):
+        try:
+            _validar_tarea(tarea_data)
+            nuevas.append((index, _build_tarea(tarea_data, _resolver_responsable(tarea_data, current_user, usuarios))))
+            resultados.append(None)
+        except HTTPException as error:
+            resultados.append(_resultado_error(index, error))
+    if not nuevas:
+        # Si no quedo ninguna valida no se toca la lista: ni revision nueva, ni oplog, ni journal, ni eventos
+        return resultados
+
+    if repository.add_tasks(list_id, [tarea for _, tarea in nuevas]) is None:
+        raise ListaNoEncontradaException()
+    for index, tarea in nuevas:
+        _notificar_asignacion(tarea, usuarios.get(tarea.assigned_to, current_user))
+        resultados[index] = ResultadoBulk(index=index, id=tarea.id, ok=True, task=tarea)
+    _publicar_tareas(list_id, "task.created", [tarea for _, tarea in nuevas])
+    return resultados
+
+def update_tasks(tareas_data: List[TareaBulkUpdate], current_user: Optional[User] = None) -> List[ResultadoBulk]:
+    usuarios: Dict[str, User] = {}
+    resultados = []
+    for index, tarea_data in enumerate(tareas_data):
+        try:
+            _validar_tarea(tarea_data)
+            tarea = _build_tarea(tarea_data, _resolver_responsable(tarea_data, current_user, usuarios), tarea_data.id)
+            if repository.replace_task(tarea) is None:
+                raise TareaNoEncontradaException()
+            _publicar_tareas(_lista_de_tarea(tarea.id), "task.updated", [tarea])
+            resultados.append(ResultadoBulk(index=index, id=tarea.id, ok=True, task=tarea))
+        except HTTPException as error:
+            resultados.append(_resultado_error(index, error, tarea_data.id))
+    return resultados
+
+def update_tasks_status(cambios: List[TareaEstadoBulk]) -> List[ResultadoBulk]:
+    resultados = []
+    for index, cambio in enumerate(cambios):
+        try:
+            tarea = update_task_status(cambio.id, cambio.status)
+            resultados.append(ResultadoBulk(index=index, id=tarea.id, ok=True, task=tarea))
+        except HTTPException as error:
+            resultados.append(_resultado_error(index, error, cambio.id))
+    return resultados
+
+def delete_tasks(task_ids: List[UUID]) -> List[ResultadoBulk]:
+    resultados = []
+    for index, task_id in enumerate(task_ids):
+        list_id = _lista_de_tarea(task_id)
+        if repository.delete_task(task_id):
+            _publicar_baja(list_id, task_id)
+            resultados.append(ResultadoBulk(index=index, id=task_id, ok=True))
+        else:
+            resultados.append(_resultado_error(index, TareaNoEncontradaException(), task_id))
+    return resultados
+
+# EXPORTACION
+
+# Cantidad de listas/tareas que se leen del repositorio por vuelta
+EXPORT_CHUNK_SIZE = 500
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CSV_COLUMNS = [
+    "list_id", "list_name", "task_id", "title", "description", "partner", "rol",
+    "status", "progress", "priority", "assigned_to",
+]
+
+def _iter_in_chunks(fetch_page) -> Iterator:
+    # Recorre el repositorio por paginas, asi la memoria no depende del tamaño total
+    after = None
+    while True:
+        items, after = fetch_page(after)
+        yield from items
+        if after is None:
+            return
+
+def _iter_lists_with_tasks() -> Iterator[Tuple[ListaResumen, Iterator[Tarea]]]:
+    for resumen in _iter_in_chunks(lambda after: repository.page_list_summaries(after, EXPORT_CHUNK_SIZE)):
+        def fetch_tasks(after, list_id=resumen.id):
+            # Si la lista se borro durante la exportacion se corta sin error
+            return repository.page_tasks(list_id, after, EXPORT_CHUNK_SIZE) or ([], None)
+        yield resumen, _iter_in_chunks(fetch_tasks)
+
+def _export_ndjson() -> Iterator[str]:
+    for resumen, tareas in _iter_lists_with_tasks():
+        yield json.dumps({"type": "list", "id": str(resumen.id), "name": resumen.name}, ensure_ascii=False) + "\n"
+        for tarea in tareas:
+            fila = {"type": "task", "list_id": str(resumen.id), **tarea.model_dump(mode="json")}
+            yield json.dumps(fila, ensure_ascii=False) + "\n"
+
+def _export_csv() -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(row) -> str:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    yield render(EXPORT_CSV_COLUMNS)
+    for resumen, tareas in _iter_lists_with_tasks():
+        vacia = True
+        for tarea in tareas:
+            vacia = False
+            yield render([
+                resumen.id, resumen.name, tarea.id, tarea.title, tarea.description, tarea.partner, tarea.rol,
+                tarea.status, tarea.progress, tarea.priority, tarea.assigned_to or "",
+            ])
+        if vacia:
+            yield render([resumen.id, resumen.name] + [""] * (len(EXPORT_CSV_COLUMNS) - 2))
+
+def export_workspace(format: str) -> Iterator[str]:
+    if format not in EXPORT_FORMATS:
+        raise FormatoInvalidoException()
+    return _export_ndjson() if format == "ndjson" else _export_csv()
+
+# IMPORTACION
+# Acepta lo mismo que genera la exportacion: CSV con encabezado (columnas con los campos de TareaCreate; las
+# demas, como list_id o task_id, se ignoran) o NDJSON (un objeto por linea; las lineas "type": "list" se
+# saltean). Las filas se leen de a una y se aplican en lotes, asi la memoria no depende del tamaño del archivo.
+
+# Filas que se validan y se guardan juntas (un add_tasks por lote)
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = EXPORT_FORMATS
+IMPORT_FIELDS = list(TareaCreate.model_fields)
+# Vacios en estas columnas del CSV toman el valor por defecto (en las demas "" es un valor valido)
+_IMPORT_OPTIONAL_FIELDS = {name for name, field in TareaCreate.model_fields.items() if not field.is_required()}
+
+
+class LoteImportado(NamedTuple):
+    rows: int
+    imported: int
+    errors: List[ErrorImportacion]
+
+
+def _iter_csv_rows(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    # (linea, campos, error); con un campo multilinea la linea es la ultima del registro
+    reader = csv.DictReader(lines)
+    try:
+        for fila in reader:
+            campos = {
+                name: fila[name] for name in IMPORT_FIELDS
+                if fila.get(name) is not None and not (name in _IMPORT_OPTIONAL_FIELDS and fila[name] == "")
+            }
+            # Listas vacias de la exportacion: fila sin ningun dato de tarea
+            if not any(fila.get(name) for name in IMPORT_FIELDS):
+                continue
+            yield reader.line_num, campos, None
+    except csv.Error as error:
+        yield reader.line_num, None, f"CSV inválido: {error}"
+
+def _iter_ndjson_rows(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    for linea, texto in enumerate(lines, start=1):
+        if not texto.strip():
+            continue
+        try:
+            fila = json.loads(texto)
+        except ValueError:
+            yield linea, None, "JSON inválido"
+            continue
+        if not isinstance(fila, dict):
+            yield linea, None, "Se esperaba un objeto JSON"
+        elif fila.get("type", "task") == "task":
+            yield linea, fila, None
+
+def _describir_validacion(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+def _aplicar_lote(list_id: UUID, filas: int, lote: List[Tuple[int, TareaCreate]], errores: List[ErrorImportacion]) -> LoteImportado:
+    # create_tasks valida estado/progreso/prioridad y responsable por fila; si la lista se borro, corta la importacion
+    resultados = create_tasks(list_id, [tarea for _, tarea in lote]) if lote else []
+    errores = errores + [ErrorImportacion(line=lote[r.index][0], error=r.error) for r in resultados if not r.ok]
+    errores.sort(key=lambda e: e.line)
+    return LoteImportado(rows=filas, imported=sum(r.ok for r in resultados), errors=errores)
+
+def validar_importacion(list_id: UUID, format: str):
+    if format not in IMPORT_FORMATS:
+        raise FormatoInvalidoException()
+    if repository.count_tasks(list_id) is None:
+        raise ListaNoEncontradaException()
+
+def import_tasks(list_id: UUID, format: str, lines: Iterable[str]) -> Iterator[LoteImportado]:
+    # Las tareas sin responsable quedan sin asignar (no se asignan a quien importa). Lo ya guardado queda
+    # aunque un lote posterior falle.
+    validar_importacion(list_id, format)
+    filas = _iter_csv_rows(lines) if format == "csv" else _iter_ndjson_rows(lines)
+
+    procesadas = 0
+    lote: List[Tuple[int, TareaCreate]] = []
+    errores: List[ErrorImportacion] = []
+    for linea, campos, error in filas:
+        procesadas += 1
+        if error is None:
+            try:
+                lote.append((linea, TareaCreate.model_validate(campos)))
+            except ValidationError as validation_error:
+                error = _describir_validacion(validation_error)
+        if error is not None:
+            errores.append(ErrorImportacion(line=linea, error=error))
+        if procesadas >= IMPORT_CHUNK_SIZE:
+            yield _aplicar_lote(list_id, procesadas, lote, errores)
+            procesadas, lote, errores = 0, [], []
+    if procesadas:
+        yield _aplicar_lote(list_id, procesadas, lote, errores)
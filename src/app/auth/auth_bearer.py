@@ -1,29 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 
-from app.auth.auth_handler import SECRET_KEY, ALGORITHM
+from app.auth.auth_handler import SECRET_KEY, ALGORITHM, TOKEN_CACHE_SIZE
+from app.infrastructure.metrics import registry
+
+JWT_SECONDS = registry.histogram("app_jwt_verify_duration_seconds", "Verificacion del JWT en JWTBearer", ["cache"])
+
+
+class TokenCache:
+    # LRU de tokens ya verificados: token -> payload, cada entrada vence con el "exp" del token
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is None:
+                return None
+            if payload.get("exp", 0) <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return payload
+
+    def set(self, token: str, payload: dict):
+        # Sin "exp" no hay forma de saber cuando invalidarlo, no se cachea
+        if self.maxsize <= 0 or "exp" not in payload:
+            return
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
 
 class JWTBearer(HTTPBearer):
-    def __init__(self, auto_error: bool = True):
+    def __init__(self, auto_error: bool = True, cache: Optional[TokenCache] = None):
         super(JWTBearer, self).__init__(auto_error=auto_error)
+        self.cache = cache if cache is not None else TokenCache()
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request) -> dict:
         credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
         if credentials:
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
-            if not self.verify_jwt(credentials.credentials):
+            payload = self.verify_jwt(credentials.credentials)
+            if not payload:
                 raise HTTPException(status_code=403, detail="Invalid or expired token.")
-            return credentials.credentials
+            return payload
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization token.")
 
-    def verify_jwt(self, jwtoken: str) -> bool:
+    def verify_jwt(self, jwtoken: str) -> dict:
+        inicio = time.perf_counter()
+        payload = self.cache.get(jwtoken)
+        if payload is not None:
+            JWT_SECONDS.observe(time.perf_counter() - inicio, "hit")
+            return payload
         try:
             payload = jwt.decode(jwtoken, SECRET_KEY, algorithms=[ALGORITHM])
-            return True
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token expired.")
         except jwt.InvalidTokenError:
             raise HTTPException(status_code=401, detail="Invalid token.")
+        finally:
+            JWT_SECONDS.observe(time.perf_counter() - inicio, "miss")
+        self.cache.set(jwtoken, payload)
+        return payload
+
+
+# Instancia unica: FastAPI resuelve una sola vez por request la misma dependencia
+jwt_bearer = JWTBearer()
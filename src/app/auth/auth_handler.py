@@ -1,16 +1,19 @@
-import os
 import jwt
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
-from dotenv import load_dotenv
+from functools import lru_cache
+from app.config import getenv
 
-load_dotenv()
+SECRET_KEY = getenv("SECRET_KEY")
+ALGORITHM = getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+TOKEN_CACHE_SIZE = int(getenv("TOKEN_CACHE_SIZE", 10000))
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib es pesado de importar y solo se usa al crear usuarios o verificar passwords (en los procesos
+    # de PasswordVerifier): se arma una vez por proceso, la primera vez que se necesita
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -20,7 +23,7 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return get_pwd_context().hash(password)
@@ -0,0 +1,51 @@
+import asyncio
+import os
+from typing import Optional
+
+from app.auth.auth_handler import verify_password
+from app.domain.exceptions import LoginSaturadoException
+from app.config import getenv
+
+# bcrypt cuesta decenas/cientos de ms de CPU por verificacion: corre en procesos aparte para no frenar
+# el event loop ni ocupar el threadpool de las demas rutas
+PASSWORD_WORKERS = int(getenv("PASSWORD_WORKERS", min(2, os.cpu_count() or 1)))
+# Verificaciones admitidas a la vez (en curso + en cola); por encima se responde 503 en lugar de encolar
+PASSWORD_MAX_PENDING = int(getenv("PASSWORD_MAX_PENDING", 16))
+
+
+class PasswordVerifier:
+
+    def __init__(self, workers: int = PASSWORD_WORKERS, max_pending: int = PASSWORD_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional["ProcessPoolExecutor"] = None
+
+    def _get_executor(self) -> "ProcessPoolExecutor":
+        # Se crea (e importa) con el primer login. "spawn": hacer fork de un proceso con hilos (uvicorn) no es seguro
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        # pending solo se toca desde el event loop, no necesita lock
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise LoginSaturadoException()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), verify_password, plain_password, hashed_password)
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+password_verifier = PasswordVerifier()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.benchmarks.datasets import PROFILES, load_workspace
+from app.benchmarks.report import find_regressions, format_table, load_baselines, save_baseline
+
+# Uso (desde src/):
+#   python -m app.benchmarks micro --profile small --backend memory
+#   python -m app.benchmarks http --profile small --backend sqlite --concurrency 32 --duration 10
+#   python -m app.benchmarks all --update-baseline
+# Sale con codigo 1 si algun resultado empeora mas que --tolerance respecto de baselines.json
+
+BACKENDS = ["memory", "memory-log", "sqlite"]
+
+
+@contextmanager
+def fresh_repository(backend: str):
+    # Repositorio vacio y descartable: la corrida no toca los datos de .env
+    with tempfile.TemporaryDirectory(prefix="bench-") as directory:
+        if backend == "memory":
+            from app.infrastructure.repository import InMemoryRepository
+            repository = InMemoryRepository()
+        elif backend == "memory-log":
+            from app.infrastructure.oplog_repository import OpLogRepository
+            repository = OpLogRepository(directory)
+        elif backend == "sqlite":
+            from app.infrastructure.sqlite_repository import SQLiteRepository
+            repository = SQLiteRepository(str(Path(directory) / "bench.db"))
+        else:
+            raise ValueError(f"Backend desconocido: {backend}")
+        try:
+            yield repository
+        finally:
+            close = getattr(repository, "close", None)
+            if close is not None:
+                close()
+
+def run_suite(suite: str, args):
+    profile = PROFILES[args.profile]
+    if suite == "micro":
+        from app.benchmarks.micro import run_micro
+        with fresh_repository(args.backend) as repository:
+            workspace = load_workspace(repository, profile, args.seed)
+            return run_micro(repository, workspace, args.iterations, args.time_budget, args.only, args.seed)
+    from app.benchmarks.http_load import run_http
+    return run_http(profile, args.backend, args.concurrency, args.duration, args.workers, args.only, args.seed)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.benchmarks", description="Benchmarks de los casos de uso y de la API")
+    parser.add_argument("suite", choices=["micro", "http", "all"])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--backend", choices=BACKENDS, default="memory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="Nombres de benchmarks o escenarios a correr")
+    parser.add_argument("--iterations", type=int, default=200, help="micro: iteraciones maximas por benchmark")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="micro: segundos maximos por benchmark")
+    parser.add_argument("--concurrency", type=int, default=32, help="http: clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=10.0, help="http: segundos por escenario")
+    parser.add_argument("--workers", type=int, default=1, help="http: workers de uvicorn")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Empeoramiento admitido respecto del baseline (1.0 = el doble)")
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda esta corrida como baseline")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    salida, regresiones = {}, []
+    for suite in (["micro", "http"] if args.suite == "all" else [args.suite]):
+        key = f"{suite}/{args.profile}/{args.backend}"
+        resultados = run_suite(suite, args)
+        salida[key] = {name: stats._asdict() for name, stats in resultados.items()}
+        if not args.json:
+            print(format_table(key, resultados), end="\n\n")
+        if args.update_baseline:
+            save_baseline(key, resultados)
+        else:
+            regresiones += [f"{key} {r}" for r in find_regressions(resultados, baselines.get(key), args.tolerance, suite == "http")]
+
+    if args.json:
+        print(json.dumps(salida, indent=2))
+    for regresion in regresiones:
+        print(f"REGRESION {regresion}", file=sys.stderr)
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import random
+from typing import Iterator, List, NamedTuple
+from uuid import UUID
+from app.domain.models import Lista, Tarea, task_status, task_progress, task_priority
+
+# Generadores deterministas: la misma semilla arma siempre el mismo workspace (mismos ids y textos)
+
+WORDS = (
+    "revisar enviar preparar informe factura cliente proveedor reunion presupuesto contrato entrega "
+    "pedido stock auditoria campaña diseño prototipo prueba despliegue servidor backup migracion "
+    "reporte mensual semanal capacitacion soporte ticket incidencia mejora documentacion manual "
+    "planilla cobranza pago transferencia balance inventario compras ventas marketing evento"
+).split()
+PARTNERS = [f"EMPRESA {letra}" for letra in "ABCDEFGHIJ"]
+ROLES = ["Administrador de lista", "Colaborador", "Lector", "Responsable", "Auditor"]
+USERS = ["admin", None]
+
+
+class Profile(NamedTuple):
+    lists: int
+    tasks_per_list: int
+
+
+PROFILES = {
+    "small": Profile(lists=200, tasks_per_list=50),
+    "medium": Profile(lists=1_000, tasks_per_list=100),
+    "large": Profile(lists=10_000, tasks_per_list=100),
+}
+
+
+class Workspace(NamedTuple):
+    list_ids: List[UUID]
+    task_ids: List[UUID]
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+def task_fields(rng: random.Random) -> dict:
+    # Campos de una tarea valida (sin id), en el formato de TareaCreate
+    return dict(
+        title       = " ".join(rng.choices(WORDS, k=3)).capitalize(),
+        description = " ".join(rng.choices(WORDS, k=10)),
+        partner     = rng.choice(PARTNERS),
+        rol         = rng.choice(ROLES),
+        status      = rng.choice(task_status),
+        progress    = rng.choice(task_progress),
+        priority    = rng.choice(task_priority),
+        assigned_to = rng.choice(USERS),
+    )
+
+def generate_lists(lists: int, tasks_per_list: int, seed: int = 42) -> Iterator[Lista]:
+    # Los datos ya son validos: se arman con model_construct para que generar 1M de tareas no tarde minutos
+    rng = random.Random(seed)
+    for i in range(lists):
+        tareas = [Tarea.model_construct(id=_uuid(rng), **task_fields(rng)) for _ in range(tasks_per_list)]
+        yield Lista.model_construct(id=_uuid(rng), name=f"Lista {i}", tasks=tareas)
+
+def load_workspace(repository, profile: Profile, seed: int = 42) -> Workspace:
+    list_ids, task_ids = [], []
+    for lista in generate_lists(profile.lists, profile.tasks_per_list, seed):
+        repository.add_list(lista)
+        list_ids.append(lista.id)
+        task_ids.extend(tarea.id for tarea in lista.tasks)
+    return Workspace(list_ids, task_ids)
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+import httpx
+
+from app.benchmarks.datasets import WORDS, Profile, generate_lists, task_fields
+from app.benchmarks.report import Stats, summarize
+from app.domain.models import task_status
+from app.infrastructure.shared_repository import stop_store
+
+# Carga HTTP de punta a punta: levanta uvicorn con el backend pedido, siembra el perfil por la API
+# (asi se ejercitan los mismos caminos de escritura que en produccion) y corre escenarios concurrentes.
+
+SEED_CHUNK = 500
+SEED_CONCURRENCY = 8
+
+
+class Scenario(NamedTuple):
+    name: str
+    request: Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+    # Codigos esperados; cualquier otro (o una excepcion) cuenta como error
+    expected: tuple = (200,)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def run_server(backend: str, workers: int = 1, env: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    port = _free_port()
+    # Datos en un directorio descartable, como fresh_repository: la corrida no toca los de .env
+    with tempfile.TemporaryDirectory(prefix="bench-") as directory:
+        server_env = dict(
+            os.environ, REPOSITORY_BACKEND=backend, OPLOG_DIR=os.path.join(directory, "oplog"),
+            SQLITE_PATH=os.path.join(directory, "bench.db"), SHARED_STORE_ADDRESS=os.path.join(directory, "store.sock"),
+        )
+        server_env.update(env or {})
+        server_env.setdefault("SECRET_KEY", "benchmark")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+            env=server_env,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            _wait_ready(base_url, process)
+            yield base_url
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            if backend == "shared":
+                # El store sobrevive a los workers: se detiene antes de borrar su directorio
+                stop_store(server_env["SHARED_STORE_ADDRESS"])
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn termino con codigo {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("uvicorn no respondio a tiempo")
+
+async def _login(client: httpx.AsyncClient) -> str:
+    response = await client.post("/login", data={"username": "admin", "password": "admin"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def seed_workspace(client: httpx.AsyncClient, profile: Profile, seed: int = 42) -> List[str]:
+    # Crea las listas y carga sus tareas por el endpoint bulk; devuelve los ids de lista
+    semaforo = asyncio.Semaphore(SEED_CONCURRENCY)
+
+    async def sembrar(lista) -> str:
+        async with semaforo:
+            response = await client.post("/list", json={"name": lista.name})
+            response.raise_for_status()
+            list_id = response.json()["id"]
+            tareas = [
+                {campo: getattr(tarea, campo) for campo in ("title", "description", "partner", "rol", "status", "progress", "priority")}
+                for tarea in lista.tasks
+            ]
+            for inicio in range(0, len(tareas), SEED_CHUNK):
+                response = await client.post(f"/tasks/{list_id}/bulk", json=tareas[inicio:inicio + SEED_CHUNK])
+                response.raise_for_status()
+            return list_id
+
+    return await asyncio.gather(*(sembrar(lista) for lista in generate_lists(profile.lists, profile.tasks_per_list, seed)))
+
+def build_scenarios(list_ids: List[str], task_ids: List[str], etags: Dict[str, str]) -> List[Scenario]:
+    revalidables = list(etags)
+
+    def revalidar(client, rng):
+        # Simula un cliente con la pagina en cache: 304 mientras la lista no cambie
+        list_id = rng.choice(revalidables)
+        return client.get(f"/tasks/{list_id}", params={"limit": 50}, headers={"If-None-Match": etags[list_id]})
+
+    def nueva_tarea(client, rng):
+        return client.post(f"/tasks/{rng.choice(list_ids)}/", json={**task_fields(rng), "assigned_to": None})
+
+    return [
+        Scenario("GET /lists?summary", lambda c, rng: c.get("/lists", params={"summary": "true", "limit": 100})),
+        Scenario("GET /tasks/{list_id}", lambda c, rng: c.get(f"/tasks/{rng.choice(list_ids)}", params={"limit": 50})),
+        Scenario("GET /tasks/{list_id} If-None-Match", revalidar, (200, 304)),
+        Scenario(
+            "GET /tasks/filter/{list_id}",
+            lambda c, rng: c.get(f"/tasks/filter/{rng.choice(list_ids)}", params={"status": rng.choice(task_status)}),
+        ),
+        Scenario("GET /lists/completion/{list_id}", lambda c, rng: c.get(f"/lists/completion/{rng.choice(list_ids)}")),
+        Scenario("GET /tasks/search", lambda c, rng: c.get("/tasks/search", params={"q": " ".join(rng.sample(WORDS, 2))})),
+        Scenario(
+            "PATCH /tasks/status/{task_id}",
+            lambda c, rng: c.patch(f"/tasks/status/{rng.choice(task_ids)}", json={"status": rng.choice(task_status)}),
+        ),
+        Scenario("POST /tasks/{list_id}/", nueva_tarea),
+        # bcrypt en el pool de procesos: 503 es la respuesta esperada cuando se satura
+        Scenario("POST /login", lambda c, rng: c.post("/login", data={"username": "admin", "password": "admin"}), (200, 503)),
+    ]
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, concurrency: int, duration: float, seed: int = 42
+) -> Stats:
+    latencias: List[int] = []
+    errores = 0
+    limite = time.monotonic() + duration
+
+    async def worker(rng: random.Random):
+        nonlocal errores
+        while time.monotonic() < limite:
+            t0 = time.perf_counter_ns()
+            try:
+                response = await scenario.request(client, rng)
+                ok = response.status_code in scenario.expected
+            except httpx.HTTPError:
+                ok = False
+            latencias.append(time.perf_counter_ns() - t0)
+            errores += not ok
+
+    inicio = time.monotonic()
+    await asyncio.gather(*(worker(random.Random(seed + i)) for i in range(concurrency)))
+    return summarize(latencias, time.monotonic() - inicio, errores)
+
+async def _run_http(base_url: str, profile: Profile, concurrency: int, duration: float, only: Optional[List[str]], seed: int):
+    limits = httpx.Limits(max_connections=concurrency + SEED_CONCURRENCY)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        client.headers["Authorization"] = f"Bearer {await _login(client)}"
+        list_ids = await seed_workspace(client, profile, seed)
+        # Ids de tareas y ETags actuales de una muestra de listas, para los escenarios que los necesitan
+        rng = random.Random(seed)
+        task_ids, etags = [], {}
+        for list_id in rng.sample(list_ids, min(50, len(list_ids))):
+            response = await client.get(f"/tasks/{list_id}", params={"limit": 50})
+            etags[list_id] = response.headers.get("ETag", "")
+            task_ids.extend(tarea["id"] for tarea in response.json())
+
+        resultados = {}
+        for scenario in build_scenarios(list_ids, task_ids, etags):
+            if only and scenario.name not in only:
+                continue
+            resultados[scenario.name] = await run_scenario(client, scenario, concurrency, duration, seed)
+        return resultados
+
+def run_http(
+    profile: Profile,
+    backend: str = "memory",
+    concurrency: int = 32,
+    duration: float = 10.0,
+    workers: int = 1,
+    only: Optional[List[str]] = None,
+    seed: int = 42,
+) -> Dict[str, Stats]:
+    with run_server(backend, workers) as base_url:
+        return asyncio.run(_run_http(base_url, profile, concurrency, duration, only, seed))
@@ -0,0 +1,141 @@
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from uuid import UUID
+from app.application import use_cases
+from app.benchmarks.datasets import WORDS, Workspace, task_fields
+from app.benchmarks.report import Stats, summarize
+from app.domain.models import (
+    ListaCreate, TareaBulkUpdate, TareaCreate, TareaEstadoBulk, task_priority, task_status
+)
+
+# Microbenchmarks de cada caso de uso de use_cases.py, en proceso y sin HTTP.
+# Cada benchmark corre hasta completar sus iteraciones o agotar el tiempo (con un minimo de iteraciones).
+
+BULK_SIZE = 50
+WARMUP = 5
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # Una operacion; recibe el numero de iteracion
+    run: Callable[[int], object]
+    # Prepara n iteraciones fuera de la medicion (p. ej. crear lo que se va a borrar)
+    setup: Optional[Callable[[int], None]] = None
+
+
+def build_benchmarks(workspace: Workspace, seed: int = 42) -> List[Benchmark]:
+    rng = random.Random(seed)
+    list_ids, task_ids = workspace.list_ids, workspace.task_ids
+
+    lote = min(BULK_SIZE, len(task_ids))
+
+    def una_lista(_):
+        return rng.choice(list_ids)
+
+    def una_tarea(_):
+        return rng.choice(task_ids)
+
+    def tarea_data() -> TareaCreate:
+        return TareaCreate(**{**task_fields(rng), "assigned_to": None})
+
+    # Lo que crean los benchmarks de alta se reutiliza en los de baja
+    descartables: Dict[str, List[UUID]] = {"lists": [], "tasks": []}
+
+    def crear_listas(n):
+        descartables["lists"] = [use_cases.create_list(ListaCreate(name=f"Descartable {i}")).id for i in range(n)]
+
+    def crear_tareas(n):
+        list_id = rng.choice(list_ids)
+        resultados = use_cases.create_tasks(list_id, [tarea_data() for _ in range(n)])
+        descartables["tasks"] = [resultado.id for resultado in resultados]
+
+    def crear_tareas_bulk(n):
+        crear_tareas(n * BULK_SIZE)
+
+    return [
+        Benchmark("validar_tarea", lambda i: use_cases._validar_tarea(tarea_data())),
+        Benchmark("get_user_by_username", lambda i: use_cases.get_user_by_username("admin")),
+        Benchmark("get_revision", lambda i: use_cases.get_revision()),
+        Benchmark("get_list_revision", lambda i: use_cases.get_list_revision(una_lista(i))),
+        Benchmark("get_lists", lambda i: use_cases.get_lists()),
+        Benchmark("get_lists_page", lambda i: use_cases.get_lists_page(limit=100)),
+        Benchmark("get_lists_page_summary", lambda i: use_cases.get_lists_page(limit=100, summary=True)),
+        Benchmark("create_list", lambda i: use_cases.create_list(ListaCreate(name=f"Bench {i}"))),
+        Benchmark("update_list", lambda i: use_cases.update_list(una_lista(i), ListaCreate(name=f"Renombrada {i}"))),
+        Benchmark("delete_list", lambda i: use_cases.delete_list(descartables["lists"][i]), crear_listas),
+        Benchmark("get_list_completion", lambda i: use_cases.get_list_completion(una_lista(i))),
+        Benchmark("get_lists_completion", lambda i: use_cases.get_lists_completion(rng.sample(list_ids, min(100, len(list_ids))))),
+        Benchmark("get_tasks", lambda i: use_cases.get_tasks(una_lista(i))),
+        Benchmark("get_tasks_page", lambda i: use_cases.get_tasks_page(una_lista(i), limit=50)),
+        Benchmark("create_task", lambda i: use_cases.create_task(una_lista(i), tarea_data())),
+        Benchmark("update_task", lambda i: use_cases.update_task(una_tarea(i), tarea_data())),
+        Benchmark("update_task_status", lambda i: use_cases.update_task_status(una_tarea(i), rng.choice(task_status))),
+        Benchmark("delete_task", lambda i: use_cases.delete_task(descartables["tasks"][i]), crear_tareas),
+        Benchmark("filter_tasks", lambda i: use_cases.filter_tasks(una_lista(i), status=rng.choice(task_status))),
+        Benchmark(
+            "filter_tasks_multi",
+            lambda i: use_cases.filter_tasks(una_lista(i), status=rng.choice(task_status), priority=rng.choice(task_priority)),
+        ),
+        Benchmark("search_tasks", lambda i: use_cases.search_tasks(" ".join(rng.sample(WORDS, 2)))),
+        Benchmark("search_tasks_3", lambda i: use_cases.search_tasks(" ".join(rng.sample(WORDS, 3)))),
+        Benchmark("search_tasks_list", lambda i: use_cases.search_tasks(rng.choice(WORDS), una_lista(i))),
+        Benchmark("create_tasks", lambda i: use_cases.create_tasks(una_lista(i), [tarea_data() for _ in range(BULK_SIZE)])),
+        Benchmark(
+            "update_tasks",
+            lambda i: use_cases.update_tasks(
+                [TareaBulkUpdate(id=task_id, **tarea_data().model_dump()) for task_id in rng.sample(task_ids, lote)]
+            ),
+        ),
+        Benchmark(
+            "update_tasks_status",
+            lambda i: use_cases.update_tasks_status(
+                [TareaEstadoBulk(id=task_id, status=rng.choice(task_status)) for task_id in rng.sample(task_ids, lote)]
+            ),
+        ),
+        Benchmark(
+            "delete_tasks",
+            lambda i: use_cases.delete_tasks(descartables["tasks"][i * BULK_SIZE:(i + 1) * BULK_SIZE]),
+            crear_tareas_bulk,
+        ),
+        Benchmark("export_workspace", lambda i: sum(1 for _ in use_cases.export_workspace("ndjson"))),
+    ]
+
+def run_benchmark(
+    benchmark: Benchmark, iterations: int, time_budget: float, min_iterations: int = 3, warmup: int = WARMUP
+) -> Stats:
+    if benchmark.setup is not None:
+        benchmark.setup(warmup + iterations)
+    # Las primeras iteraciones (caches frias, primeras asignaciones) no se miden
+    for i in range(warmup):
+        benchmark.run(i)
+    latencias: List[int] = []
+    inicio = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        t0 = time.perf_counter_ns()
+        benchmark.run(i)
+        latencias.append(time.perf_counter_ns() - t0)
+        if len(latencias) >= min_iterations and time.perf_counter() - inicio > time_budget:
+            break
+    return summarize(latencias, sum(latencias) / 1e9)
+
+def run_micro(
+    repository,
+    workspace: Workspace,
+    iterations: int = 200,
+    time_budget: float = 2.0,
+    only: Optional[List[str]] = None,
+    seed: int = 42,
+) -> Dict[str, Stats]:
+    # Los casos de uso leen use_cases.repository: se apunta al repositorio cargado mientras dura la corrida
+    anterior = use_cases.repository
+    use_cases.repository = repository
+    try:
+        resultados = {}
+        for benchmark in build_benchmarks(workspace, seed):
+            if only and benchmark.name not in only:
+                continue
+            resultados[benchmark.name] = run_benchmark(benchmark, iterations, time_budget)
+        return resultados
+    finally:
+        use_cases.repository = anterior
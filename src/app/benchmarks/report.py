@@ -0,0 +1,79 @@
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+# Diferencias de p50 por debajo de esto se consideran ruido del timer aunque superen la tolerancia
+MIN_DELTA_US = 5.0
+
+
+class Stats(NamedTuple):
+    iterations: int
+    errors: int
+    ops_per_s: float
+    p50_us: float
+    p99_us: float
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    # Nearest-rank sobre valores ya ordenados
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies_ns: List[int], elapsed_s: float, errors: int = 0) -> Stats:
+    ordenadas = sorted(latencies_ns)
+    return Stats(
+        iterations = len(ordenadas),
+        errors     = errors,
+        ops_per_s  = round(len(ordenadas) / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+        p50_us     = round(percentile(ordenadas, 0.50) / 1000, 2),
+        p99_us     = round(percentile(ordenadas, 0.99) / 1000, 2),
+    )
+
+def format_table(title: str, results: Dict[str, Stats]) -> str:
+    width = max([len(name) for name in results] + [len(title)])
+    lines = [f"{title:<{width}}  {'iter':>7}  {'err':>5}  {'ops/s':>11}  {'p50 (us)':>11}  {'p99 (us)':>11}"]
+    for name, stats in results.items():
+        lines.append(
+            f"{name:<{width}}  {stats.iterations:>7}  {stats.errors:>5}  {stats.ops_per_s:>11.1f}"
+            f"  {stats.p50_us:>11.2f}  {stats.p99_us:>11.2f}"
+        )
+    return "\n".join(lines)
+
+# BASELINES
+# baselines.json: {"<suite>/<perfil>/<backend>": {"<benchmark>": {campos de Stats}}}
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_baseline(key: str, results: Dict[str, Stats], path: Path = BASELINES_PATH):
+    baselines = load_baselines(path)
+    baselines[key] = {name: stats._asdict() for name, stats in results.items()}
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+def find_regressions(
+    results: Dict[str, Stats], baseline: Optional[dict], tolerance: float, check_throughput: bool = False
+) -> List[str]:
+    # Se compara el p50 (el p99 es demasiado ruidoso para cortar una corrida); el throughput solo en la
+    # carga HTTP, donde no es un simple inverso de la latencia
+    if not baseline:
+        return []
+    regresiones = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limite = base["p50_us"] * (1 + tolerance)
+        if stats.p50_us > limite and stats.p50_us - base["p50_us"] > MIN_DELTA_US:
+            regresiones.append(f"{name}: p50 {stats.p50_us:.2f} us > {base['p50_us']:.2f} us (+{tolerance:.0%})")
+        if check_throughput and stats.ops_per_s < base["ops_per_s"] / (1 + tolerance):
+            regresiones.append(f"{name}: {stats.ops_per_s:.1f} ops/s < {base['ops_per_s']:.1f} ops/s (-{tolerance:.0%})")
+        if stats.errors > base.get("errors", 0) and stats.errors > stats.iterations * 0.01:
+            regresiones.append(f"{name}: {stats.errors} errores")
+    return regresiones
@@ -0,0 +1,9 @@
+import os
+from dotenv import load_dotenv
+
+# El .env se carga una sola vez, al importar este modulo. Cada modulo sigue definiendo sus constantes, pero
+# las lee con getenv de aca: asi el .env ya esta cargado sin importar el orden en que se importen.
+load_dotenv()
+
+def getenv(name: str, default=None):
+    return os.environ.get(name, default)
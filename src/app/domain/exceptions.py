@@ -23,3 +23,27 @@ class ProgresoInvalidoException(HTTPException):
 class PrioridadInvalidaException(HTTPException):
     def __init__(self, detail="Prioridad inválida."):
         super().__init__(status_code = 404, detail = detail)
+
+class CursorInvalidoException(HTTPException):
+    def __init__(self, detail="Cursor inválido."):
+        super().__init__(status_code = 400, detail = detail)
+
+class FormatoInvalidoException(HTTPException):
+    def __init__(self, detail="Formato inválido."):
+        super().__init__(status_code = 400, detail = detail)
+
+class PrecondicionFallidaException(HTTPException):
+    def __init__(self, detail="La lista cambió desde que se leyó."):
+        super().__init__(status_code = 412, detail = detail)
+
+class LoginSaturadoException(HTTPException):
+    def __init__(self, detail="Demasiados logins en curso, reintente en unos segundos."):
+        super().__init__(status_code = 503, detail = detail, headers = {"Retry-After": "1"})
+
+class ImportacionNoEncontradaException(HTTPException):
+    def __init__(self, detail="Importación no encontrada"):
+        super().__init__(status_code = 404, detail = detail)
+
+class ImportacionesSaturadasException(HTTPException):
+    def __init__(self, detail="Demasiadas importaciones en curso, reintente en unos segundos."):
+        super().__init__(status_code = 503, detail = detail, headers = {"Retry-After": "5"})
@@ -21,6 +21,11 @@ task_status = [ "No iniciada", "Iniciada", "En revision", "Rechazada", "Aprobada
 task_progress = [ "0%", "25", "50%", "75", "100%" ]
 task_priority = [ "Muy bajo", "Bajo", "Medio", "Alto", "Muy alto" ]
 
+# Codigo entero de cada valor (su posicion en la lista): validacion O(1) y representacion interna compacta
+task_status_codes = {value: code for code, value in enumerate(task_status)}
+task_progress_codes = {value: code for code, value in enumerate(task_progress)}
+task_priority_codes = {value: code for code, value in enumerate(task_priority)}
+
 class TareaCreate(BaseModel):
     title: str
     description: str
@@ -31,6 +36,13 @@ class TareaCreate(BaseModel):
     priority: str = Field(default_factory=lambda: task_priority[2])
     assigned_to: Optional[str] = None
 
+class TareaBulkUpdate(TareaCreate):
+    id: UUID
+
+class TareaEstadoBulk(BaseModel):
+    id: UUID
+    status: str
+
 class Tarea(BaseModel):
     id: UUID = Field(default_factory=uuid4)
     title: str
@@ -73,3 +85,55 @@ class Lista(BaseModel):
             }
         }
     )
+
+class ListaResumen(BaseModel):
+    id: UUID
+    name: str
+    task_count: int
+
+class ResultadoBulk(BaseModel):
+    index: int
+    id: Optional[UUID] = None
+    ok: bool
+    task: Optional[Tarea] = None
+    error: Optional[str] = None
+
+class ResultadoBusqueda(BaseModel):
+    list_id: UUID
+    score: float
+    task: Tarea
+
+class ErrorImportacion(BaseModel):
+    line: int
+    error: str
+
+class Importacion(BaseModel):
+    id: UUID
+    list_id: UUID
+    format: str
+    status: str
+    bytes_received: int
+    rows: int
+    imported: int
+    failed: int
+    errors: List[ErrorImportacion]
+    errors_truncated: bool
+    error: Optional[str] = None
+
+class TareaCambiada(BaseModel):
+    list_id: UUID
+    task: Tarea
+
+class TareaBorrada(BaseModel):
+    list_id: UUID
+    id: UUID
+
+class Cambios(BaseModel):
+    # revision: la que el cliente manda como since en el proximo pedido
+    revision: int
+    # True si no se pueden dar los cambios (since anterior al journal): hay que volver a bajar todo
+    resync: bool = False
+    lists: List[ListaResumen] = Field(default_factory=list)
+    deleted_lists: List[UUID] = Field(default_factory=list)
+    tasks: List[TareaCambiada] = Field(default_factory=list)
+    deleted_tasks: List[TareaBorrada] = Field(default_factory=list)
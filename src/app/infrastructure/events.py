@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from itertools import count
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+from uuid import UUID
+from app.config import getenv
+
+# Eventos de cambio por lista para los clientes suscriptos (SSE, ver GET /events/{list_id}). Cada lista con
+# suscriptores tiene un anillo con sus ultimos eventos ya serializados; publicar es agregar al anillo y
+# despertar a todos los suscriptores de esa lista con un solo futuro compartido. Los suscriptores leen a su
+# ritmo: el que se atrasa mas que el anillo recibe "resync" (volver a pedir la lista) y nunca frena a quien
+# escribe. Sin suscriptores en la lista, publicar no hace nada.
+
+# Eventos recientes por lista; tambien es lo que se puede recuperar al reconectar con Last-Event-ID
+EVENTS_BUFFER = int(getenv("EVENTS_BUFFER", 256))
+# Cada cuanto se manda un comentario a las conexiones sin eventos (proxies y deteccion de desconexiones)
+EVENTS_HEARTBEAT_SECONDS = float(getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+
+HEARTBEAT = ": keepalive\n\n"
+# Primer mensaje de cada conexion: cuanto espera el navegador antes de reconectar (en ms)
+RETRY = "retry: 3000\n\n"
+
+# (id, tipo, texto SSE)
+Frame = Tuple[int, str, str]
+
+
+def _frame(event_id: int, event_type: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Canal:
+    __slots__ = ("eventos", "dropped_upto", "subscribers", "waiters")
+
+    def __init__(self, buffer: int, dropped_upto: int):
+        self.eventos: Deque[Frame] = deque(maxlen=buffer)
+        # Eventos con id <= dropped_upto ya no estan (salieron del anillo o fueron antes de crear el canal)
+        self.dropped_upto = dropped_upto
+        self.subscribers = 0
+        # Un futuro por event loop, compartido por todos los suscriptores de la lista que estan esperando
+        self.waiters: Dict[asyncio.AbstractEventLoop, asyncio.Future] = {}
+
+
+class EventBroker:
+
+    def __init__(self, buffer: int = EVENTS_BUFFER, heartbeat: float = EVENTS_HEARTBEAT_SECONDS):
+        self.buffer = buffer
+        self.heartbeat = heartbeat
+        # Ids crecientes en todo el proceso y, como las revisiones, arrancan desde el reloj: un Last-Event-ID
+        # de antes de recrear el canal o de reiniciar el servidor no se confunde con eventos nuevos
+        self._last_id = time.time_ns() // 1000
+        self._ids = count(self._last_id + 1)
+        self._canales: Dict[UUID, _Canal] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        # Para que los casos de uso se ahorren buscar la lista de una tarea si nadie escucha
+        return bool(self._canales)
+
+    def subscribers(self, list_id: UUID) -> int:
+        canal = self._canales.get(list_id)
+        return canal.subscribers if canal is not None else 0
+
+    def publish(self, list_id: UUID, event_type: str, **data):
+        # Se puede llamar desde cualquier hilo; no espera a ningun suscriptor
+        if list_id not in self._canales:
+            return
+        with self._lock:
+            canal = self._canales.get(list_id)
+            if canal is None:
+                return
+            event_id = self._last_id = next(self._ids)
+            if len(canal.eventos) == canal.eventos.maxlen:
+                canal.dropped_upto = canal.eventos[0][0]
+            frame = _frame(event_id, event_type, {"type": event_type, "list_id": str(list_id), **data})
+            canal.eventos.append((event_id, event_type, frame))
+            waiters, canal.waiters = canal.waiters, {}
+        for loop, future in waiters.items():
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _pending(self, canal: _Canal, cursor: int) -> Tuple[bool, list]:
+        # (se perdieron eventos, eventos posteriores al cursor)
+        with self._lock:
+            perdidos = cursor < canal.dropped_upto
+            return perdidos, [frame for frame in canal.eventos if frame[0] > cursor]
+
+    def _waiter(self, canal: _Canal, cursor: int) -> Optional[asyncio.Future]:
+        # None si llego algo despues de leer los pendientes (se vuelve a leer sin esperar)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if canal.eventos and canal.eventos[-1][0] > cursor:
+                return None
+            future = canal.waiters.get(loop)
+            if future is None:
+                future = canal.waiters[loop] = loop.create_future()
+            return future
+
+    async def subscribe(self, list_id: UUID, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        with self._lock:
+            canal = self._canales.get(list_id)
+            if canal is None:
+                canal = self._canales[list_id] = _Canal(self.buffer, self._last_id)
+            canal.subscribers += 1
+            cursor = self._last_id if last_event_id is None else last_event_id
+            if cursor > self._last_id:
+                # Id que este proceso no emitio: se fuerza un resync
+                cursor = -1
+        try:
+            # Se manda ya suscripto: desde que el cliente lo recibe no se pierde ningun cambio
+            yield RETRY
+            while True:
+                perdidos, frames = self._pending(canal, cursor)
+                if perdidos:
+                    # Atrasado mas que el anillo: se salta a lo ultimo y el cliente vuelve a pedir la lista
+                    cursor = frames[-1][0] if frames else canal.dropped_upto
+                    yield _frame(cursor, "resync", {"type": "resync", "list_id": str(list_id)})
+                    continue
+                for event_id, event_type, frame in frames:
+                    cursor = event_id
+                    yield frame
+                    if event_type == "list.deleted":
+                        return
+                future = self._waiter(canal, cursor)
+                if future is not None:
+                    # asyncio.wait no cancela el futuro compartido si este suscriptor se desconecta
+                    done, _ = await asyncio.wait((future,), timeout=self.heartbeat)
+                    if not done:
+                        yield HEARTBEAT
+        finally:
+            with self._lock:
+                canal.subscribers -= 1
+                if canal.subscribers == 0 and self._canales.get(list_id) is canal:
+                    del self._canales[list_id]
+
+
+broker = EventBroker()
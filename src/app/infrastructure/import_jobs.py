@@ -0,0 +1,168 @@
+import codecs
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, List, Optional
+from uuid import UUID, uuid4
+from fastapi import HTTPException
+from app.domain.models import ErrorImportacion, Importacion
+from app.domain.exceptions import ImportacionesSaturadasException
+from app.config import getenv
+
+# Importaciones en segundo plano: el request copia el body a un archivo temporal a medida que llega y, apenas
+# termina la subida, responde 202; un hilo por importacion relee ese archivo, lo decodifica, lo parte en lineas
+# y lo procesa. La subida va al ritmo de la red y nunca espera al procesamiento.
+
+# Bytes del body que se guardan en memoria; por encima se pasan a un archivo temporal
+IMPORT_SPOOL_MEMORY = int(getenv("IMPORT_SPOOL_MEMORY", 1024 * 1024))
+# Importaciones recibiendose o procesandose a la vez; por encima se responde 503
+IMPORT_MAX_ACTIVE = int(getenv("IMPORT_MAX_ACTIVE", 4))
+# Errores por fila que se guardan por importacion; del resto solo se cuentan
+IMPORT_MAX_ERRORS = int(getenv("IMPORT_MAX_ERRORS", 1000))
+# Importaciones terminadas que se conservan para consultar su resultado
+IMPORT_JOBS_KEEP = int(getenv("IMPORT_JOBS_KEEP", 100))
+
+# De a cuanto relee el hilo el archivo temporal
+READ_SIZE = 64 * 1024
+
+logger = logging.getLogger("app.imports")
+
+
+def iter_lines(chunks: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
+    # Decodificacion incremental (un caracter puede quedar partido entre dos pedazos); cada linea conserva su
+    # "\n" para que csv pueda leer campos multilinea
+    decoder = codecs.getincrementaldecoder(encoding)()
+    resto = ""
+    for chunk in chunks:
+        texto = resto + decoder.decode(chunk)
+        lineas = texto.split("\n")
+        resto = lineas.pop()
+        for linea in lineas:
+            yield linea + "\n"
+    resto += decoder.decode(b"", final=True)
+    if resto:
+        yield resto
+
+
+class ImportJob:
+
+    def __init__(self, list_id: UUID, format: str, max_errors: int = IMPORT_MAX_ERRORS, spool_memory: int = IMPORT_SPOOL_MEMORY):
+        self.id = uuid4()
+        self.list_id = list_id
+        self.format = format
+        self.max_errors = max_errors
+        self.spool_memory = spool_memory
+        # receiving -> processing -> done | failed
+        self.status = "receiving"
+        self.bytes_received = 0
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[ErrorImportacion] = []
+        self.error: Optional[str] = None
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_memory)
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    # Lado del request
+
+    def write_nowait(self, chunk: bytes) -> bool:
+        # False si el pedazo ya no entra en memoria: el llamador lo escribe con write() fuera del event loop
+        if self.bytes_received + len(chunk) > self.spool_memory:
+            return False
+        self.write(chunk)
+        return True
+
+    def write(self, chunk: bytes):
+        self._spool.write(chunk)
+        self.bytes_received += len(chunk)
+
+    def start(self, process: Callable[[Iterator[str]], Iterable]):
+        # Subida completa: el hilo procesa el archivo y el request ya puede responder
+        with self._lock:
+            self.status = "processing"
+        threading.Thread(target=self.run, args=(process,), name=f"import-{self.id}", daemon=True).start()
+
+    def abort(self):
+        self._finish("failed", "La subida se interrumpió antes de terminar.")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    # Lado del hilo
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        self._spool.seek(0)
+        return iter(lambda: self._spool.read(READ_SIZE), b"")
+
+    def run(self, process: Callable[[Iterator[str]], Iterable]):
+        # process recibe las lineas y devuelve un LoteImportado (rows, imported, errors) por lote aplicado
+        try:
+            for lote in process(iter_lines(self._iter_chunks())):
+                self._record(lote)
+            self._finish("done")
+        except UnicodeDecodeError:
+            self._finish("failed", "El archivo no está en UTF-8.")
+        except HTTPException as error:
+            self._finish("failed", error.detail)
+        except Exception:
+            logger.exception("Fallo la importacion %s", self.id)
+            self._finish("failed", "Error interno durante la importación.")
+
+    def _record(self, lote):
+        with self._lock:
+            self.rows += lote.rows
+            self.imported += lote.imported
+            self.failed += len(lote.errors)
+            lugar = self.max_errors - len(self.errors)
+            if lugar > 0:
+                self.errors.extend(lote.errors[:lugar])
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+        # El archivo ya no se relee: se borra (o se libera la memoria) al terminar
+        self._spool.close()
+        self._finished.set()
+
+    def snapshot(self) -> Importacion:
+        with self._lock:
+            return Importacion(
+                id=self.id, list_id=self.list_id, format=self.format, status=self.status,
+                bytes_received=self.bytes_received, rows=self.rows, imported=self.imported, failed=self.failed,
+                errors=list(self.errors), errors_truncated=self.failed > len(self.errors), error=self.error,
+            )
+
+
+class ImportJobs:
+    # Registro en memoria del proceso: con varios workers cada uno conoce solo las importaciones que recibio
+
+    def __init__(self, max_active: int = IMPORT_MAX_ACTIVE, keep: int = IMPORT_JOBS_KEEP):
+        self.max_active = max_active
+        self.keep = keep
+        self._jobs: "OrderedDict[UUID, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, list_id: UUID, format: str) -> ImportJob:
+        # Se registra antes de leer el body: el cupo cuenta tambien las que se estan subiendo
+        job = ImportJob(list_id, format)
+        with self._lock:
+            if sum(not j.finished for j in self._jobs.values()) >= self.max_active:
+                raise ImportacionesSaturadasException()
+            self._jobs[job.id] = job
+            terminadas = [j.id for j in self._jobs.values() if j.finished]
+            for job_id in terminadas[:max(0, len(terminadas) - self.keep)]:
+                del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: UUID) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+
+import_jobs = ImportJobs()
@@ -0,0 +1,166 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Metricas en formato de texto de Prometheus, sin dependencias: contadores, histogramas y gauges que se
+# calculan al momento del scrape. Registrar una observacion es un bisect y una suma bajo un lock corto.
+
+# Buckets de latencia en segundos: de 100 us a 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pares = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    # Por combinacion de labels: conteo por bucket (no acumulado, se acumula al renderizar), suma y total
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        # bisect_left: un valor igual al limite cae en ese bucket (le = "menor o igual")
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [bucket_0 .. bucket_n-1, +Inf, suma]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series is not None else 0
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        for labels, values in series:
+            acumulado = 0
+            for limite, cantidad in zip(self.buckets + (float("inf"),), values[:-1]):
+                acumulado += cantidad
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket_labels} {acumulado}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(values[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {acumulado}"
+
+
+class Gauge:
+    # El valor se calcula en cada scrape: collect devuelve (labels, valor) por serie
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Iterable[Tuple[Labels, float]]], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> Iterator[str]:
+        values = list(self.collect())
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Iterable[Tuple[Labels, float]]], labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, collect, labelnames))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+# ETAPAS DE UN REQUEST
+# El middleware deja un RequestTimings en el contexto del request; los casos de uso marcan cuando terminan
+# y el middleware toma como serializacion lo que pasa desde ahi hasta que empieza la respuesta.
+
+class RequestTimings:
+    __slots__ = ("use_case_end",)
+
+    def __init__(self):
+        self.use_case_end: Optional[float] = None
+
+
+current_request: ContextVar[Optional[RequestTimings]] = ContextVar("current_request", default=None)
+
+USE_CASE_SECONDS = registry.histogram(
+    "app_use_case_duration_seconds", "Ejecucion de cada caso de uso (sin la espera del threadpool)", ["use_case"]
+)
+
+def timed_use_case(use_case, *args, **kwargs):
+    inicio = time.perf_counter()
+    try:
+        return use_case(*args, **kwargs)
+    finally:
+        USE_CASE_SECONDS.observe(time.perf_counter() - inicio, use_case.__name__)
+
+def mark_use_case_end():
+    timings = current_request.get()
+    if timings is not None:
+        timings.use_case_end = time.perf_counter()
@@ -0,0 +1,217 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import List, NamedTuple, Optional, Tuple
+from app.config import getenv
+
+# "log" (por defecto), "file" o "smtp" (por ejemplo un servidor local: python -m aiosmtpd -n -l localhost:1025)
+NOTIFICATION_SINK = getenv("NOTIFICATION_SINK", "log")
+NOTIFICATION_FILE = getenv("NOTIFICATION_FILE", "notificaciones.log")
+NOTIFICATION_QUEUE_SIZE = int(getenv("NOTIFICATION_QUEUE_SIZE", 10000))
+NOTIFICATION_BATCH_WINDOW_MS = int(getenv("NOTIFICATION_BATCH_WINDOW_MS", 200))
+NOTIFICATION_MAX_RETRIES = int(getenv("NOTIFICATION_MAX_RETRIES", 3))
+SMTP_HOST = getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(getenv("SMTP_PORT", 1025))
+SMTP_SENDER = getenv("SMTP_SENDER", "tareas@example.com")
+
+logger = logging.getLogger("app.notifications")
+
+
+class Notificacion(NamedTuple):
+    username: str
+    email: Optional[str]
+    title: str
+
+
+class Reintento(NamedTuple):
+    username: str
+    email: Optional[str]
+    titulos: List[str]
+    intento: int
+
+
+# SINKS: reciben todas las tareas asignadas a un usuario en un solo mensaje
+
+class LogSink:
+    def send(self, username: str, email: Optional[str], titulos: List[str]):
+        logger.info("[Notificación] Se asignaron %d tarea(s) al usuario '%s': %s", len(titulos), username, ", ".join(titulos))
+
+
+class FileSink:
+    def __init__(self, path: str = NOTIFICATION_FILE):
+        self.path = path
+
+    def send(self, username: str, email: Optional[str], titulos: List[str]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{username}\t{email or ''}\t{' | '.join(titulos)}\n")
+
+
+class SMTPSink:
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, sender: str = SMTP_SENDER):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, username: str, email: Optional[str], titulos: List[str]):
+        if not email:
+            logger.warning("El usuario '%s' no tiene email, no se envía la notificación", username)
+            return
+        # Solo el sink SMTP necesita smtplib/email: se importan al primer envio
+        import smtplib
+        from email.message import EmailMessage
+        mensaje = EmailMessage()
+        mensaje["From"] = self.sender
+        mensaje["To"] = email
+        mensaje["Subject"] = f"Se te asignaron {len(titulos)} tarea(s)"
+        mensaje.set_content("\n".join(f"- {titulo}" for titulo in titulos))
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(mensaje)
+
+
+class NotificationDispatcher:
+    # Cola en memoria + hilo de fondo: agrupa por usuario lo que llega en cada ventana y reintenta los envios.
+    # Si la cola se llena, notify() descarta (backpressure) en lugar de frenar la creacion de tareas.
+    # Los envios fallidos esperan su backoff en un heap por hora de reintento: el hilo sigue con los demas.
+
+    def __init__(
+        self,
+        sink,
+        maxsize: int = NOTIFICATION_QUEUE_SIZE,
+        batch_window: float = NOTIFICATION_BATCH_WINDOW_MS / 1000,
+        max_retries: int = NOTIFICATION_MAX_RETRIES,
+        retry_backoff: float = 0.5,
+    ):
+        self.sink = sink
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Optional[Notificacion]]" = queue.Queue(maxsize=maxsize)
+        # (no antes de, orden de llegada, reintento); solo lo toca el hilo de fondo
+        self._retries: List[Tuple[float, int, Reintento]] = []
+        self._retry_seq = count()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+                self._thread.start()
+
+    def notify(self, username: str, email: Optional[str], title: str) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(Notificacion(username, email, title))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Cola de notificaciones llena, se descarta la notificación para '%s'", username)
+            return False
+
+    def _collect_batch(self, first: Notificacion) -> Tuple[List[Notificacion], bool]:
+        # Devuelve el lote y si close() pidio cortar mientras se juntaba
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+            if item is None:
+                # La marca no se vuelve a encolar: con la cola acotada, un notify() concurrente
+                # puede ocupar el lugar y el put() bloquearia al hilo para siempre
+                return batch, True
+            batch.append(item)
+
+    def _drain(self) -> List[Notificacion]:
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if item is not None:
+                batch.append(item)
+
+    def _deliver_batch(self, batch: List[Notificacion]):
+        agrupadas: "OrderedDict[str, List[Notificacion]]" = OrderedDict()
+        for notificacion in batch:
+            agrupadas.setdefault(notificacion.username, []).append(notificacion)
+        for username, notificaciones in agrupadas.items():
+            self._deliver(username, notificaciones[0].email, [n.title for n in notificaciones])
+
+    def _deliver(self, username: str, email: Optional[str], titulos: List[str], intento: int = 0):
+        try:
+            self.sink.send(username, email, titulos)
+        except Exception:
+            if intento == self.max_retries:
+                self.failed += 1
+                logger.exception("No se pudo notificar a '%s' tras %d intentos", username, intento + 1)
+                return
+            not_before = time.monotonic() + self.retry_backoff * 2 ** intento
+            heapq.heappush(self._retries, (not_before, next(self._retry_seq), Reintento(username, email, titulos, intento + 1)))
+
+    def _retry_due(self):
+        while self._retries and self._retries[0][0] <= time.monotonic():
+            reintento = heapq.heappop(self._retries)[2]
+            self._deliver(*reintento)
+
+    def _until_next_retry(self) -> Optional[float]:
+        if not self._retries:
+            return None
+        return max(0.0, self._retries[0][0] - time.monotonic())
+
+    def _run(self):
+        cerrando = False
+        while True:
+            if cerrando:
+                # Lo que entro despues de la marca (un notify() en carrera con close()) sale en un ultimo lote
+                self._deliver_batch(self._drain())
+            self._retry_due()
+            if cerrando:
+                # Ya no llega nada nuevo: solo quedan los reintentos pendientes
+                if not self._retries:
+                    return
+                time.sleep(self._until_next_retry())
+                continue
+            try:
+                first = self._queue.get(timeout=self._until_next_retry())
+            except queue.Empty:
+                continue
+            if first is None:
+                cerrando = True
+                continue
+            batch, cerrando = self._collect_batch(first)
+            self._deliver_batch(batch)
+
+    def close(self, timeout: Optional[float] = None):
+        # Envia lo pendiente (incluidos los reintentos) y frena el hilo
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+def build_notifier(sink: str = NOTIFICATION_SINK) -> NotificationDispatcher:
+    if sink == "log":
+        return NotificationDispatcher(LogSink())
+    if sink == "file":
+        return NotificationDispatcher(FileSink())
+    if sink == "smtp":
+        return NotificationDispatcher(SMTPSink())
+    raise ValueError(f"NOTIFICATION_SINK desconocido: {sink}")
+
+
+notifier = build_notifier()
@@ -0,0 +1,278 @@
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from uuid import UUID
+from pydantic import BaseModel
+from app.domain.models import Lista, Tarea
+from app.infrastructure.repository import InMemoryRepository
+
+# Archivos: snapshot-<lsn>.ndjson (estado completo hasta ese lsn) y oplog-<lsn>.log (operaciones desde ese lsn)
+SNAPSHOT_PREFIX = "snapshot-"
+SEGMENT_PREFIX = "oplog-"
+
+
+def _file_name(prefix: str, lsn: int, suffix: str) -> str:
+    return f"{prefix}{lsn:020d}{suffix}"
+
+def _file_lsn(path: Path) -> int:
+    return int(path.stem.split("-", 1)[1])
+
+def _encode(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+def _fsync_dir(directory: Path):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _truncate(path: Path, size: int):
+    with open(path, "r+b") as f:
+        f.truncate(size)
+        os.fsync(f.fileno())
+
+def _iter_lines(path: Path) -> Iterator[bytes]:
+    # Lectura memory-mapped: no se carga el archivo entero en memoria
+    if path.stat().st_size == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield from iter(mm.readline, b"")
+
+
+class OperationLog:
+    # Log append-only con group commit: un hilo escribe y hace fsync de todo lo acumulado en cada vuelta.
+    # _cond solo protege el buffer y los lsn: write/fsync corren sin tomarlo, asi append nunca espera un fsync
+    # (salvo en modo sync, donde el escritor espera el suyo). _io_lock ordena a quienes escriben el archivo.
+
+    def __init__(self, directory: Path, next_lsn: int, flush_interval: float = 0.05, sync: bool = False):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._buffer: List[bytes] = []
+        self._next_lsn = next_lsn
+        self._flushed_lsn = next_lsn - 1
+        self._file = open(directory / _file_name(SEGMENT_PREFIX, next_lsn, ".log"), "ab")
+        self._closing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="oplog-flusher", daemon=True)
+        self._thread.start()
+
+    @property
+    def last_lsn(self) -> int:
+        return self._next_lsn - 1
+
+    def append(self, record: dict) -> int:
+        with self._cond:
+            lsn = self._next_lsn
+            self._next_lsn += 1
+            self._buffer.append(json.dumps({"lsn": lsn, **record}, separators=(",", ":")).encode() + b"\n")
+            if self.sync:
+                # El escritor espera a que su registro este en disco, junto con los demas del lote
+                self._cond.notify_all()
+                while self._flushed_lsn < lsn and not self._closed:
+                    self._cond.wait()
+        return lsn
+
+    def _write_pending(self) -> int:
+        # Con _io_lock tomado. Se toma el buffer acumulado y se escribe fuera de _cond; devuelve el ultimo lsn
+        # escrito (lo que se agregue mientras tanto queda para la proxima vuelta)
+        with self._cond:
+            buffer, self._buffer = self._buffer, []
+            lsn = self._next_lsn - 1
+        if buffer:
+            self._file.write(b"".join(buffer))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        with self._cond:
+            self._flushed_lsn = lsn
+            self._cond.notify_all()
+        return lsn
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closing:
+                    self._cond.wait(timeout=self.flush_interval)
+                closing = self._closing
+            self.flush()
+            if closing:
+                return
+
+    def flush(self):
+        with self._io_lock:
+            self._write_pending()
+
+    def rotate(self) -> int:
+        # Cierra el segmento actual y abre uno nuevo que arranca despues del ultimo lsn escrito
+        with self._io_lock:
+            lsn = self._write_pending()
+            self._file.close()
+            self._file = open(self.directory / _file_name(SEGMENT_PREFIX, lsn + 1, ".log"), "ab")
+            _fsync_dir(self.directory)
+            return lsn
+
+    def close(self):
+        # El hilo hace una ultima vuelta con todo lo pendiente antes de terminar
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._file.close()
+
+
+class OpLogRepository(InMemoryRepository):
+    # Repositorio en memoria durable: cada mutacion va al log y cada tanto se escribe un snapshot compacto
+
+    def __init__(self, directory: str, flush_interval: float = 0.05, snapshot_every: int = 10000, sync: bool = False):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = snapshot_every
+        # En modo sync cada escritura espera su fsync, asi que no puede correr en el event loop
+        self.blocking = sync
+        self._log: Optional[OperationLog] = None
+        self._since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_lock = threading.Lock()
+        last_lsn = self._recover()
+        self._log = OperationLog(self.directory, last_lsn + 1, flush_interval, sync)
+
+    # RECUPERACION
+
+    def _recover(self) -> int:
+        snapshots = sorted(self.directory.glob(f"{SNAPSHOT_PREFIX}*.ndjson"), key=_file_lsn)
+        last_lsn = 0
+        if snapshots:
+            last_lsn = self._load_snapshot(snapshots[-1])
+        for segment in sorted(self.directory.glob(f"{SEGMENT_PREFIX}*.log"), key=_file_lsn):
+            offset = 0
+            torn = False
+            for line in _iter_lines(segment):
+                try:
+                    # Sin "\n" final tampoco se llego a confirmar (el fsync es despues de escribir el lote)
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    torn = True
+                    break
+                offset += len(line)
+                if record["lsn"] <= last_lsn:
+                    continue
+                self._apply(record)
+                last_lsn = record["lsn"]
+                self._since_snapshot += 1
+            if torn:
+                # Linea cortada por una caida a mitad de escritura: se recorta, porque el log puede volver a abrir
+                # este segmento y lo proximo quedaria pegado a ella
+                _truncate(segment, offset)
+        return last_lsn
+
+    def _load_snapshot(self, path: Path) -> int:
+        for line in _iter_lines(path):
+            record = json.loads(line)
+            if record["type"] == "list":
+                self.add_list(Lista(id=record["id"], name=record["name"], tasks=[]))
+            else:
+                self._insert_task(UUID(record["list_id"]), Tarea(**record["task"]))
+        return _file_lsn(path)
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        if op == "add_list":
+            # Puede estar ya en el snapshot si se capturo despues de la rotacion
+            if self.get_list(UUID(record["lista"]["id"])) is None:
+                self.add_list(Lista(**record["lista"]))
+        elif op == "rename_list":
+            self.rename_list(UUID(record["list_id"]), record["name"])
+        elif op == "delete_list":
+            self.delete_list(UUID(record["list_id"]))
+        elif op == "add_task":
+            self.add_task(UUID(record["list_id"]), Tarea(**record["tarea"]))
+        elif op == "add_tasks":
+            self.add_tasks(UUID(record["list_id"]), [Tarea(**tarea) for tarea in record["tareas"]])
+        elif op == "replace_task":
+            self.replace_task(Tarea(**record["tarea"]))
+        elif op == "update_task_status":
+            self.update_task_status(UUID(record["task_id"]), record["status"])
+        elif op == "delete_task":
+            self.delete_task(UUID(record["task_id"]))
+
+    # ESCRITURA
+
+    def _record(self, op: str, **data):
+        if self._log is None:
+            # Durante la recuperacion no se vuelve a escribir lo que se esta reproduciendo
+            return
+        self._log.append({"op": op, **{key: _encode(value) for key, value in data.items()}})
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _capture(self) -> List[Tuple[Lista, List[Tarea]]]:
+        # Se arma con los snapshots copy-on-write de cada lista, sin frenar a los escritores. El estado
+        # capturado incluye todo hasta el lsn de la rotacion y quizas algo posterior; como cada operacion
+        # del log fija un valor final, reaplicar esas operaciones sobre el snapshot deja el mismo estado.
+        estado = []
+        for lista in self._get_lists_snapshot().items:
+            snapshot = self._get_task_snapshot(lista.id)
+            if snapshot is not None:
+                estado.append((lista, [record.to_tarea() for record in snapshot.items]))
+        return estado
+
+    def snapshot(self, wait: bool = False):
+        # Corre en su propio hilo: quien escribe nunca espera el snapshot ni toma locks de otras listas
+        with self._snapshot_lock:
+            if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+                self._since_snapshot = 0
+                self._snapshot_thread = threading.Thread(target=self._take_snapshot, name="oplog-snapshot", daemon=True)
+                self._snapshot_thread.start()
+            thread = self._snapshot_thread
+        if wait:
+            thread.join()
+
+    def _take_snapshot(self):
+        lsn = self._log.rotate()
+        self._write_snapshot(lsn, self._capture())
+
+    def _write_snapshot(self, lsn: int, estado: List[Tuple[Lista, List[Tarea]]]):
+        final = self.directory / _file_name(SNAPSHOT_PREFIX, lsn, ".ndjson")
+        tmp = final.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            for lista, tareas in estado:
+                f.write(json.dumps({"type": "list", "id": str(lista.id), "name": lista.name}).encode() + b"\n")
+                for tarea in tareas:
+                    fila = {"type": "task", "list_id": str(lista.id), "task": tarea.model_dump(mode="json")}
+                    f.write(json.dumps(fila).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+        _fsync_dir(self.directory)
+
+        # Con el snapshot en disco, los segmentos y snapshots anteriores ya no hacen falta
+        for path in self.directory.glob(f"{SNAPSHOT_PREFIX}*.ndjson"):
+            if _file_lsn(path) < lsn:
+                path.unlink()
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*.log"):
+            if _file_lsn(path) <= lsn:
+                path.unlink()
+
+    def close(self):
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self._log.close()
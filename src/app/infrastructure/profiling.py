@@ -0,0 +1,87 @@
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import List, Optional
+from app.config import getenv
+
+# Perfilado a pedido de requests individuales (ver app/api/profiling.py). Apagado por defecto; se activa
+# con PROFILING_ENABLED y cada request lo pide con el header X-Profile: <PROFILING_TOKEN>.
+PROFILING_ENABLED = getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = getenv("PROFILING_TOKEN", "")
+# Fraccion de los requests con el header que se perfilan
+PROFILING_SAMPLE_RATE = float(getenv("PROFILING_SAMPLE_RATE", 1.0))
+PROFILING_DIR = getenv("PROFILING_DIR", "profiles")
+# Anillo en disco: al superar este numero de archivos se borra el mas viejo
+PROFILING_MAX_FILES = int(getenv("PROFILING_MAX_FILES", 20))
+
+# Desde 3.12 cProfile usa sys.monitoring y ve todos los hilos; antes solo el hilo que lo activo, asi que
+# lo que corre en el threadpool se perfila aparte y se suma al final
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestProfile:
+
+    # cProfile y pstats se importan recien con el primer request perfilado
+
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+        self.thread = threading.get_ident()
+        self.thread_profiles: List["cProfile.Profile"] = []
+
+    def stats(self) -> "pstats.Stats":
+        import pstats
+        stats = pstats.Stats(self.profile)
+        for profile in self.thread_profiles:
+            stats.add(profile)
+        return stats
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def run_profiled(fn, *args, **kwargs):
+    # Para lo que un request perfilado manda al threadpool; en cualquier otro caso llama directo
+    request_profile = current_profile.get()
+    if request_profile is None or PROFILES_ALL_THREADS or threading.get_ident() == request_profile.thread:
+        return fn(*args, **kwargs)
+    import cProfile
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(fn, *args, **kwargs)
+    finally:
+        request_profile.thread_profiles.append(profile)
+
+
+class ProfileRing:
+    # Archivos pstats (se leen con python -m pstats <archivo> o snakeviz). El nombre empieza con el id del
+    # request (time_ns, ancho fijo), asi el orden alfabetico es el cronologico
+
+    def __init__(self, directory: str = PROFILING_DIR, max_files: int = PROFILING_MAX_FILES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_files = max_files
+        self._files = deque(sorted(self.directory.glob("*.prof")))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{time.time_ns():020d}"
+
+    def write(self, profile_id: str, method: str, route: str, status: int, stats: "pstats.Stats") -> Path:
+        slug = _UNSAFE.sub("_", route).strip("_") or "root"
+        path = self.directory / f"{profile_id}-{method}-{slug}-{status}.prof"
+        stats.dump_stats(path)
+        with self._lock:
+            self._files.append(path)
+            while len(self._files) > self.max_files:
+                self._files.popleft().unlink(missing_ok=True)
+        return path
+
+    def files(self) -> List[Path]:
+        return list(self._files)
@@ -1,21 +1,590 @@
-from typing import List
-from uuid import UUID, uuid4
-from app.domain.models import Lista, UserInDB
-
-fake_db: List[Lista] = [
-    Lista(
-        id = UUID("123e4567-e89b-12d3-a456-426614174000"),
-        title = "Tareas personales",
-        tasks = []
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from itertools import count
+from typing import Collection, Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+from app.domain.exceptions import PrecondicionFallidaException
+from app.infrastructure.search import SEARCH_FIELDS, SearchIndex
+from app.config import getenv
+from app.domain.models import (
+    Cambios, Lista, ListaResumen, ResultadoBusqueda, Tarea, TareaBorrada, TareaCambiada, UserInDB,
+    task_status, task_progress, task_priority, task_status_codes, task_progress_codes, task_priority_codes
+)
+
+# "memory" (por defecto, usado en tests), "memory-log", "sqlite" o "shared" (store compartido entre workers)
+REPOSITORY_BACKEND = getenv("REPOSITORY_BACKEND", "memory")
+SQLITE_PATH = getenv("SQLITE_PATH", "app.db")
+SQLITE_POOL_SIZE = int(getenv("SQLITE_POOL_SIZE", 4))
+OPLOG_DIR = getenv("OPLOG_DIR", "data")
+OPLOG_FLUSH_INTERVAL_MS = int(getenv("OPLOG_FLUSH_INTERVAL_MS", 50))
+OPLOG_SNAPSHOT_EVERY = int(getenv("OPLOG_SNAPSHOT_EVERY", 10000))
+OPLOG_SYNC = getenv("OPLOG_SYNC", "false").lower() == "true"
+# Cambios que se recuerdan para la sincronizacion incremental (GET /changes); uno por lista o tarea tocada
+CHANGES_JOURNAL_SIZE = int(getenv("CHANGES_JOURNAL_SIZE", 100000))
+
+# Campos de Tarea con indice secundario por lista
+INDEXED_FIELDS = ("status", "priority", "assigned_to")
+# Campos guardados como codigo entero en TareaRecord
+_CODED_FIELDS = {"status": task_status_codes, "priority": task_priority_codes}
+
+
+class CambioJournal(NamedTuple):
+    # task_id None: cambio de la lista en si (alta, renombre o baja)
+    revision: int
+    list_id: UUID
+    task_id: Optional[UUID]
+    deleted: bool
+
+
+class TareaRecord:
+    # Representacion interna compacta de una Tarea: sin __dict__, con status/progress/priority como codigos
+    # enteros y los textos repetidos (partner, rol, assigned_to) internados. Se trata como inmutable: los
+    # snapshots comparten los records, asi que un cambio siempre crea uno nuevo.
+    __slots__ = ("id", "seq", "title", "description", "partner", "rol", "status", "progress", "priority", "assigned_to")
+
+    def __init__(self, id, seq, title, description, partner, rol, status, progress, priority, assigned_to):
+        self.id = id
+        self.seq = seq
+        self.title = title
+        self.description = description
+        self.partner = partner
+        self.rol = rol
+        self.status = status
+        self.progress = progress
+        self.priority = priority
+        self.assigned_to = assigned_to
+
+    @classmethod
+    def from_tarea(cls, tarea: Tarea, seq: int) -> "TareaRecord":
+        return cls(
+            tarea.id,
+            seq,
+            tarea.title,
+            tarea.description,
+            sys.intern(tarea.partner),
+            sys.intern(tarea.rol),
+            task_status_codes[tarea.status],
+            task_progress_codes[tarea.progress],
+            task_priority_codes[tarea.priority],
+            sys.intern(tarea.assigned_to) if tarea.assigned_to is not None else None,
+        )
+
+    def with_status(self, status: int) -> "TareaRecord":
+        return TareaRecord(
+            self.id, self.seq, self.title, self.description, self.partner, self.rol,
+            status, self.progress, self.priority, self.assigned_to,
+        )
+
+    def to_tarea(self) -> Tarea:
+        # Los valores ya se validaron al guardarlos, se arma el modelo sin volver a validar
+        return Tarea.model_construct(
+            id          = self.id,
+            title       = self.title,
+            description = self.description,
+            partner     = self.partner,
+            rol         = self.rol,
+            status      = task_status[self.status],
+            progress    = task_progress[self.progress],
+            priority    = task_priority[self.priority],
+            assigned_to = self.assigned_to
+        )
+
+def _to_tareas(records) -> List[Tarea]:
+    return [record.to_tarea() for record in records]
+
+
+class _Snapshot(NamedTuple):
+    # Vista inmutable (copy-on-write) de una coleccion, ordenada por numero de secuencia
+    seqs: Tuple[int, ...]
+    items: tuple
+
+    def page(self, after: Optional[int], limit: Optional[int]) -> Tuple[list, Optional[int]]:
+        start = 0 if after is None else bisect_right(self.seqs, after)
+        end = len(self.seqs) if limit is None else min(start + limit, len(self.seqs))
+        next_after = self.seqs[end - 1] if end < len(self.seqs) else None
+        return list(self.items[start:end]), next_after
+
+
+class InMemoryRepository:
+    # Sin I/O: los casos de uso async lo llaman directo desde el event loop
+    blocking = False
+
+    # Concurrencia: los escritores toman el lock de su lista (y _lock para crear, renombrar o borrar listas).
+    # Los lectores usan snapshots inmutables que solo se reconstruyen, bajo lock, despues de una escritura.
+
+    def __init__(self, journal_size: int = CHANGES_JOURNAL_SIZE):
+        # list_id -> Lista (sin tareas, las tareas viven en _tasks)
+        self._lists: Dict[UUID, Lista] = {}
+        # list_id -> {task_id -> TareaRecord}, los dicts mantienen el orden de insercion.
+        # Los modelos Tarea solo se arman al devolver datos
+        self._tasks: Dict[UUID, Dict[UUID, TareaRecord]] = {}
+        # task_id -> list_id
+        self._task_list: Dict[UUID, UUID] = {}
+        # list_id -> campo -> valor (codigo para status/priority) -> {task_id: None} (set ordenado)
+        self._indexes: Dict[UUID, Dict[str, Dict[object, Dict[UUID, None]]]] = {}
+        # Indice invertido de texto (title, description, partner, rol) de todas las listas
+        self._search = SearchIndex()
+        # Numeros de secuencia crecientes para paginar con un orden estable (el de cada tarea vive en su record)
+        self._seq = count(1)
+        self._list_seq: Dict[UUID, int] = {}
+        # Locks y snapshots
+        self._lock = threading.RLock()
+        self._list_locks: Dict[UUID, threading.RLock] = {}
+        self._lists_snapshot: Optional[_Snapshot] = None
+        self._task_snapshots: Dict[UUID, Optional[_Snapshot]] = {}
+        # Revisiones: cada mutacion toma la siguiente revision global y se la asigna a su lista. Arrancan
+        # desde el reloj para que una revision de antes de un reinicio no coincida con datos nuevos
+        self._revision = time.time_ns() // 1000
+        self._revisions: Dict[UUID, int] = {}
+        self._revision_lock = threading.Lock()
+        # Journal acotado de cambios, en orden de revision. Lo anterior a _journal_floor ya no esta (se
+        # descarto o fue antes de arrancar): un since mas viejo recibe resync
+        self._journal: "deque[CambioJournal]" = deque(maxlen=journal_size)
+        self._journal_floor = self._revision
+
+    def _record(self, op: str, **data):
+        # Gancho para las subclases que persisten cada mutacion (ver OpLogRepository)
+        pass
+
+    # REVISIONES
+
+    def _touch(
+        self, list_id: UUID, deleted: bool = False, list_changed: bool = False,
+        task_ids: Collection[UUID] = (), tasks_deleted: bool = False,
+    ):
+        # Se llama con el lock de la lista tomado, despues de aplicar el cambio. El journal se escribe con el
+        # mismo lock que sube la revision, asi queda en orden
+        with self._revision_lock:
+            self._revision += 1
+            if deleted:
+                self._revisions.pop(list_id, None)
+            else:
+                self._revisions[list_id] = self._revision
+            if deleted or list_changed:
+                self._journal_append(CambioJournal(self._revision, list_id, None, deleted))
+            for task_id in task_ids:
+                self._journal_append(CambioJournal(self._revision, list_id, task_id, tasks_deleted))
+
+    def _journal_append(self, cambio: CambioJournal):
+        if len(self._journal) == self._journal.maxlen:
+            self._journal_floor = self._journal[0].revision
+        self._journal.append(cambio)
+
+    def _check_revision(self, list_id: UUID, expected_revisions: Optional[Collection[int]]):
+        # Escritura condicional (If-Match): se valida con el lock de la lista tomado, junto con la escritura
+        if expected_revisions is not None and self._revisions.get(list_id) not in expected_revisions:
+            raise PrecondicionFallidaException()
+
+    def get_revision(self) -> int:
+        return self._revision
+
+    def get_list_revision(self, list_id: UUID) -> Optional[int]:
+        return self._revisions.get(list_id)
+
+    def get_changes(self, since: int, list_id: Optional[UUID] = None) -> Cambios:
+        with self._revision_lock:
+            revision = self._revision
+            if since < self._journal_floor or since > revision:
+                return Cambios(revision=revision, resync=True)
+            recientes = []
+            for cambio in reversed(self._journal):
+                if cambio.revision <= since:
+                    break
+                recientes.append(cambio)
+
+        # Del mas nuevo al mas viejo: la primera vez que aparece cada lista o tarea es su ultimo cambio.
+        # El estado se lee despues de soltar el lock: puede ser mas nuevo que revision, y se volvera a mandar
+        cambios, vistos = Cambios(revision=revision), set()
+        for cambio in recientes:
+            if (list_id is not None and cambio.list_id != list_id) or (cambio.list_id, cambio.task_id) in vistos:
+                continue
+            vistos.add((cambio.list_id, cambio.task_id))
+            if cambio.task_id is None:
+                lista = self._lists.get(cambio.list_id)
+                if lista is None:
+                    cambios.deleted_lists.append(cambio.list_id)
+                else:
+                    task_count = len(self._tasks.get(cambio.list_id, ()))
+                    cambios.lists.append(ListaResumen(id=lista.id, name=lista.name, task_count=task_count))
+                continue
+            record = self._tasks.get(cambio.list_id, {}).get(cambio.task_id)
+            if record is None:
+                cambios.deleted_tasks.append(TareaBorrada(list_id=cambio.list_id, id=cambio.task_id))
+            else:
+                cambios.tasks.append(TareaCambiada(list_id=cambio.list_id, task=record.to_tarea()))
+        for items in (cambios.lists, cambios.deleted_lists, cambios.tasks, cambios.deleted_tasks):
+            items.reverse()
+        return cambios
+
+    # ESTADISTICAS
+
+    def get_stats(self) -> dict:
+        # Para /metrics: sin locks, los valores pueden estar desfasados en una escritura concurrente
+        index_entries = {"task_list": len(self._task_list), "search_terms": len(self._search)}
+        for field in INDEXED_FIELDS:
+            index_entries[field] = sum(
+                len(bucket) for indexes in list(self._indexes.values()) for bucket in list(indexes[field].values())
+            )
+        return {"lists": len(self._lists), "tasks": len(self._task_list), "index_entries": index_entries}
+
+    # INDICES
+
+    def _index_task(self, list_id: UUID, tarea: TareaRecord):
+        indexes = self._indexes[list_id]
+        for field in INDEXED_FIELDS:
+            value = getattr(tarea, field)
+            if value is not None:
+                indexes[field].setdefault(value, {})[tarea.id] = None
+
+    def _unindex_task(self, list_id: UUID, tarea: TareaRecord):
+        indexes = self._indexes[list_id]
+        for field in INDEXED_FIELDS:
+            value = getattr(tarea, field)
+            bucket = indexes[field].get(value)
+            if bucket is None:
+                continue
+            bucket.pop(tarea.id, None)
+            if not bucket:
+                del indexes[field][value]
+
+    # SNAPSHOTS
+
+    def _get_lists_snapshot(self) -> _Snapshot:
+        snapshot = self._lists_snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._lists_snapshot is None:
+                self._lists_snapshot = _Snapshot(tuple(self._list_seq.values()), tuple(self._lists.values()))
+            return self._lists_snapshot
+
+    def _get_task_snapshot(self, list_id: UUID) -> Optional[_Snapshot]:
+        snapshot = self._task_snapshots.get(list_id)
+        if snapshot is not None:
+            return snapshot
+        lock = self._list_locks.get(list_id)
+        if lock is None:
+            return None
+        with lock:
+            tareas = self._tasks.get(list_id)
+            if tareas is None:
+                return None
+            snapshot = self._task_snapshots.get(list_id)
+            if snapshot is None:
+                records = tuple(tareas.values())
+                snapshot = _Snapshot(tuple(record.seq for record in records), records)
+                self._task_snapshots[list_id] = snapshot
+            return snapshot
+
+    def _lock_task(self, task_id: UUID) -> Optional[Tuple[UUID, threading.RLock]]:
+        # Devuelve la lista de la tarea con su lock tomado, o None si la tarea no existe
+        while True:
+            list_id = self._task_list.get(task_id)
+            lock = self._list_locks.get(list_id) if list_id is not None else None
+            if lock is None:
+                return None
+            lock.acquire()
+            if self._task_list.get(task_id) == list_id:
+                return list_id, lock
+            lock.release()
+
+    # LISTAS
+
+    def _build_list(self, lista: Lista) -> Lista:
+        snapshot = self._get_task_snapshot(lista.id)
+        return Lista(id=lista.id, name=lista.name, tasks=_to_tareas(snapshot.items) if snapshot else [])
+
+    def get_lists(self) -> List[Lista]:
+        return [self._build_list(lista) for lista in self._get_lists_snapshot().items]
+
+    def page_lists(self, after: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[Lista], Optional[int]]:
+        listas, next_after = self._get_lists_snapshot().page(after, limit)
+        return [self._build_list(lista) for lista in listas], next_after
+
+    def page_list_summaries(
+        self, after: Optional[int] = None, limit: Optional[int] = None
+    ) -> Tuple[List[ListaResumen], Optional[int]]:
+        listas, next_after = self._get_lists_snapshot().page(after, limit)
+        resumenes = [
+            ListaResumen(id=lista.id, name=lista.name, task_count=len(self._tasks.get(lista.id, ())))
+            for lista in listas
+        ]
+        return resumenes, next_after
+
+    def get_list(self, list_id: UUID) -> Optional[Lista]:
+        lista = self._lists.get(list_id)
+        if lista is None:
+            return None
+        return self._build_list(lista)
+
+    def add_list(self, lista: Lista) -> Lista:
+        lock = threading.RLock()
+        # El lock de la lista se toma antes de publicarla: nadie escribe en ella hasta que quede registrada
+        with self._lock, lock:
+            self._list_locks[lista.id] = lock
+            self._tasks[lista.id] = {}
+            self._indexes[lista.id] = {field: {} for field in INDEXED_FIELDS}
+            self._task_snapshots[lista.id] = None
+            self._list_seq[lista.id] = next(self._seq)
+            self._lists[lista.id] = Lista(id=lista.id, name=lista.name, tasks=[])
+            for tarea in lista.tasks or []:
+                self._insert_task(lista.id, tarea)
+            self._lists_snapshot = None
+            self._touch(lista.id, list_changed=True, task_ids=[tarea.id for tarea in lista.tasks or []])
+            self._record("add_list", lista=lista)
+        return lista
+
+    def rename_list(
+        self, list_id: UUID, name: str, expected_revisions: Optional[Collection[int]] = None
+    ) -> Optional[Lista]:
+        with self._lock:
+            lock = self._list_locks.get(list_id)
+            if lock is None:
+                return None
+            with lock:
+                self._check_revision(list_id, expected_revisions)
+                self._lists[list_id] = Lista(id=list_id, name=name, tasks=[])
+                self._lists_snapshot = None
+                self._touch(list_id, list_changed=True)
+                self._record("rename_list", list_id=list_id, name=name)
+                return self._build_list(self._lists[list_id])
+
+    def delete_list(self, list_id: UUID) -> bool:
+        with self._lock:
+            lock = self._list_locks.get(list_id)
+            if lock is None:
+                return False
+            with lock:
+                del self._lists[list_id]
+                del self._list_seq[list_id]
+                del self._indexes[list_id]
+                del self._list_locks[list_id]
+                self._task_snapshots.pop(list_id, None)
+                for task_id, record in self._tasks.pop(list_id).items():
+                    del self._task_list[task_id]
+                    self._search.remove(record)
+                self._lists_snapshot = None
+                self._touch(list_id, deleted=True)
+                self._record("delete_list", list_id=list_id)
+            return True
+
+    # TAREAS
+
+    def get_tasks(self, list_id: UUID) -> Optional[List[Tarea]]:
+        snapshot = self._get_task_snapshot(list_id)
+        if snapshot is None:
+            return None
+        return _to_tareas(snapshot.items)
+
+    def page_tasks(
+        self, list_id: UUID, after: Optional[int] = None, limit: Optional[int] = None
+    ) -> Optional[Tuple[List[Tarea], Optional[int]]]:
+        snapshot = self._get_task_snapshot(list_id)
+        if snapshot is None:
+            return None
+        records, next_after = snapshot.page(after, limit)
+        return _to_tareas(records), next_after
+
+    def get_task(self, task_id: UUID) -> Optional[Tarea]:
+        list_id = self._task_list.get(task_id)
+        tareas = self._tasks.get(list_id) if list_id is not None else None
+        if tareas is None:
+            return None
+        record = tareas.get(task_id)
+        return record.to_tarea() if record is not None else None
+
+    def get_task_list_id(self, task_id: UUID) -> Optional[UUID]:
+        return self._task_list.get(task_id)
+
+    def _insert_task(self, list_id: UUID, tarea: Tarea):
+        # Se llama con el lock de la lista tomado; si la tarea ya existe se reemplaza en su mismo lugar
+        anterior = self._tasks[list_id].get(tarea.id)
+        self._store_record(list_id, TareaRecord.from_tarea(tarea, anterior.seq if anterior else next(self._seq)), anterior)
+
+    def _store_record(self, list_id: UUID, record: TareaRecord, anterior: Optional[TareaRecord]):
+        if anterior is not None:
+            self._unindex_task(list_id, anterior)
+        self._tasks[list_id][record.id] = record
+        self._task_list[record.id] = list_id
+        self._index_task(list_id, record)
+        # Un cambio de estado no toca el texto: el indice de busqueda solo se actualiza si cambia algun campo
+        if anterior is None:
+            self._search.add(record)
+        elif any(getattr(anterior, field) != getattr(record, field) for field in SEARCH_FIELDS):
+            self._search.remove(anterior)
+            self._search.add(record)
+        self._task_snapshots[list_id] = None
+
+    def add_task(self, list_id: UUID, tarea: Tarea) -> Optional[Tarea]:
+        tareas = self.add_tasks(list_id, [tarea], op="add_task")
+        return tareas[0] if tareas is not None else None
+
+    def add_tasks(self, list_id: UUID, tareas: List[Tarea], op: str = "add_tasks") -> Optional[List[Tarea]]:
+        lock = self._list_locks.get(list_id)
+        if lock is None:
+            return None
+        with lock:
+            if list_id not in self._tasks:
+                return None
+            for tarea in tareas:
+                self._insert_task(list_id, tarea)
+            self._touch(list_id, task_ids=[tarea.id for tarea in tareas])
+            if op == "add_task":
+                self._record(op, list_id=list_id, tarea=tareas[0])
+            else:
+                self._record(op, list_id=list_id, tareas=tareas)
+        return tareas
+
+    def replace_task(self, tarea: Tarea, expected_revisions: Optional[Collection[int]] = None) -> Optional[Tarea]:
+        locked = self._lock_task(tarea.id)
+        if locked is None:
+            return None
+        list_id, lock = locked
+        try:
+            self._check_revision(list_id, expected_revisions)
+            self._insert_task(list_id, tarea)
+            self._touch(list_id, task_ids=(tarea.id,))
+            self._record("replace_task", tarea=tarea)
+        finally:
+            lock.release()
+        return tarea
+
+    def update_task_status(
+        self, task_id: UUID, status: str, expected_revisions: Optional[Collection[int]] = None
+    ) -> Optional[Tarea]:
+        locked = self._lock_task(task_id)
+        if locked is None:
+            return None
+        list_id, lock = locked
+        try:
+            self._check_revision(list_id, expected_revisions)
+            # Se reemplaza el record en lugar de modificarlo: los snapshots ya entregados no cambian
+            anterior = self._tasks[list_id][task_id]
+            record = anterior.with_status(task_status_codes[status])
+            self._store_record(list_id, record, anterior)
+            self._touch(list_id, task_ids=(task_id,))
+            self._record("update_task_status", task_id=task_id, status=status)
+        finally:
+            lock.release()
+        return record.to_tarea()
+
+    def delete_task(self, task_id: UUID) -> bool:
+        locked = self._lock_task(task_id)
+        if locked is None:
+            return False
+        list_id, lock = locked
+        try:
+            del self._task_list[task_id]
+            record = self._tasks[list_id].pop(task_id)
+            self._unindex_task(list_id, record)
+            self._search.remove(record)
+            self._task_snapshots[list_id] = None
+            self._touch(list_id, task_ids=(task_id,), tasks_deleted=True)
+            self._record("delete_task", task_id=task_id)
+        finally:
+            lock.release()
+        return True
+
+    def count_tasks(self, list_id: UUID, status: Optional[str] = None) -> Optional[int]:
+        # Los indices de estado funcionan como contadores mantenidos en cada escritura; len() no necesita lock
+        tareas = self._tasks.get(list_id)
+        indexes = self._indexes.get(list_id)
+        if tareas is None or indexes is None:
+            return None
+        if status is None:
+            return len(tareas)
+        return len(indexes["status"].get(task_status_codes.get(status), ()))
+
+    def filter_tasks(self, list_id: UUID, **filters: Optional[str]) -> Optional[List[Tarea]]:
+        filters = {field: value for field, value in filters.items() if value}
+        if not filters:
+            return self.get_tasks(list_id)
+        lock = self._list_locks.get(list_id)
+        if lock is None:
+            return None
+        # Los indices se recorren con el lock tomado; la seccion critica es proporcional a los resultados
+        with lock:
+            tareas = self._tasks.get(list_id)
+            if tareas is None:
+                return None
+            indexes = self._indexes[list_id]
+            buckets = []
+            for field, value in filters.items():
+                if field in _CODED_FIELDS:
+                    value = _CODED_FIELDS[field].get(value)
+                bucket = indexes[field].get(value)
+                if not bucket:
+                    return []
+                buckets.append(bucket)
+            # Se recorre el indice mas chico y se intersecta contra el resto
+            buckets.sort(key=len)
+            smallest, rest = buckets[0], buckets[1:]
+            records = [tareas[task_id] for task_id in smallest if all(task_id in bucket for bucket in rest)]
+        return _to_tareas(records)
+
+    def search_tasks(
+        self, query: str, list_id: Optional[UUID] = None, limit: int = 20
+    ) -> Optional[List[ResultadoBusqueda]]:
+        if list_id is None:
+            encontradas = self._search.search(query, limit)
+        else:
+            lock = self._list_locks.get(list_id)
+            if lock is None:
+                return None
+            # Con el lock de la lista sus tareas no cambian mientras se usan como candidatas
+            with lock:
+                tareas = self._tasks.get(list_id)
+                if tareas is None:
+                    return None
+                encontradas = self._search.search(query, limit, candidates=tareas)
+        resultados = []
+        for task_id, score in encontradas:
+            # La tarea pudo borrarse despues de la busqueda
+            tarea_list_id = self._task_list.get(task_id)
+            record = self._tasks.get(tarea_list_id, {}).get(task_id) if tarea_list_id is not None else None
+            if record is not None:
+                resultados.append(ResultadoBusqueda(list_id=tarea_list_id, score=score, task=record.to_tarea()))
+        return resultados
+
+
+def build_repository(backend: str = REPOSITORY_BACKEND):
+    if backend == "memory":
+        return InMemoryRepository()
+    if backend == "sqlite":
+        from app.infrastructure.sqlite_repository import SQLiteRepository
+        return SQLiteRepository(SQLITE_PATH, SQLITE_POOL_SIZE)
+    if backend == "memory-log":
+        from app.infrastructure.oplog_repository import OpLogRepository
+        return OpLogRepository(OPLOG_DIR, OPLOG_FLUSH_INTERVAL_MS / 1000, OPLOG_SNAPSHOT_EVERY, OPLOG_SYNC)
+    if backend == "shared":
+        from app.infrastructure.shared_repository import SharedRepository
+        return SharedRepository()
+    raise ValueError(f"REPOSITORY_BACKEND desconocido: {backend}")
+
+
+repository = build_repository()
+
+DEFAULT_LIST_ID = UUID("123e4567-e89b-12d3-a456-426614174000")
+if repository.get_list(DEFAULT_LIST_ID) is None:
+    repository.add_list(
+        Lista(
+            id = DEFAULT_LIST_ID,
+            name = "Tareas personales",
+            tasks = []
+        )
     )
-]
 
-fake_db_users = [
-    UserInDB(
+# Usuarios indexados por username (busqueda O(1) en login y en cada request autenticada)
+fake_db_users: Dict[str, UserInDB] = {
+    "admin": UserInDB(
         id = UUID("d46f53ab-a9d4-4abc-ab3b-920d7d130edd"),
         username = "admin",
         full_name = "Administrador",
         email = "admin@example.com",
-        hashed_password = "admin"
+        # bcrypt de "admin"
+        hashed_password = "$2b$12$..MSZGn.ilzc.kfV6B/AsuTgyqMVRhrJmPoxk4jYxIdoXslG3hdAG"
     )
-]
+}
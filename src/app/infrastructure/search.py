@@ -0,0 +1,214 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from itertools import count, islice
+from typing import Collection, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from app.config import getenv
+
+# Campos indexados y su peso en el ranking
+SEARCH_FIELDS = {"title": 3.0, "description": 1.0, "partner": 2.0, "rol": 2.0}
+
+# Palabras demasiado comunes en español: no ayudan a buscar y generan listas de postings enormes
+STOPWORDS = frozenset(
+    "a al con de del el en es la las lo los o para por que se su un una uno y".split()
+)
+
+# Trabajo maximo de una busqueda en todo el indice: ids cruzados entre pesos y combinaciones de pesos
+# recorridas. Alcanza para el top exacto salvo en consultas con varios terminos muy frecuentes; ahi se completa
+# con las mejores de las MAX_FILL_SCAN tareas de mayor peso del termino menos frecuente
+SEARCH_MAX_SCAN = int(getenv("SEARCH_MAX_SCAN", 20000))
+MAX_TIER_COMBINATIONS = 512
+MAX_FILL_SCAN = 2000
+
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    # Sin acentos ni mayusculas: "Revisión" y "revision" son el mismo termino
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(normalize(text)) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    # Indice invertido en memoria: termino -> peso -> {task_id.int: None}. El peso suma las apariciones del
+    # termino por campo (SEARCH_FIELDS); agrupar por peso permite recorrer primero las combinaciones de pesos
+    # mejor rankeadas y cortar apenas se llena el top. Para sacar una tarea se vuelven a tokenizar sus textos,
+    # asi no hace falta guardar los terminos de cada tarea. Los ids se guardan como enteros: el hash de UUID
+    # es codigo Python y cada interseccion hace uno por id; el de int no.
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[float, Dict[int, None]]] = {}
+        self._documents = 0
+        # Escritores de distintas listas comparten el indice: el lock es corto y no toma otros locks
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _weights(record) -> Counter:
+        weights: Counter = Counter()
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(getattr(record, field)):
+                weights[token] += weight
+        return weights
+
+    def add(self, record):
+        weights = self._weights(record)
+        with self._lock:
+            self._documents += 1
+            for token, weight in weights.items():
+                self._postings.setdefault(token, {}).setdefault(weight, {})[record.id.int] = None
+
+    def remove(self, record):
+        weights = self._weights(record)
+        with self._lock:
+            self._documents -= 1
+            for token, weight in weights.items():
+                tiers = self._postings.get(token)
+                tier = tiers.get(weight) if tiers is not None else None
+                if tier is None:
+                    continue
+                tier.pop(record.id.int, None)
+                if not tier:
+                    del tiers[weight]
+                    if not tiers:
+                        del self._postings[token]
+
+    @staticmethod
+    def _score(task_id: int, score: float, terms) -> Optional[float]:
+        # Suma el aporte de cada termino; None si a la tarea le falta alguno
+        for tiers, idf in terms:
+            for weight, tier in tiers.items():
+                if task_id in tier:
+                    score += weight * idf
+                    break
+            else:
+                return None
+        return score
+
+    @staticmethod
+    def _search_tiers(
+        scored, limit: int, candidates: Optional[Dict[int, None]], budget: int
+    ) -> Tuple[List[Tuple[int, float]], bool]:
+        # Cada tarea esta en un solo peso por termino, y todas las de una misma combinacion de pesos tienen el
+        # mismo score. Se recorren las combinaciones de mayor a menor score (heap; cada una se genera una sola
+        # vez, bajando de a un termino desde el ultimo que se bajo) y se corta apenas se llena el top: las
+        # siguientes no pueden superar a las ya tomadas. Las intersecciones de los primeros terminos de cada
+        # combinacion se guardan, asi cada combinacion nueva solo cruza un peso mas; cada cruce recorre el lado
+        # mas chico con filter/__contains__, sin codigo Python por tarea.
+        # Devuelve (encontradas, completo): completo es False si se agoto el presupuesto antes del top.
+        tiers = [tiers for tiers, _ in scored]
+        weights = [sorted(term, reverse=True) for term in tiers]
+        prefixes: Dict[Tuple[int, ...], Collection[int]] = {}
+
+        def ids_of(prefix: Tuple[int, ...]) -> Collection[int]:
+            # Ids que tienen los primeros terminos en esos pesos, en orden de insercion
+            if len(prefix) == 1 and candidates is None:
+                return tiers[0][weights[0][prefix[0]]]
+            ids = prefixes.get(prefix)
+            if ids is None:
+                ids = prefixes[prefix] = dict.fromkeys(matching(prefix))
+            return ids
+
+        def matching(combo: Tuple[int, ...]) -> Iterator[int]:
+            nonlocal budget
+            if len(combo) == 1:
+                ids = tiers[0][weights[0][combo[0]]]
+                return iter(ids) if candidates is None else filter(candidates.__contains__, ids)
+            previous = ids_of(combo[:-1])
+            tier = tiers[len(combo) - 1][weights[len(combo) - 1][combo[-1]]]
+            small, big = (previous, tier) if len(previous) <= len(tier) else (tier, previous)
+            budget -= len(small)
+            return filter(big.__contains__, small)
+
+        def entry(combo: Tuple[int, ...], last: int):
+            score = sum(weights[i][j] * idf for i, (j, (_, idf)) in enumerate(zip(combo, scored)))
+            return (-score, next(order), combo, last)
+
+        order = count()
+        heap = [entry((0,) * len(tiers), 0)]
+        found: List[Tuple[int, float]] = []
+        for _ in range(MAX_TIER_COMBINATIONS):
+            if not heap or len(found) == limit:
+                return found, True
+            if budget < 0:
+                return found, False
+            neg_score, _, combo, last = heapq.heappop(heap)
+            found.extend((task_id, -neg_score) for task_id in islice(matching(combo), limit - len(found)))
+            for i in range(last, len(combo)):
+                if combo[i] + 1 < len(weights[i]):
+                    heapq.heappush(heap, entry(combo[:i] + (combo[i] + 1,) + combo[i + 1:], i))
+        # Con muchos terminos casi todas las combinaciones estan vacias: tambien se acota cuantas se recorren
+        return found, not heap or len(found) == limit
+
+    def _fill(
+        self, scored, needed: int, skip: Collection[int], candidates: Optional[Dict[int, None]]
+    ) -> List[Tuple[int, float]]:
+        # Con el presupuesto agotado: las mejores entre las primeras MAX_FILL_SCAN tareas desde los pesos altos
+        # del termino menos frecuente, con su score exacto (no necesariamente las mejores que quedan)
+        (driver, idf), rest = scored[0], scored[1:]
+        extra: List[Tuple[int, float]] = []
+        budget = MAX_FILL_SCAN
+        for weight in sorted(driver, reverse=True):
+            for task_id in islice(driver[weight], budget):
+                if task_id in skip or (candidates is not None and task_id not in candidates):
+                    continue
+                score = self._score(task_id, weight * idf, rest)
+                if score is not None:
+                    extra.append((task_id, score))
+            budget -= len(driver[weight])
+            if budget <= 0:
+                break
+        return heapq.nlargest(needed, extra, key=lambda item: item[1])
+
+    def search(
+        self, query: str, limit: int, candidates: Optional[Collection[UUID]] = None
+    ) -> List[Tuple[UUID, float]]:
+        # Todos los terminos tienen que aparecer (AND). Score: peso * idf de cada termino, sumado.
+        # candidates: ids admitidos (p. ej. las tareas de una lista), no pueden cambiar durante la busqueda
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        # Min-heap (score, -orden, task_id) de tamaño limit: a igual score queda la que se encontro antes
+        top: List[Tuple[float, int, int]] = []
+        order = count()
+
+        def offer(task_id: int, score: Optional[float]):
+            if score is None:
+                return
+            if len(top) < limit:
+                heapq.heappush(top, (score, -next(order), task_id))
+            elif score > top[0][0]:
+                heapq.heapreplace(top, (score, -next(order), task_id))
+
+        if candidates is not None:
+            candidates = dict.fromkeys(task_id.int for task_id in candidates)
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            sized = sorted(((sum(map(len, tiers.values())), tiers) for tiers in postings), key=lambda item: item[0])
+            scored = [(tiers, math.log(1 + self._documents / df)) for df, tiers in sized]
+
+            if candidates is not None and len(candidates) < sized[0][0]:
+                # Pocas candidatas (una lista chica): se puntua cada una directamente
+                for task_id in candidates:
+                    offer(task_id, self._score(task_id, 0.0, scored))
+            else:
+                found, complete = self._search_tiers(scored, limit, candidates, SEARCH_MAX_SCAN)
+                if not complete:
+                    skip = {task_id for task_id, _ in found}
+                    extra = self._fill(scored, limit - len(found), skip, candidates)
+                    found.extend(extra)
+                return [(UUID(int=task_id), score) for task_id, score in found]
+        return [(UUID(int=task_id), score) for score, _, task_id in sorted(top, reverse=True)]
+
+    def __len__(self):
+        # Cantidad de terminos distintos
+        return len(self._postings)
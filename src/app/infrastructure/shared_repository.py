@@ -0,0 +1,149 @@
+import fcntl
+import os
+import signal
+import subprocess
+import sys
+import time
+from multiprocessing.managers import BaseManager
+from app.config import getenv
+
+# Proceso de store local compartido por todos los workers de uvicorn del host, via socket Unix
+SHARED_STORE_ADDRESS = getenv("SHARED_STORE_ADDRESS", "/tmp/tareas-store.sock")
+SHARED_STORE_AUTHKEY = getenv("SHARED_STORE_AUTHKEY", getenv("SECRET_KEY") or "tareas-store")
+# Repositorio que vive dentro del proceso de store: "memory" o "memory-log"
+SHARED_STORE_BACKEND = getenv("SHARED_STORE_BACKEND", "memory")
+SHARED_STORE_AUTOSTART = getenv("SHARED_STORE_AUTOSTART", "true").lower() == "true"
+SHARED_STORE_CONNECT_TIMEOUT = float(getenv("SHARED_STORE_CONNECT_TIMEOUT", 10))
+
+# Metodos del repositorio que los workers pueden usar. close no esta: el repositorio del store lo cierra solo
+# el proceso de store al terminar, nunca un worker
+REPOSITORY_METHODS = (
+    "get_revision", "get_list_revision", "get_changes", "get_stats",
+    "get_lists", "page_lists", "page_list_summaries", "get_list", "add_list", "rename_list", "delete_list",
+    "get_tasks", "page_tasks", "get_task", "get_task_list_id", "add_task", "add_tasks", "replace_task",
+    "update_task_status", "delete_task", "count_tasks", "filter_tasks", "search_tasks",
+)
+
+
+class StoreManager(BaseManager):
+    pass
+
+
+def _pid_path(address: str) -> str:
+    return address + ".pid"
+
+def _connect(address: str, authkey: bytes):
+    StoreManager.register("repository", exposed=REPOSITORY_METHODS)
+    manager = StoreManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.repository()
+
+def _spawn_store(address: str):
+    # Proceso aparte y en su propia sesion: sobrevive a los workers (y a sus reinicios), que es donde viven
+    # los datos. Se detiene con SIGTERM: python -m app.infrastructure.shared_repository stop
+    env = dict(os.environ, REPOSITORY_BACKEND=SHARED_STORE_BACKEND, SHARED_STORE_ADDRESS=address)
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.infrastructure.shared_repository"],
+        env=env,
+        start_new_session=True,
+    )
+
+def connect_store(address: str, authkey: bytes, autostart: bool, timeout: float):
+    # Con autostart el primer worker que toma el lock levanta el store; el resto espera a que acepte conexiones
+    deadline = time.monotonic() + timeout
+    spawned = False
+    while True:
+        try:
+            return _connect(address, authkey)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() > deadline:
+                raise
+        if autostart and not spawned:
+            with open(address + ".lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    return _connect(address, authkey)
+                except (FileNotFoundError, ConnectionRefusedError):
+                    _spawn_store(address)
+                    spawned = True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        time.sleep(0.05)
+
+
+class SharedRepository:
+    # Cliente del store compartido. Cada llamada es un round-trip por el socket, asi que los casos de uso
+    # async lo despachan al threadpool; el proxy abre una conexion por hilo.
+    blocking = True
+
+    def __init__(
+        self,
+        address: str = SHARED_STORE_ADDRESS,
+        authkey: str = SHARED_STORE_AUTHKEY,
+        autostart: bool = SHARED_STORE_AUTOSTART,
+        timeout: float = SHARED_STORE_CONNECT_TIMEOUT,
+    ):
+        self.address = address
+        self._proxy = connect_store(address, authkey.encode(), autostart, timeout)
+
+    def close(self):
+        # Solo suelta la referencia de este worker; el store y su repositorio siguen para los demas
+        proxy, self._proxy = self._proxy, None
+        if proxy is not None:
+            proxy._close()
+
+
+def _forward(name: str):
+    def method(self, *args, **kwargs):
+        return getattr(self._proxy, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+for _name in REPOSITORY_METHODS:
+    setattr(SharedRepository, _name, _forward(_name))
+
+
+def serve(address: str = SHARED_STORE_ADDRESS, authkey: str = SHARED_STORE_AUTHKEY):
+    from app.infrastructure.repository import repository
+
+    StoreManager.register("repository", callable=lambda: repository, exposed=REPOSITORY_METHODS)
+    # Un socket viejo de un store caido impide hacer bind
+    if os.path.exists(address):
+        os.unlink(address)
+    manager = StoreManager(address=address, authkey=authkey.encode())
+    server = manager.get_server()
+    with open(_pid_path(address), "w") as pid_file:
+        pid_file.write(str(os.getpid()))
+    # SIGTERM corta serve_forever igual que Ctrl+C, asi se cierra el repositorio (flush del log)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        close = getattr(repository, "close", None)
+        if close is not None:
+            close()
+        for path in (address, _pid_path(address)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+def stop_store(address: str = SHARED_STORE_ADDRESS, timeout: float = 10) -> bool:
+    # Manda SIGTERM al store (que cierra su repositorio) y espera a que termine; False si no habia store
+    try:
+        with open(_pid_path(address)) as pid_file:
+            pid = int(pid_file.read())
+        os.kill(pid, signal.SIGTERM)
+    except (FileNotFoundError, ValueError, ProcessLookupError):
+        return False
+    deadline = time.monotonic() + timeout
+    while os.path.exists(_pid_path(address)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return True
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["stop"]:
+        sys.exit(0 if stop_store() else 1)
+    if getenv("REPOSITORY_BACKEND") == "shared":
+        # El proceso de store nunca puede ser cliente de si mismo
+        os.environ["REPOSITORY_BACKEND"] = SHARED_STORE_BACKEND
+    serve()
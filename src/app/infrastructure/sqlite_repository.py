@@ -0,0 +1,474 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from queue import Queue
+from typing import Collection, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from app.domain.exceptions import PrecondicionFallidaException
+from app.domain.models import Cambios, Lista, ListaResumen, ResultadoBusqueda, Tarea, TareaBorrada, TareaCambiada
+from app.infrastructure.repository import CHANGES_JOURNAL_SIZE, INDEXED_FIELDS
+from app.infrastructure.search import SEARCH_FIELDS, tokenize
+
+TASK_COLUMNS = ("id", "title", "description", "partner", "rol", "status", "progress", "priority", "assigned_to")
+_TASK_SELECT = f"SELECT seq, {', '.join(TASK_COLUMNS)} FROM tasks"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    list_id TEXT NOT NULL REFERENCES lists(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    partner TEXT NOT NULL,
+    rol TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    assigned_to TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_list ON tasks(list_id, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(list_id, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(list_id, priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to ON tasks(list_id, assigned_to);
+CREATE TABLE IF NOT EXISTS changes (
+    revision INTEGER NOT NULL,
+    list_id TEXT NOT NULL,
+    task_id TEXT,
+    deleted INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_changes_revision ON changes(revision);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    floor INTEGER NOT NULL
+);
+"""
+
+# El journal se recorta cada tantas filas escritas (no en cada escritura)
+JOURNAL_TRIM_EVERY = 1000
+# Ids por consulta al leer el estado actual de lo que cambio (limite de parametros de SQLite)
+_IN_CHUNK = 500
+
+# Busqueda de texto con FTS5 sobre la misma tabla tasks (external content), mantenido por triggers.
+# remove_diacritics ignora los acentos igual que search.normalize
+SEARCH_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    {', '.join(SEARCH_FIELDS)}, content='tasks', content_rowid='seq', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, {', '.join(SEARCH_FIELDS)})
+    VALUES (new.seq, {', '.join(f'new.{field}' for field in SEARCH_FIELDS)});
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, {', '.join(SEARCH_FIELDS)})
+    VALUES ('delete', old.seq, {', '.join(f'old.{field}' for field in SEARCH_FIELDS)});
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF {', '.join(SEARCH_FIELDS)} ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, {', '.join(SEARCH_FIELDS)})
+    VALUES ('delete', old.seq, {', '.join(f'old.{field}' for field in SEARCH_FIELDS)});
+    INSERT INTO tasks_fts (rowid, {', '.join(SEARCH_FIELDS)})
+    VALUES (new.seq, {', '.join(f'new.{field}' for field in SEARCH_FIELDS)});
+END;
+"""
+_SEARCH_WEIGHTS = ", ".join(str(weight) for weight in SEARCH_FIELDS.values())
+
+
+def _row_to_tarea(row) -> Tarea:
+    return Tarea(
+        id          = UUID(row[1]),
+        title       = row[2],
+        description = row[3],
+        partner     = row[4],
+        rol         = row[5],
+        status      = row[6],
+        progress    = row[7],
+        priority    = row[8],
+        assigned_to = row[9]
+    )
+
+def _tarea_params(tarea: Tarea) -> tuple:
+    return (
+        str(tarea.id), tarea.title, tarea.description, tarea.partner, tarea.rol,
+        tarea.status, tarea.progress, tarea.priority, tarea.assigned_to
+    )
+
+def _page(rows: list, limit: Optional[int]) -> Tuple[list, Optional[int]]:
+    # Se pide un registro de mas para saber si hay pagina siguiente
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, rows[-1][0]
+
+
+class SQLiteRepository:
+    # Misma interfaz que InMemoryRepository, persistida en SQLite (WAL) con un pool chico de conexiones
+    blocking = True
+
+    def __init__(self, path: str, pool_size: int = 4, journal_size: int = CHANGES_JOURNAL_SIZE):
+        self.path = path
+        self.journal_size = journal_size
+        self._journal_writes = 0
+        self._pool: Queue = Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            fts_exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'").fetchone()
+            conn.executescript(SEARCH_SCHEMA)
+            if not fts_exists:
+                # Bases creadas antes de la busqueda: se indexan las tareas existentes
+                conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+            if "revision" not in {row[1] for row in conn.execute("PRAGMA table_info(lists)")}:
+                # Bases creadas antes de que existieran las revisiones
+                conn.execute("ALTER TABLE lists ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            # Igual que en memoria, la revision global arranca desde el reloj
+            conn.execute("INSERT OR IGNORE INTO revision (id, value) VALUES (0, ?)", (time.time_ns() // 1000,))
+            # Con una base nueva (o de antes del journal) no hay cambios registrados antes de la revision actual
+            conn.execute("INSERT OR IGNORE INTO journal (id, floor) SELECT 0, value FROM revision")
+
+    def _connect(self) -> sqlite3.Connection:
+        # El modulo sqlite3 cachea los statements preparados por conexion (cached_statements)
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+
+    def _touch(
+        self, conn: sqlite3.Connection, list_id, deleted: bool = False, list_changed: bool = False,
+        task_ids: Collection[UUID] = (), tasks_deleted: bool = False,
+    ):
+        # Dentro de la transaccion de la mutacion: BEGIN IMMEDIATE serializa los incrementos (y el journal
+        # queda en orden de revision)
+        # Con RETURNING se consumen todas las filas para que el statement termine antes del COMMIT
+        (revision,), = conn.execute("UPDATE revision SET value = value + 1 RETURNING value").fetchall()
+        if not deleted:
+            conn.execute("UPDATE lists SET revision = ? WHERE id = ?", (revision, str(list_id)))
+        filas = [(revision, str(list_id), None, deleted)] if deleted or list_changed else []
+        filas += [(revision, str(list_id), str(task_id), tasks_deleted) for task_id in task_ids]
+        conn.executemany("INSERT INTO changes (revision, list_id, task_id, deleted) VALUES (?, ?, ?, ?)", filas)
+        self._journal_writes += len(filas)
+        if self._journal_writes >= JOURNAL_TRIM_EVERY:
+            self._journal_writes = 0
+            self._trim_journal(conn)
+
+    def _trim_journal(self, conn: sqlite3.Connection):
+        # Las filas se insertan en orden de revision: se borran las mas viejas y el piso pasa a ser la revision
+        # de la ultima borrada
+        (ultima,), = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM changes").fetchall()
+        corte = ultima - self.journal_size
+        row = conn.execute("SELECT revision FROM changes WHERE rowid <= ? ORDER BY rowid DESC LIMIT 1", (corte,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE journal SET floor = MAX(floor, ?)", (row[0],))
+            conn.execute("DELETE FROM changes WHERE rowid <= ?", (corte,))
+
+    def get_changes(self, since: int, list_id: Optional[UUID] = None) -> Cambios:
+        with self._connection() as conn:
+            # Una transaccion de lectura: revision, journal y estado salen del mismo snapshot
+            conn.execute("BEGIN")
+            try:
+                (revision,), = conn.execute("SELECT value FROM revision").fetchall()
+                (floor,), = conn.execute("SELECT floor FROM journal").fetchall()
+                if since < floor or since > revision:
+                    return Cambios(revision=revision, resync=True)
+                # Ultimo cambio de cada lista o tarea (SQLite toma las demas columnas de la fila con el MAX)
+                query = "SELECT list_id, task_id, deleted, MAX(revision) AS rev FROM changes WHERE revision > ?"
+                params: tuple = (since,)
+                if list_id is not None:
+                    query += " AND list_id = ?"
+                    params += (str(list_id),)
+                ultimos = conn.execute(f"{query} GROUP BY list_id, task_id ORDER BY rev", params).fetchall()
+
+                list_ids = [row[0] for row in ultimos if row[1] is None and not row[2]]
+                task_ids = [row[1] for row in ultimos if row[1] is not None and not row[2]]
+                listas: Dict[str, ListaResumen] = {}
+                for i in range(0, len(list_ids), _IN_CHUNK):
+                    chunk = list_ids[i:i + _IN_CHUNK]
+                    for id_, name, task_count in conn.execute(
+                        f"SELECT id, name, (SELECT COUNT(*) FROM tasks WHERE list_id = lists.id) FROM lists "
+                        f"WHERE id IN ({', '.join('?' * len(chunk))})", chunk,
+                    ):
+                        listas[id_] = ListaResumen(id=UUID(id_), name=name, task_count=task_count)
+                tareas: Dict[str, Tarea] = {}
+                for i in range(0, len(task_ids), _IN_CHUNK):
+                    chunk = task_ids[i:i + _IN_CHUNK]
+                    for row in conn.execute(f"{_TASK_SELECT} WHERE id IN ({', '.join('?' * len(chunk))})", chunk):
+                        tareas[row[1]] = _row_to_tarea(row)
+            finally:
+                conn.execute("COMMIT")
+
+        cambios = Cambios(revision=revision)
+        for list_id_, task_id, _, _ in ultimos:
+            if task_id is None:
+                if list_id_ in listas:
+                    cambios.lists.append(listas[list_id_])
+                else:
+                    cambios.deleted_lists.append(UUID(list_id_))
+            elif task_id in tareas:
+                cambios.tasks.append(TareaCambiada(list_id=UUID(list_id_), task=tareas[task_id]))
+            else:
+                cambios.deleted_tasks.append(TareaBorrada(list_id=UUID(list_id_), id=UUID(task_id)))
+        return cambios
+
+    def get_revision(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("SELECT value FROM revision").fetchone()[0]
+
+    def get_list_revision(self, list_id: UUID) -> Optional[int]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT revision FROM lists WHERE id = ?", (str(list_id),)).fetchone()
+        return row[0] if row else None
+
+    def get_stats(self) -> dict:
+        with self._connection() as conn:
+            (lists,), = conn.execute("SELECT COUNT(*) FROM lists").fetchall()
+            (tasks,), = conn.execute("SELECT COUNT(*) FROM tasks").fetchall()
+            try:
+                # dbstat (tamaño en disco de cada indice) depende de como se compilo SQLite
+                rows = conn.execute(
+                    "SELECT name, SUM(pgsize) FROM dbstat WHERE name LIKE 'idx_%' OR name LIKE 'tasks_fts%' GROUP BY name"
+                ).fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+        return {"lists": lists, "tasks": tasks, "index_bytes": dict(rows)}
+
+    def _task_revision(self, conn: sqlite3.Connection, task_id: UUID) -> Optional[int]:
+        # Revision de la lista que contiene la tarea
+        row = conn.execute(
+            "SELECT l.revision FROM tasks t JOIN lists l ON l.id = t.list_id WHERE t.id = ?", (str(task_id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _check_revision(self, revision: Optional[int], expected_revisions: Optional[Collection[int]]):
+        # Escritura condicional (If-Match): BEGIN IMMEDIATE ya tomo el lock de escritura, nadie cambia la fila
+        if revision is not None and expected_revisions is not None and revision not in expected_revisions:
+            raise PrecondicionFallidaException()
+
+    def _list_exists(self, conn: sqlite3.Connection, list_id: UUID) -> bool:
+        return conn.execute("SELECT 1 FROM lists WHERE id = ?", (str(list_id),)).fetchone() is not None
+
+    def _fetch_tasks(self, conn: sqlite3.Connection, list_id: UUID) -> List[Tarea]:
+        rows = conn.execute(f"{_TASK_SELECT} WHERE list_id = ? ORDER BY seq", (str(list_id),)).fetchall()
+        return [_row_to_tarea(row) for row in rows]
+
+    # LISTAS
+
+    def get_lists(self) -> List[Lista]:
+        listas, _ = self.page_lists()
+        return listas
+
+    def page_lists(self, after: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[Lista], Optional[int]]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, id, name FROM lists WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after or 0, -1 if limit is None else limit + 1),
+            ).fetchall()
+            rows, next_after = _page(rows, limit)
+            listas = [Lista(id=UUID(row[1]), name=row[2], tasks=self._fetch_tasks(conn, row[1])) for row in rows]
+        return listas, next_after
+
+    def page_list_summaries(
+        self, after: Optional[int] = None, limit: Optional[int] = None
+    ) -> Tuple[List[ListaResumen], Optional[int]]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT l.seq, l.id, l.name, (SELECT COUNT(*) FROM tasks t WHERE t.list_id = l.id) "
+                "FROM lists l WHERE l.seq > ? ORDER BY l.seq LIMIT ?",
+                (after or 0, -1 if limit is None else limit + 1),
+            ).fetchall()
+        rows, next_after = _page(rows, limit)
+        return [ListaResumen(id=UUID(row[1]), name=row[2], task_count=row[3]) for row in rows], next_after
+
+    def get_list(self, list_id: UUID) -> Optional[Lista]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT id, name FROM lists WHERE id = ?", (str(list_id),)).fetchone()
+            if row is None:
+                return None
+            return Lista(id=UUID(row[0]), name=row[1], tasks=self._fetch_tasks(conn, list_id))
+
+    def add_list(self, lista: Lista) -> Lista:
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO lists (id, name) VALUES (?, ?)", (str(lista.id), lista.name))
+            self._insert_tasks(conn, lista.id, lista.tasks or [])
+            self._touch(conn, lista.id, list_changed=True, task_ids=[tarea.id for tarea in lista.tasks or []])
+        return lista
+
+    def rename_list(
+        self, list_id: UUID, name: str, expected_revisions: Optional[Collection[int]] = None
+    ) -> Optional[Lista]:
+        with self._transaction() as conn:
+            if expected_revisions is not None:
+                row = conn.execute("SELECT revision FROM lists WHERE id = ?", (str(list_id),)).fetchone()
+                self._check_revision(row[0] if row else None, expected_revisions)
+            if conn.execute("UPDATE lists SET name = ? WHERE id = ?", (name, str(list_id))).rowcount == 0:
+                return None
+            self._touch(conn, list_id, list_changed=True)
+        return self.get_list(list_id)
+
+    def delete_list(self, list_id: UUID) -> bool:
+        with self._transaction() as conn:
+            if conn.execute("DELETE FROM lists WHERE id = ?", (str(list_id),)).rowcount == 0:
+                return False
+            self._touch(conn, list_id, deleted=True)
+            return True
+
+    # TAREAS
+
+    def get_tasks(self, list_id: UUID) -> Optional[List[Tarea]]:
+        with self._connection() as conn:
+            if not self._list_exists(conn, list_id):
+                return None
+            return self._fetch_tasks(conn, list_id)
+
+    def page_tasks(
+        self, list_id: UUID, after: Optional[int] = None, limit: Optional[int] = None
+    ) -> Optional[Tuple[List[Tarea], Optional[int]]]:
+        with self._connection() as conn:
+            if not self._list_exists(conn, list_id):
+                return None
+            rows = conn.execute(
+                f"{_TASK_SELECT} WHERE list_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (str(list_id), after or 0, -1 if limit is None else limit + 1),
+            ).fetchall()
+        rows, next_after = _page(rows, limit)
+        return [_row_to_tarea(row) for row in rows], next_after
+
+    def get_task(self, task_id: UUID) -> Optional[Tarea]:
+        with self._connection() as conn:
+            row = conn.execute(f"{_TASK_SELECT} WHERE id = ?", (str(task_id),)).fetchone()
+        return _row_to_tarea(row) if row else None
+
+    def get_task_list_id(self, task_id: UUID) -> Optional[UUID]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT list_id FROM tasks WHERE id = ?", (str(task_id),)).fetchone()
+        return UUID(row[0]) if row else None
+
+    def _insert_tasks(self, conn: sqlite3.Connection, list_id: UUID, tareas: List[Tarea]):
+        conn.executemany(
+            f"INSERT INTO tasks (list_id, {', '.join(TASK_COLUMNS)}) VALUES (?, {', '.join('?' * len(TASK_COLUMNS))})",
+            [(str(list_id),) + _tarea_params(tarea) for tarea in tareas],
+        )
+
+    def add_task(self, list_id: UUID, tarea: Tarea) -> Optional[Tarea]:
+        tareas = self.add_tasks(list_id, [tarea])
+        return tareas[0] if tareas is not None else None
+
+    def add_tasks(self, list_id: UUID, tareas: List[Tarea]) -> Optional[List[Tarea]]:
+        with self._transaction() as conn:
+            if not self._list_exists(conn, list_id):
+                return None
+            self._insert_tasks(conn, list_id, tareas)
+            self._touch(conn, list_id, task_ids=[tarea.id for tarea in tareas])
+        return tareas
+
+    def replace_task(self, tarea: Tarea, expected_revisions: Optional[Collection[int]] = None) -> Optional[Tarea]:
+        params = _tarea_params(tarea)
+        with self._transaction() as conn:
+            if expected_revisions is not None:
+                self._check_revision(self._task_revision(conn, tarea.id), expected_revisions)
+            rows = conn.execute(
+                "UPDATE tasks SET title = ?, description = ?, partner = ?, rol = ?, status = ?, "
+                "progress = ?, priority = ?, assigned_to = ? WHERE id = ? RETURNING list_id",
+                params[1:] + params[:1],
+            ).fetchall()
+            if not rows:
+                return None
+            self._touch(conn, rows[0][0], task_ids=(tarea.id,))
+        return tarea
+
+    def update_task_status(
+        self, task_id: UUID, status: str, expected_revisions: Optional[Collection[int]] = None
+    ) -> Optional[Tarea]:
+        with self._transaction() as conn:
+            if expected_revisions is not None:
+                self._check_revision(self._task_revision(conn, task_id), expected_revisions)
+            rows = conn.execute(
+                "UPDATE tasks SET status = ? WHERE id = ? RETURNING list_id", (status, str(task_id))
+            ).fetchall()
+            if not rows:
+                return None
+            self._touch(conn, rows[0][0], task_ids=(task_id,))
+            row = conn.execute(f"{_TASK_SELECT} WHERE id = ?", (str(task_id),)).fetchone()
+        return _row_to_tarea(row)
+
+    def delete_task(self, task_id: UUID) -> bool:
+        with self._transaction() as conn:
+            rows = conn.execute("DELETE FROM tasks WHERE id = ? RETURNING list_id", (str(task_id),)).fetchall()
+            if not rows:
+                return False
+            self._touch(conn, rows[0][0], task_ids=(task_id,), tasks_deleted=True)
+            return True
+
+    def count_tasks(self, list_id: UUID, status: Optional[str] = None) -> Optional[int]:
+        with self._connection() as conn:
+            if not self._list_exists(conn, list_id):
+                return None
+            if status is None:
+                return conn.execute("SELECT COUNT(*) FROM tasks WHERE list_id = ?", (str(list_id),)).fetchone()[0]
+            return conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE list_id = ? AND status = ?", (str(list_id), status)
+            ).fetchone()[0]
+
+    def filter_tasks(self, list_id: UUID, **filters: Optional[str]) -> Optional[List[Tarea]]:
+        filters = {field: value for field, value in filters.items() if value and field in INDEXED_FIELDS}
+        where = "".join(f" AND {field} = ?" for field in filters)
+        with self._connection() as conn:
+            if not self._list_exists(conn, list_id):
+                return None
+            rows = conn.execute(
+                f"{_TASK_SELECT} WHERE list_id = ?{where} ORDER BY seq", (str(list_id), *filters.values())
+            ).fetchall()
+        return [_row_to_tarea(row) for row in rows]
+
+    def search_tasks(
+        self, query: str, list_id: Optional[UUID] = None, limit: int = 20
+    ) -> Optional[List[ResultadoBusqueda]]:
+        # Mismo tokenizado que el indice en memoria; cada termino va entre comillas (AND implicito)
+        terms = dict.fromkeys(tokenize(query))
+        with self._connection() as conn:
+            if list_id is not None and not self._list_exists(conn, list_id):
+                return None
+            if not terms or limit <= 0:
+                return []
+            scope = "" if list_id is None else " AND t.list_id = ?"
+            rows = conn.execute(
+                f"SELECT t.seq, {', '.join(f't.{column}' for column in TASK_COLUMNS)}, t.list_id, "
+                f"-bm25(tasks_fts, {_SEARCH_WEIGHTS}) AS score "
+                f"FROM tasks_fts JOIN tasks t ON t.seq = tasks_fts.rowid "
+                f"WHERE tasks_fts MATCH ?{scope} ORDER BY score DESC, t.seq LIMIT ?",
+                (" ".join(f'"{term}"' for term in terms), *(() if list_id is None else (str(list_id),)), limit),
+            ).fetchall()
+        return [ResultadoBusqueda(list_id=UUID(row[10]), score=row[11], task=_row_to_tarea(row)) for row in rows]
@@ -1,9 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.routes import router, public_router
+from app.api.metrics import MetricsMiddleware
+from app.infrastructure.profiling import PROFILING_ENABLED, PROFILING_TOKEN
+from app.infrastructure.repository import repository
+from app.infrastructure.notifications import notifier
+from app.auth.password_pool import password_verifier
 
-app = FastAPI(title="Prueba tecnica backend")
 
-app.include_router(public_router)
-app.include_router(router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Se entregan las notificaciones pendientes antes de cerrar
+    notifier.close(timeout=5)
+    password_verifier.close()
+    # Los repositorios persistentes vacian sus buffers y cierran conexiones al apagar
+    close = getattr(repository, "close", None)
+    if close is not None:
+        close()
 
+app = FastAPI(title="Prueba tecnica backend", lifespan=lifespan)
+# Sin token no se habilita el perfilado: cualquiera podria pedirlo
+if PROFILING_ENABLED and PROFILING_TOKEN:
+    from app.api.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
+app.include_router(public_router)
+app.include_router(router)
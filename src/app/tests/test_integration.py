@@ -1,6 +1,16 @@
 from fastapi.testclient import TestClient
+from unittest.mock import patch
 from app.main import app
+from app.api import routes
+from app.api.profiling import ProfilingMiddleware
+from app.infrastructure.profiling import ProfileRing
+from app.api.metrics import REQUESTS_TOTAL, SERIALIZATION_SECONDS, repository_stats
+from app.auth.auth_handler import create_access_token
+from app.infrastructure.events import broker
 from app.domain.models import task_status, task_priority, task_progress
+import pstats
+import threading
+import time
 from uuid import UUID
 
 client = TestClient(app)
@@ -170,3 +180,342 @@ def test_get_list_completion_with_tasks():
     # Aquí asumimos que el estado "Aprobada" es el que cuenta como completado
     assert completion in ["50%", "0%"]  # Depende si el estado para completado es sólo "Aprobada"
 
+
+def test_get_lists_completion_batch():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Lista batch"}, headers=headers).json()["id"]
+    missing_id = "00000000-0000-0000-0000-000000000000"
+
+    response = client.post("/lists/completion", json={"list_ids": [list_id, missing_id]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["completion"] == {list_id: "0%", missing_id: None}
+
+def test_get_lists_paginado_y_resumen():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for i in range(3):
+        client.post("/list", json={"name": f"Lista paginada {i}"}, headers=headers)
+
+    vistos = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/lists", params=params, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        vistos.extend(l["id"] for l in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert vistos == [l["id"] for l in client.get("/lists", headers=headers).json()]
+
+    response = client.get("/lists", params={"summary": True}, headers=headers)
+    assert response.status_code == 200
+    assert all(set(l) == {"id", "name", "task_count"} for l in response.json())
+
+    response = client.get("/lists", params={"cursor": "%%%"}, headers=headers)
+    assert response.status_code == 400
+
+def test_export_streaming():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Lista exportada"}, headers=headers).json()["id"]
+
+    with client.stream("GET", "/export", params={"format": "ndjson"}, headers=headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert any(f'"id": "{list_id}"' in linea for linea in response.iter_lines())
+
+    response = client.get("/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    assert response.text.startswith("list_id,list_name,task_id")
+
+    response = client.get("/export", params={"format": "xml"}, headers=headers)
+    assert response.status_code == 400
+
+def test_importacion_en_streaming():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    origen = client.post("/list", json={"name": "Origen"}, headers=headers).json()["id"]
+    tarea = {"title": "Importable", "description": "Desc", "partner": "P", "rol": "R", "priority": task_priority[4]}
+    client.post(f"/tasks/{origen}/bulk", json=[tarea, {**tarea, "title": "Otra"}], headers=headers)
+    destino = client.post("/list", json={"name": "Destino"}, headers=headers).json()["id"]
+
+    # Lo exportado se puede volver a importar; el body se manda en pedazos
+    exportado = client.get("/export", params={"format": "csv"}, headers=headers).text
+    filas = [linea for linea in exportado.splitlines(keepends=True) if origen in linea]
+    cuerpo = (exportado.splitlines(keepends=True)[0] + "".join(filas) + "Mala,D,P,R\n").encode()
+    response = client.post(
+        f"/tasks/{destino}/import", params={"format": "csv"}, headers=headers,
+        content=(cuerpo[i:i + 16] for i in range(0, len(cuerpo), 16)),
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.headers["location"] == f"/imports/{job_id}"
+
+    estado = client.get(f"/imports/{job_id}", headers=headers).json()
+    for _ in range(50):
+        if estado["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+        estado = client.get(f"/imports/{job_id}", headers=headers).json()
+    assert (estado["status"], estado["rows"], estado["imported"], estado["failed"]) == ("done", 3, 2, 1)
+    assert estado["errors"][0]["line"] == 4
+    assert sorted(t["title"] for t in client.get(f"/tasks/{destino}", headers=headers).json()) == ["Importable", "Otra"]
+
+    assert client.post(f"/tasks/{destino}/import", params={"format": "xml"}, content=b"", headers=headers).status_code == 400
+    assert client.post(f"/tasks/{UUID(int=0)}/import", content=b"", headers=headers).status_code == 404
+    assert client.get(f"/imports/{UUID(int=0)}", headers=headers).status_code == 404
+
+def test_eventos_de_una_lista_por_sse():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Con eventos"}, headers=headers).json()["id"]
+    assert client.get(f"/events/{UUID(int=0)}", headers=headers).status_code == 404
+
+    def escribir():
+        # TestClient junta el body entero antes de devolverlo: se escribe recien cuando el stream ya esta suscripto
+        while broker.subscribers(UUID(list_id)) == 0:
+            time.sleep(0.01)
+        tarea = {"title": "En vivo", "description": "D", "partner": "P", "rol": "R"}
+        task_id = client.post(f"/tasks/{list_id}/", json=tarea, headers=headers).json()["id"]
+        client.patch(f"/tasks/status/{task_id}", json={"status": task_status[1]}, headers=headers)
+        client.delete(f"/tasks/{task_id}", headers=headers)
+        client.delete(f"/lists/{list_id}", headers=headers)
+
+    escritor = threading.Thread(target=escribir)
+    escritor.start()
+    # El stream termina solo cuando se borra la lista
+    with client.stream("GET", f"/events/{list_id}", headers=headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        lineas = list(response.iter_lines())
+    escritor.join()
+    assert lineas[0].startswith("retry:")
+    eventos = [linea[len("event: "):] for linea in lineas if linea.startswith("event: ")]
+    assert eventos == ["task.created", "task.updated", "task.deleted", "list.deleted"]
+
+def test_sincronizacion_incremental():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Descarga completa: el ETag de /lists es la revision desde la que se piden los cambios
+    since = int(client.get("/lists", headers=headers).headers["etag"].strip('"'))
+    list_id = client.post("/list", json={"name": "Sincronizada"}, headers=headers).json()["id"]
+    tarea = {"title": "Nueva", "description": "D", "partner": "P", "rol": "R"}
+    task_id = client.post(f"/tasks/{list_id}/", json=tarea, headers=headers).json()["id"]
+    borrada = client.post(f"/tasks/{list_id}/", json=tarea, headers=headers).json()["id"]
+    client.delete(f"/tasks/{borrada}", headers=headers)
+
+    cambios = client.get("/changes", params={"since": since}, headers=headers).json()
+    assert cambios["resync"] is False
+    assert [lista["name"] for lista in cambios["lists"]] == ["Sincronizada"]
+    assert [c["task"]["id"] for c in cambios["tasks"]] == [task_id]
+    assert cambios["deleted_tasks"] == [{"list_id": list_id, "id": borrada}]
+
+    client.delete(f"/lists/{list_id}", headers=headers)
+    cambios = client.get("/changes", params={"since": cambios["revision"], "list_id": list_id}, headers=headers).json()
+    assert cambios["deleted_lists"] == [list_id]
+    assert client.get("/changes", params={"since": 0}, headers=headers).json()["resync"] is True
+
+def test_tareas_en_lote():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Lista lote"}, headers=headers).json()["id"]
+    tarea = {
+        "title": "Tarea lote", "description": "Desc", "partner": "P", "rol": "R",
+        "status": task_status[0], "progress": task_progress[0], "priority": task_priority[0]
+    }
+
+    response = client.post(f"/tasks/{list_id}/bulk", json=[tarea, {**tarea, "priority": "X"}], headers=headers)
+    assert response.status_code == 200
+    resultados = response.json()
+    assert [r["ok"] for r in resultados] == [True, False]
+    task_id = resultados[0]["id"]
+
+    response = client.put("/tasks/bulk", json=[{**tarea, "id": task_id, "title": "Editada"}], headers=headers)
+    assert response.json()[0]["task"]["title"] == "Editada"
+
+    response = client.patch("/tasks/status/bulk", json=[{"id": task_id, "status": task_status[1]}], headers=headers)
+    assert response.json()[0]["task"]["status"] == task_status[1]
+
+    response = client.request("DELETE", "/tasks/bulk", json=[task_id], headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["ok"] is True
+    assert client.get(f"/tasks/{list_id}", headers=headers).json() == []
+
+def test_token_invalido_y_sin_username():
+    response = client.get("/lists", headers={"Authorization": "Bearer no.es.un.jwt"})
+    assert response.status_code == 401
+
+    # Token valido pero sin username: pasa el router pero no resuelve usuario
+    token = create_access_token({"email": "admin@example.com"})
+    list_id = client.post("/list", json={"name": "Lista"}, headers={"Authorization": f"Bearer {get_auth_token()}"}).json()["id"]
+    response = client.post(
+        f"/tasks/{list_id}/",
+        json={"title": "T", "description": "D", "partner": "P", "rol": "R"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 401
+
+def test_lecturas_cacheadas_hasta_que_cambia_la_revision():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Lista cacheada"}, headers=headers).json()["id"]
+    tarea = {"title": "T", "description": "D", "partner": "P", "rol": "R"}
+    client.post(f"/tasks/{list_id}/", json=tarea, headers=headers)
+
+    with patch.object(routes, "get_tasks_page", wraps=routes.get_tasks_page) as get_tasks_page:
+        primera = client.get(f"/tasks/{list_id}", headers=headers)
+        segunda = client.get(f"/tasks/{list_id}", headers=headers)
+        assert primera.content == segunda.content
+        assert get_tasks_page.call_count == 1
+
+        task_id = primera.json()[0]["id"]
+        client.patch(f"/tasks/status/{task_id}", json={"status": task_status[1]}, headers=headers)
+        tercera = client.get(f"/tasks/{list_id}", headers=headers)
+        assert tercera.json()[0]["status"] == task_status[1]
+        assert get_tasks_page.call_count == 2
+
+    with patch.object(routes, "get_lists_page", wraps=routes.get_lists_page) as get_lists_page:
+        client.get("/lists", params={"summary": True}, headers=headers)
+        resumen = client.get("/lists", params={"summary": True}, headers=headers).json()
+        assert get_lists_page.call_count == 1
+        client.put(f"/lists/{list_id}", json={"name": "Lista renombrada"}, headers=headers)
+        resumen = client.get("/lists", params={"summary": True}, headers=headers).json()
+        assert get_lists_page.call_count == 2
+        assert {"id": list_id, "name": "Lista renombrada", "task_count": 1} in resumen
+
+    assert client.get("/tasks/00000000-0000-0000-0000-000000000000", headers=headers).status_code == 404
+
+def test_etags_y_escrituras_condicionales():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Lista etag"}, headers=headers).json()["id"]
+    tarea = {"title": "T", "description": "D", "partner": "P", "rol": "R"}
+    task_id = client.post(f"/tasks/{list_id}/", json=tarea, headers=headers).json()["id"]
+
+    for url in ("/lists", f"/tasks/{list_id}", f"/lists/completion/{list_id}"):
+        response = client.get(url, headers=headers)
+        etag = response.headers["ETag"]
+        response = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    etag = client.get(f"/tasks/{list_id}", headers=headers).headers["ETag"]
+    response = client.patch(f"/tasks/status/{task_id}", json={"status": task_status[1]}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+
+    # Con el ETag viejo la escritura se rechaza y los datos no cambian
+    response = client.put(f"/tasks/{task_id}", json={**tarea, "title": "Pisada"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = client.put(f"/lists/{list_id}", json={"name": "Pisada"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = client.get(f"/tasks/{list_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "T"
+
+    nuevo = response.headers["ETag"]
+    assert nuevo != etag
+    response = client.put(f"/lists/{list_id}", json={"name": "Lista etag bis"}, headers={**headers, "If-Match": nuevo})
+    assert response.status_code == 200
+
+def test_busqueda_de_tareas():
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    list_id = client.post("/list", json={"name": "Lista busqueda"}, headers=headers).json()["id"]
+    tarea = {"title": "Facturación mensual", "description": "Enviar facturas", "partner": "P", "rol": "R"}
+    task_id = client.post(f"/tasks/{list_id}/", json=tarea, headers=headers).json()["id"]
+
+    response = client.get("/tasks/search", params={"q": "facturacion", "list_id": list_id}, headers=headers)
+    assert response.status_code == 200
+    resultados = response.json()
+    assert [r["task"]["id"] for r in resultados] == [task_id]
+    assert resultados[0]["list_id"] == list_id
+
+    response = client.get("/tasks/search", params={"q": "facturacion", "list_id": "00000000-0000-0000-0000-000000000000"}, headers=headers)
+    assert response.status_code == 404
+    assert client.get("/tasks/search", headers=headers).status_code == 422
+
+def test_login_verifica_password():
+    response = client.post("/login", data={"username": "admin", "password": "incorrecta"})
+    assert response.status_code == 401
+    response = client.post("/login", data={"username": "nadie", "password": "admin"})
+    assert response.status_code == 401
+
+def test_metrics_prometheus():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    list_id = client.post("/list", json={"name": "Lista metricas"}, headers=headers).json()["id"]
+    antes = REQUESTS_TOTAL.value("GET", "/tasks/{list_id}", "200")
+    serializadas = SERIALIZATION_SECONDS.count("GET", "/tasks/{list_id}")
+
+    assert client.get(f"/tasks/{list_id}", headers=headers).status_code == 200
+    assert client.get("/ruta/inexistente").status_code == 404
+    # Las rutas se agrupan por plantilla, no por URL
+    assert REQUESTS_TOTAL.value("GET", "/tasks/{list_id}", "200") == antes + 1
+    assert SERIALIZATION_SECONDS.count("GET", "/tasks/{list_id}") == serializadas + 1
+
+    repository_stats.update({})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texto = response.text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in texto
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/tasks/{list_id}",le="+Inf"}' in texto
+    assert 'app_use_case_duration_seconds_count{use_case="get_tasks_page"}' in texto
+    assert 'app_jwt_verify_duration_seconds_count{cache="hit"}' in texto
+    assert 'app_threadpool_tasks{state="waiting"}' in texto
+    # Las estadisticas del repositorio se recalculan solo cuando vence el TTL
+    with patch.object(repository_stats, "stale", return_value=True):
+        texto = client.get("/metrics").text
+    assert "app_repository_lists " in texto and "app_repository_tasks " in texto
+
+def test_profiling_por_header(tmp_path):
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    list_id = client.post("/list", json={"name": "Lista perfilada"}, headers=headers).json()["id"]
+    ring = ProfileRing(str(tmp_path), max_files=2)
+    perfilado = TestClient(ProfilingMiddleware(app, token="secreto", sample_rate=1.0, ring=ring))
+
+    # Sin header o con un token incorrecto no se perfila
+    assert "x-profile-id" not in perfilado.get(f"/tasks/filter/{list_id}", headers=headers).headers
+    response = perfilado.get(f"/tasks/filter/{list_id}", headers={**headers, "X-Profile": "otro"})
+    assert "x-profile-id" not in response.headers
+    assert ring.files() == []
+
+    response = perfilado.get(f"/tasks/filter/{list_id}", headers={**headers, "X-Profile": "secreto"})
+    assert response.status_code == 200
+    archivo, = ring.files()
+    assert archivo.name.startswith(response.headers["x-profile-id"])
+    assert "-GET-tasks_filter_list_id-200.prof" in archivo.name
+    # El perfil cubre la dependencia de autenticacion, el caso de uso y la serializacion
+    funciones = {name for _, _, name in pstats.Stats(str(archivo)).stats}
+    assert {"verify_jwt", "filter_tasks", "serialize_response"} <= funciones
+
+    # Anillo acotado: se conservan los ultimos max_files perfiles
+    for _ in range(3):
+        perfilado.get("/", headers={"X-Profile": "secreto"})
+    assert len(ring.files()) == 2 and len(list(tmp_path.glob("*.prof"))) == 2
+    assert archivo not in ring.files()
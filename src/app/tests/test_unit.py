@@ -1,13 +1,50 @@
+import asyncio
+import csv
+import io
+import json
+import os
 import pytest
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch
 from uuid import uuid4
-from app.application import use_cases
-from app.domain.models import ListaCreate, TareaCreate, User, task_status, task_progress, task_priority
+from app.application import async_use_cases, use_cases
+from app.auth import auth_bearer
+from app.auth.auth_bearer import JWTBearer, TokenCache
+from app.benchmarks.datasets import Profile, load_workspace
+from app.benchmarks.micro import run_micro
+from app.benchmarks.report import Stats, find_regressions
+from app.api.etags import etag_matches, expected_revisions
+from app.api.response_cache import ResponseCache
+from app.auth.auth_handler import create_access_token, get_password_hash, verify_password
+from app.auth.password_pool import PasswordVerifier
+from app.infrastructure.repository import InMemoryRepository, TareaRecord
+from app.infrastructure.sqlite_repository import SQLiteRepository
+from app.infrastructure.shared_repository import SharedRepository, stop_store
+from app.infrastructure.oplog_repository import OpLogRepository
+from app.infrastructure.notifications import FileSink, Notificacion, NotificationDispatcher
+from app.infrastructure.search import SearchIndex
+from app.infrastructure.metrics import Registry
+from app.infrastructure.import_jobs import ImportJob, iter_lines
+from app.infrastructure.events import EventBroker, RETRY
+from app.domain.models import (
+    Lista, ListaCreate, Tarea, TareaCreate, TareaBulkUpdate, TareaEstadoBulk, User, UserCreate, task_status, task_progress, task_priority
+)
 from app.domain.exceptions import (
     EstadoInvalidoException,
     ProgresoInvalidoException,
     PrioridadInvalidaException,
     ListaNoEncontradaException,
-    TareaNoEncontradaException
+    TareaNoEncontradaException,
+    CursorInvalidoException,
+    FormatoInvalidoException,
+    PrecondicionFallidaException,
+    LoginSaturadoException,
+    UsuarioNoEncontradoException
 )
 
 current_user = User(
@@ -17,10 +54,11 @@ current_user = User(
 )
 
 def test_create_list():
-    initial_count = len(use_cases.fake_db)
+    initial_count = len(use_cases.repository.get_lists())
     lista = use_cases.create_list(ListaCreate(name="Test Lista"))
     assert lista.name == "Test Lista"
-    assert len(use_cases.fake_db) == initial_count + 1
+    assert len(use_cases.repository.get_lists()) == initial_count + 1
+    assert use_cases.repository.get_list(lista.id).name == "Test Lista"
 
 def test_get_lists():
     listas = use_cases.get_lists()
@@ -79,7 +117,7 @@ def test_get_list_completion_with_tasks():
     use_cases.create_task(lista.id, tarea_data_2, current_user)
 
     # Debug print
-    for tarea in lista.tasks:
+    for tarea in use_cases.get_tasks(lista.id):
         print(f"Tarea: {tarea.title}, Status: {tarea.status}")
 
     porcentaje = use_cases.get_list_completion(lista.id)
@@ -244,3 +282,1008 @@ def test_filter_tasks_list_no_encontrada():
     with pytest.raises(ListaNoEncontradaException):
         use_cases.filter_tasks(uuid4())
 
+
+
+def test_delete_list_removes_task_index():
+    lista = use_cases.create_list(ListaCreate(name="Lista con indice"))
+    tarea_data = TareaCreate(
+        title="T1", description="Desc", partner="P", rol="R",
+        status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+    )
+    tarea = use_cases.create_task(lista.id, tarea_data, current_user)
+    assert use_cases.repository.get_task(tarea.id) == tarea
+
+    use_cases.delete_list(lista.id)
+    assert use_cases.repository.get_task(tarea.id) is None
+    with pytest.raises(TareaNoEncontradaException):
+        use_cases.update_task_status(tarea.id, task_status[1])
+
+def test_filter_tasks_combinado_usa_indices():
+    lista = use_cases.create_list(ListaCreate(name="Lista indices"))
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0])
+    t1 = use_cases.create_task(lista.id, TareaCreate(title="T1", status=task_status[0], priority=task_priority[0], **base), current_user)
+    t2 = use_cases.create_task(lista.id, TareaCreate(title="T2", status=task_status[0], priority=task_priority[1], **base), current_user)
+    t3 = use_cases.create_task(lista.id, TareaCreate(title="T3", status=task_status[1], priority=task_priority[0], **base), current_user)
+
+    assert use_cases.filter_tasks(lista.id, status=task_status[0], priority=task_priority[0]) == [t1]
+    assert use_cases.filter_tasks(lista.id, assigned_to="admin", priority=task_priority[0]) == [t1, t3]
+    assert use_cases.filter_tasks(lista.id, assigned_to="otro") == []
+
+    # Los indices se mantienen al cambiar estado, actualizar y borrar
+    use_cases.update_task_status(t3.id, task_status[0])
+    filtradas = use_cases.filter_tasks(lista.id, status=task_status[0], priority=task_priority[0])
+    assert [t.id for t in filtradas] == [t1.id, t3.id]
+
+    use_cases.update_task(t1.id, TareaCreate(title="T1", status=task_status[2], priority=task_priority[0], **base), current_user)
+    assert [t.id for t in use_cases.filter_tasks(lista.id, status=task_status[0])] == [t2.id, t3.id]
+
+    use_cases.delete_task(t2.id)
+    assert [t.id for t in use_cases.filter_tasks(lista.id, status=task_status[0])] == [t3.id]
+    assert use_cases.filter_tasks(lista.id, priority=task_priority[1]) == []
+
+def test_get_list_completion_contadores():
+    lista = use_cases.create_list(ListaCreate(name="Contadores"))
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0], priority=task_priority[0])
+    t1 = use_cases.create_task(lista.id, TareaCreate(title="T1", status=task_status[0], **base), current_user)
+    t2 = use_cases.create_task(lista.id, TareaCreate(title="T2", status=task_status[1], **base), current_user)
+    assert use_cases.get_list_completion(lista.id) == "50%"
+
+    use_cases.update_task_status(t2.id, task_status[0])
+    assert use_cases.get_list_completion(lista.id) == "100%"
+
+    use_cases.update_task(t1.id, TareaCreate(title="T1", status=task_status[3], **base), current_user)
+    assert use_cases.get_list_completion(lista.id) == "50%"
+
+    use_cases.delete_task(t2.id)
+    assert use_cases.get_list_completion(lista.id) == "0%"
+
+def test_get_lists_completion_batch():
+    lista = use_cases.create_list(ListaCreate(name="Batch"))
+    otra = use_cases.create_list(ListaCreate(name="Batch vacía"))
+    tarea_data = TareaCreate(
+        title="T1", description="Desc", partner="P", rol="R",
+        status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+    )
+    use_cases.create_task(lista.id, tarea_data, current_user)
+    inexistente = uuid4()
+
+    completions = use_cases.get_lists_completion([lista.id, otra.id, inexistente])
+    assert completions == {lista.id: "100%", otra.id: "0%", inexistente: None}
+
+def test_get_tasks_page_cursor_estable():
+    lista = use_cases.create_list(ListaCreate(name="Paginada"))
+    tareas = [
+        use_cases.create_task(lista.id, TareaCreate(
+            title=f"T{i}", description="Desc", partner="P", rol="R",
+            status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+        ), current_user)
+        for i in range(5)
+    ]
+
+    pagina, cursor = use_cases.get_tasks_page(lista.id, limit=2)
+    assert pagina == tareas[:2]
+
+    # Borrar un item ya entregado no corre la pagina siguiente
+    use_cases.delete_task(tareas[0].id)
+    pagina, cursor = use_cases.get_tasks_page(lista.id, limit=2, cursor=cursor)
+    assert pagina == tareas[2:4]
+
+    pagina, cursor = use_cases.get_tasks_page(lista.id, limit=2, cursor=cursor)
+    assert pagina == tareas[4:]
+    assert cursor is None
+
+    with pytest.raises(CursorInvalidoException):
+        use_cases.get_tasks_page(lista.id, limit=2, cursor="no-es-un-cursor")
+
+def test_get_lists_page_summary():
+    lista = use_cases.create_list(ListaCreate(name="Resumen"))
+    use_cases.create_task(lista.id, TareaCreate(
+        title="T1", description="Desc", partner="P", rol="R",
+        status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+    ), current_user)
+
+    resumenes, cursor = use_cases.get_lists_page(summary=True)
+    assert cursor is None
+    resumen = next(r for r in resumenes if r.id == lista.id)
+    assert resumen.name == "Resumen"
+    assert resumen.task_count == 1
+
+def filas_por_lista(filas, list_id):
+    return [f for f in filas[1:] if f[0] == str(list_id)]
+
+def test_export_workspace_ndjson_y_csv():
+    lista = use_cases.create_list(ListaCreate(name="Exportada"))
+    tarea = use_cases.create_task(lista.id, TareaCreate(
+        title="Tarea, con coma", description="Desc", partner="P", rol="R",
+        status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+    ), current_user)
+    vacia = use_cases.create_list(ListaCreate(name="Exportada vacía"))
+
+    lineas = [json.loads(l) for l in use_cases.export_workspace("ndjson")]
+    assert {"type": "list", "id": str(lista.id), "name": "Exportada"} in lineas
+    fila_tarea = next(l for l in lineas if l.get("id") == str(tarea.id))
+    assert fila_tarea["type"] == "task" and fila_tarea["list_id"] == str(lista.id)
+
+    filas = list(csv.reader(io.StringIO("".join(use_cases.export_workspace("csv")))))
+    assert filas[0] == use_cases.EXPORT_CSV_COLUMNS
+    assert [str(lista.id), "Exportada", str(tarea.id), "Tarea, con coma"] == filas_por_lista(filas, lista.id)[0][:4]
+    assert filas_por_lista(filas, vacia.id)[0][2] == ""
+
+    with pytest.raises(FormatoInvalidoException):
+        use_cases.export_workspace("xml")
+
+def test_tareas_en_lote():
+    lista = use_cases.create_list(ListaCreate(name="Lote"))
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0], priority=task_priority[0])
+
+    resultados = use_cases.create_tasks(lista.id, [
+        TareaCreate(title="T1", status=task_status[0], **base),
+        TareaCreate(title="T2", status="Estado inválido", **base),
+        TareaCreate(title="T3", status=task_status[1], assigned_to="no_existe", **base),
+        TareaCreate(title="T4", status=task_status[1], assigned_to="admin", **base),
+    ], current_user)
+    assert [r.ok for r in resultados] == [True, False, False, True]
+    assert resultados[1].error == "Estado inválido."
+    assert resultados[2].error == "Usuario no encontrado"
+    assert [t.title for t in use_cases.get_tasks(lista.id)] == ["T1", "T4"]
+    t1, t4 = resultados[0].task, resultados[3].task
+
+    revision = use_cases.get_list_revision(lista.id)
+    resultados = use_cases.create_tasks(lista.id, [TareaCreate(title="T5", status="Estado inválido", **base)], current_user)
+    assert [r.ok for r in resultados] == [False]
+    assert use_cases.get_list_revision(lista.id) == revision
+
+    resultados = use_cases.update_tasks([
+        TareaBulkUpdate(id=t1.id, title="T1 bis", status=task_status[0], **base),
+        TareaBulkUpdate(id=uuid4(), title="X", status=task_status[0], **base),
+    ], current_user)
+    assert [r.ok for r in resultados] == [True, False]
+    assert use_cases.repository.get_task(t1.id).title == "T1 bis"
+
+    resultados = use_cases.update_tasks_status([
+        TareaEstadoBulk(id=t4.id, status=task_status[0]),
+        TareaEstadoBulk(id=t1.id, status="estado_invalido"),
+    ])
+    assert [r.ok for r in resultados] == [True, False]
+    assert use_cases.get_list_completion(lista.id) == "100%"
+
+    resultados = use_cases.delete_tasks([t1.id, t1.id])
+    assert [r.ok for r in resultados] == [True, False]
+    assert use_cases.get_tasks(lista.id) == [use_cases.repository.get_task(t4.id)]
+
+    with pytest.raises(ListaNoEncontradaException):
+        use_cases.create_tasks(uuid4(), [TareaCreate(title="T", status=task_status[0], **base)])
+
+def test_token_cache_lru_y_vencimiento():
+    cache = TokenCache(maxsize=2)
+    futuro = time.time() + 60
+    cache.set("a", {"username": "admin", "exp": futuro})
+    cache.set("b", {"username": "admin", "exp": futuro})
+    assert cache.get("a")["username"] == "admin"
+
+    # "b" es el menos usado y se descarta al superar el tamaño
+    cache.set("c", {"username": "admin", "exp": futuro})
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    cache.set("vencido", {"username": "admin", "exp": time.time() - 1})
+    assert cache.get("vencido") is None
+    cache.set("sin_exp", {"username": "admin"})
+    assert cache.get("sin_exp") is None
+
+def test_jwt_bearer_decodifica_una_vez():
+    bearer = JWTBearer(cache=TokenCache())
+    token = create_access_token({"username": "admin"})
+    with patch("app.auth.auth_bearer.jwt.decode", wraps=auth_bearer.jwt.decode) as decode:
+        assert bearer.verify_jwt(token)["username"] == "admin"
+        assert bearer.verify_jwt(token)["username"] == "admin"
+    assert decode.call_count == 1
+
+def test_sqlite_repository_casos_de_uso(tmp_path, monkeypatch):
+    repo = SQLiteRepository(str(tmp_path / "tareas.db"), pool_size=2)
+    monkeypatch.setattr(use_cases, "repository", repo)
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0])
+
+    lista = use_cases.create_list(ListaCreate(name="SQLite"))
+    t1 = use_cases.create_task(lista.id, TareaCreate(title="T1", status=task_status[0], priority=task_priority[0], **base), current_user)
+    resultados = use_cases.create_tasks(lista.id, [
+        TareaCreate(title="T2", status=task_status[1], priority=task_priority[1], **base),
+        TareaCreate(title="T3", status=task_status[1], priority=task_priority[0], **base),
+    ], current_user)
+    t2, t3 = resultados[0].task, resultados[1].task
+
+    assert use_cases.update_list(lista.id, ListaCreate(name="SQLite bis")).name == "SQLite bis"
+    assert use_cases.get_tasks(lista.id) == [t1, t2, t3]
+    assert use_cases.filter_tasks(lista.id, status=task_status[1], priority=task_priority[0]) == [t3]
+    assert use_cases.get_list_completion(lista.id) == "33%"
+
+    pagina, cursor = use_cases.get_tasks_page(lista.id, limit=2)
+    assert pagina == [t1, t2]
+    assert use_cases.get_tasks_page(lista.id, limit=2, cursor=cursor) == ([t3], None)
+
+    assert use_cases.update_task_status(t2.id, task_status[0]).status == task_status[0]
+    assert use_cases.update_task(t3.id, TareaCreate(title="T3 bis", status=task_status[1], priority=task_priority[0], **base), current_user).title == "T3 bis"
+    use_cases.delete_task(t1.id)
+    with pytest.raises(TareaNoEncontradaException):
+        use_cases.delete_task(t1.id)
+
+    # Los datos sobreviven a reabrir la base
+    repo.close()
+    repo = SQLiteRepository(str(tmp_path / "tareas.db"), pool_size=1)
+    resumen = repo.page_list_summaries()[0][0]
+    assert (resumen.name, resumen.task_count) == ("SQLite bis", 2)
+    assert repo.get_task(t3.id).title == "T3 bis"
+
+    assert repo.delete_list(lista.id)
+    assert repo.get_task(t2.id) is None
+    repo.close()
+
+def test_oplog_repository_recupera_tras_reinicio(tmp_path):
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0], priority=task_priority[0])
+    repo = OpLogRepository(str(tmp_path), snapshot_every=3)
+    lista = Lista(name="Durable")
+    repo.add_list(lista)
+    t1 = Tarea(title="T1", status=task_status[0], **base)
+    t2 = Tarea(title="T2", status=task_status[0], **base)
+    t3 = Tarea(title="T3", status=task_status[0], **base)
+    repo.add_tasks(lista.id, [t1, t2])
+    repo.update_task_status(t1.id, task_status[1])  # dispara un snapshot
+    repo.add_task(lista.id, t3)
+    repo.delete_task(t2.id)
+    repo.rename_list(lista.id, "Durable bis")
+    repo.close()
+
+    assert len(list(tmp_path.glob("snapshot-*.ndjson"))) == 1
+
+    # Se carga el snapshot y se reproduce solo el log posterior
+    repo = OpLogRepository(str(tmp_path), snapshot_every=100)
+    assert repo.get_list(lista.id).name == "Durable bis"
+    assert [t.id for t in repo.get_tasks(lista.id)] == [t1.id, t3.id]
+    assert repo.get_task(t1.id).status == task_status[1]
+    assert repo.count_tasks(lista.id, status=task_status[1]) == 1
+
+    repo.snapshot(wait=True)
+    repo.delete_list(lista.id)
+    repo.close()
+    assert OpLogRepository(str(tmp_path)).get_list(lista.id) is None
+
+def test_oplog_repository_ignora_linea_cortada(tmp_path):
+    repo = OpLogRepository(str(tmp_path), sync=True)
+    lista = Lista(name="Con caida")
+    repo.add_list(lista)
+    repo.close()
+
+    segmento = next(tmp_path.glob("oplog-*.log"))
+    with open(segmento, "ab") as f:
+        f.write(b'{"lsn": 2, "op": "delete_li')
+
+    repo = OpLogRepository(str(tmp_path))
+    assert repo.get_list(lista.id).name == "Con caida"
+    repo.close()
+
+def test_oplog_repository_recorta_primera_linea_cortada(tmp_path):
+    # Caida en la primera escritura: el segmento queda con solo una linea a medias
+    (tmp_path / "oplog-00000000000000000001.log").write_bytes(b'{"lsn":1,"op":"add_li')
+    repo = OpLogRepository(str(tmp_path), sync=True)
+    primera, segunda = Lista(name="Primera"), Lista(name="Segunda")
+    repo.add_list(primera)
+    repo.add_list(segunda)
+    repo.close()
+
+    repo = OpLogRepository(str(tmp_path), sync=True)
+    assert [lista.name for lista in repo.get_lists()] == ["Primera", "Segunda"]
+    tercera = Lista(name="Tercera")
+    repo.add_list(tercera)
+    repo.close()
+
+    repo = OpLogRepository(str(tmp_path))
+    assert [lista.name for lista in repo.get_lists()] == ["Primera", "Segunda", "Tercera"]
+    repo.close()
+
+def test_oplog_append_no_espera_al_fsync(tmp_path, monkeypatch):
+    from app.infrastructure import oplog_repository
+    en_fsync, seguir = threading.Event(), threading.Event()
+    fsync = os.fsync
+
+    def fsync_lento(fd):
+        en_fsync.set()
+        seguir.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(oplog_repository.os, "fsync", fsync_lento)
+    log = oplog_repository.OperationLog(tmp_path, 1, flush_interval=0.01)
+    log.append({"op": "a"})
+    assert en_fsync.wait(5)
+    # Con el fsync en curso se puede seguir agregando: va al proximo lote
+    inicio = time.perf_counter()
+    assert log.append({"op": "b"}) == 2
+    assert time.perf_counter() - inicio < 1
+    seguir.set()
+    log.close()
+    lineas = next(tmp_path.glob("oplog-*.log")).read_bytes().splitlines()
+    assert [json.loads(linea)["lsn"] for linea in lineas] == [1, 2]
+
+def test_async_use_cases_en_el_event_loop(monkeypatch):
+    hilos = []
+    crear_lista = use_cases.create_list
+    monkeypatch.setattr(use_cases, "create_list", lambda data: hilos.append(threading.get_ident()) or crear_lista(data))
+
+    async def crear():
+        hilos.append(threading.get_ident())
+        return await async_use_cases.create_list(ListaCreate(name="Async"))
+
+    # Repositorio en memoria: el caso de uso corre en el mismo hilo que el event loop
+    lista = asyncio.run(crear())
+    assert hilos[0] == hilos[1]
+    assert use_cases.get_tasks(lista.id) == []
+
+    # Repositorio bloqueante: se despacha al threadpool
+    hilos.clear()
+    monkeypatch.setattr(use_cases.repository, "blocking", True)
+    asyncio.run(crear())
+    assert hilos[0] != hilos[1]
+
+def test_repositorio_escrituras_concurrentes():
+    repo = InMemoryRepository()
+    listas = [Lista(name=f"Concurrente {i}") for i in range(4)]
+    for lista in listas:
+        repo.add_list(lista)
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0], priority=task_priority[0])
+
+    def escritor(lista):
+        for i in range(200):
+            tarea = Tarea(title=f"T{i}", status=task_status[0], **base)
+            repo.add_task(lista.id, tarea)
+            repo.update_task_status(tarea.id, task_status[1])
+            if i % 2:
+                repo.delete_task(tarea.id)
+
+    lecturas = []
+    def lector():
+        for _ in range(200):
+            for lista in listas:
+                tareas = repo.get_tasks(lista.id)
+                # Cada lectura es un snapshot consistente: ids unicos y en orden de alta
+                lecturas.append(len(tareas) == len({t.id for t in tareas}))
+
+    hilos = [threading.Thread(target=escritor, args=(lista,)) for lista in listas] + [threading.Thread(target=lector)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert all(lecturas)
+    for lista in listas:
+        assert repo.count_tasks(lista.id) == 100
+        assert repo.count_tasks(lista.id, status=task_status[1]) == 100
+        assert [t.title for t in repo.get_tasks(lista.id)] == [f"T{i}" for i in range(0, 200, 2)]
+
+def test_snapshot_de_lectura_no_cambia_con_escrituras():
+    repo = InMemoryRepository()
+    lista = Lista(name="Snapshot")
+    repo.add_list(lista)
+    tarea = Tarea(title="T", description="D", partner="P", rol="R",
+                  status=task_status[0], progress=task_progress[0], priority=task_priority[0])
+    repo.add_task(lista.id, tarea)
+
+    leidas = repo.get_tasks(lista.id)
+    repo.update_task_status(tarea.id, task_status[1])
+    repo.delete_task(tarea.id)
+    assert leidas[0].status == task_status[0]
+    assert repo.get_tasks(lista.id) == []
+
+def test_shared_repository_entre_procesos(tmp_path):
+    address = str(tmp_path / "store.sock")
+    store = subprocess.Popen(
+        [sys.executable, "-m", "app.infrastructure.shared_repository"],
+        env=dict(
+            os.environ, REPOSITORY_BACKEND="memory-log", OPLOG_DIR=str(tmp_path / "oplog"),
+            SHARED_STORE_ADDRESS=address, SHARED_STORE_AUTHKEY="test",
+        ),
+    )
+    try:
+        worker_a = SharedRepository(address, "test", autostart=False)
+        worker_b = SharedRepository(address, "test", autostart=False)
+
+        lista = Lista(name="Compartida")
+        worker_a.add_list(lista)
+        tarea = Tarea(title="T", description="D", partner="P", rol="R",
+                      status=task_status[0], progress=task_progress[0], priority=task_priority[0])
+        worker_a.add_task(lista.id, tarea)
+
+        # Lo escrito por un worker se ve desde el otro
+        assert worker_b.get_list(lista.id).name == "Compartida"
+        assert worker_b.update_task_status(tarea.id, task_status[1]).status == task_status[1]
+        assert worker_a.count_tasks(lista.id, status=task_status[1]) == 1
+        assert worker_b.page_tasks(lista.id, None, 10) == ([worker_a.get_task(tarea.id)], None)
+
+        # Cerrar un worker no cierra el repositorio del store: los demas siguen escribiendo en el log
+        worker_a.close()
+        assert not hasattr(worker_b._proxy, "close")
+        worker_b.delete_task(tarea.id)
+        assert worker_b.count_tasks(lista.id) == 0
+
+        assert stop_store(address)
+        assert store.wait(timeout=10) == 0
+        assert not os.path.exists(address + ".pid")
+    finally:
+        if store.poll() is None:
+            store.terminate()
+            store.wait(timeout=10)
+
+
+class _SinkDePrueba:
+    def __init__(self, fallos=0, demora=0.0):
+        self.fallos = fallos
+        self.demora = demora
+        self.enviados = []
+
+    def send(self, username, email, titulos):
+        time.sleep(self.demora)
+        if self.fallos:
+            self.fallos -= 1
+            raise ConnectionError("smtp caido")
+        self.enviados.append((username, email, titulos))
+
+def test_notificaciones_agrupadas_por_usuario():
+    sink = _SinkDePrueba()
+    dispatcher = NotificationDispatcher(sink, batch_window=0.2)
+    dispatcher.notify("ana", "ana@example.com", "T1")
+    dispatcher.notify("beto", None, "T2")
+    dispatcher.notify("ana", "ana@example.com", "T3")
+    dispatcher.close(timeout=5)
+    assert sink.enviados == [("ana", "ana@example.com", ["T1", "T3"]), ("beto", None, ["T2"])]
+
+def test_notificaciones_reintentan_y_descartan_con_cola_llena():
+    sink = _SinkDePrueba(fallos=2)
+    dispatcher = NotificationDispatcher(sink, batch_window=0, retry_backoff=0.01)
+    dispatcher.notify("ana", None, "T1")
+    dispatcher.close(timeout=5)
+    assert sink.enviados == [("ana", None, ["T1"])]
+    assert dispatcher.failed == 0
+
+    # Mientras el envio a "ana" espera su reintento, el de "beto" sale sin esperar el backoff
+    sink = _SinkDePrueba(fallos=1)
+    dispatcher = NotificationDispatcher(sink, batch_window=0, retry_backoff=1.0)
+    dispatcher.notify("ana", None, "T1")
+    time.sleep(0.1)
+    dispatcher.notify("beto", None, "T2")
+    time.sleep(0.2)
+    assert sink.enviados == [("beto", None, ["T2"])]
+    dispatcher.close(timeout=5)
+    assert sink.enviados == [("beto", None, ["T2"]), ("ana", None, ["T1"])]
+
+    lento = NotificationDispatcher(_SinkDePrueba(demora=0.5), maxsize=1, batch_window=0)
+    resultados = [lento.notify("ana", None, f"T{i}") for i in range(5)]
+    assert resultados.count(False) == lento.dropped > 0
+    lento.close(timeout=5)
+
+def test_notificaciones_close_no_se_traba_con_cola_llena():
+    # Un notify() que ocupa el lugar libre justo despues de que el hilo saca la marca de cierre
+    sink = _SinkDePrueba()
+    dispatcher = NotificationDispatcher(sink, maxsize=1, batch_window=0.5)
+    get_original = dispatcher._queue.get
+
+    def get_en_carrera(*args, **kwargs):
+        item = get_original(*args, **kwargs)
+        if item is None:
+            dispatcher._queue.put_nowait(Notificacion("beto", None, "T2"))
+        return item
+
+    dispatcher._queue.get = get_en_carrera
+    dispatcher.notify("ana", None, "T1")
+    time.sleep(0.1)
+    hilo = dispatcher._thread
+    dispatcher.close(timeout=5)
+    assert not hilo.is_alive()
+    assert sink.enviados == [("ana", None, ["T1"]), ("beto", None, ["T2"])]
+
+def test_create_task_no_espera_la_notificacion():
+    sink = _SinkDePrueba(demora=1.0)
+    lista = use_cases.create_list(ListaCreate(name="Lista notificaciones"))
+    tarea_data = TareaCreate(
+        title="Notificar", description="d", partner="p", rol="r",
+        status=task_status[1], progress=task_progress[0], priority=task_priority[0]
+    )
+    dispatcher = NotificationDispatcher(sink, batch_window=0)
+    with patch.object(use_cases, "notifier", dispatcher):
+        inicio = time.monotonic()
+        use_cases.create_task(lista.id, tarea_data, current_user)
+        assert time.monotonic() - inicio < 0.5
+        dispatcher.close(timeout=5)
+    assert sink.enviados == [("admin", "admin@example.com", ["Notificar"])]
+
+def test_file_sink(tmp_path):
+    path = tmp_path / "notificaciones.log"
+    FileSink(str(path)).send("ana", "ana@example.com", ["T1", "T2"])
+    assert path.read_text(encoding="utf-8") == "ana\tana@example.com\tT1 | T2\n"
+
+def _memoria_por_item(crear, n=2000):
+    tracemalloc.start()
+    try:
+        inicio = tracemalloc.get_traced_memory()[0]
+        items = [crear(i) for i in range(n)]
+        return (tracemalloc.get_traced_memory()[0] - inicio) / len(items)
+    finally:
+        tracemalloc.stop()
+
+def test_tarea_record_compacto():
+    datos = [
+        dict(
+            title=f"Tarea {i}", description=f"Descripcion {i}", partner="EMPRESA A", rol="Administrador de lista",
+            status=task_status[i % 5], progress=task_progress[i % 5], priority=task_priority[i % 5], assigned_to="admin"
+        )
+        for i in range(2000)
+    ]
+    tareas = [Tarea(**d) for d in datos]
+    record = TareaRecord.from_tarea(tareas[3], seq=7)
+    assert (record.status, record.progress, record.priority, record.seq) == (3, 3, 3, 7)
+    assert record.to_tarea() == tareas[3]
+    assert record.with_status(0).to_tarea().status == task_status[0]
+
+    por_tarea = _memoria_por_item(lambda i: Tarea(**datos[i]))
+    por_record = _memoria_por_item(lambda i: TareaRecord.from_tarea(tareas[i], i))
+    assert por_record * 2 < por_tarea
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_revisiones_suben_con_cada_mutacion(tmp_path, backend):
+    repo = InMemoryRepository() if backend == "memory" else SQLiteRepository(str(tmp_path / "tareas.db"), pool_size=1)
+    base = dict(description="Desc", partner="P", rol="R", status=task_status[0], progress=task_progress[0], priority=task_priority[0])
+    lista, otra = Lista(name="A"), Lista(name="B")
+    repo.add_list(lista)
+    repo.add_list(otra)
+    tarea = Tarea(title="T", **base)
+
+    vistas = [(repo.get_revision(), repo.get_list_revision(lista.id))]
+    for mutacion in (
+        lambda: repo.add_task(lista.id, tarea),
+        lambda: repo.replace_task(tarea.model_copy(update={"title": "T bis"})),
+        lambda: repo.update_task_status(tarea.id, task_status[1]),
+        lambda: repo.rename_list(lista.id, "A bis"),
+        lambda: repo.delete_task(tarea.id),
+    ):
+        otra_revision = repo.get_list_revision(otra.id)
+        mutacion()
+        vistas.append((repo.get_revision(), repo.get_list_revision(lista.id)))
+        assert repo.get_list_revision(otra.id) == otra_revision
+    assert all(a[0] < b[0] and a[1] < b[1] for a, b in zip(vistas, vistas[1:]))
+    assert vistas[-1][0] == vistas[-1][1]
+
+    # Una operacion que no encuentra nada no cambia la revision
+    assert repo.delete_task(tarea.id) is False
+    assert repo.get_revision() == vistas[-1][0]
+    assert repo.delete_list(lista.id)
+    assert repo.get_list_revision(lista.id) is None
+    assert repo.get_revision() > vistas[-1][0]
+    with pytest.raises(ListaNoEncontradaException):
+        with patch.object(use_cases, "repository", repo):
+            use_cases.get_list_revision(lista.id)
+
+def test_response_cache_por_revision():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", 1, b"[1]", "c1")
+    assert cache.get("a", 1).body == b"[1]"
+    assert cache.get("a", 2) is None
+    assert len(cache) == 0
+
+    cache.set("a", 3, b"[3]")
+    cache.set("a", 2, b"[2]")  # una lectura lenta no pisa la entrada mas nueva
+    assert cache.get("a", 3).body == b"[3]"
+
+    cache.set("b", 1, b"b")
+    cache.set("c", 1, b"c")
+    assert cache.get("a", 3) is None
+    assert len(cache) == 2
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_escrituras_condicionales_por_revision(tmp_path, backend, monkeypatch):
+    repo = InMemoryRepository() if backend == "memory" else SQLiteRepository(str(tmp_path / "tareas.db"), pool_size=1)
+    monkeypatch.setattr(use_cases, "repository", repo)
+    base = dict(description="Desc", partner="P", rol="R", status=task_status[0], progress=task_progress[0], priority=task_priority[0])
+    lista = use_cases.create_list(ListaCreate(name="Condicional"))
+    tarea = use_cases.create_task(lista.id, TareaCreate(title="T", **base), current_user)
+    leida = use_cases.get_list_revision(lista.id)
+
+    use_cases.update_task_status(tarea.id, task_status[1], expected_revisions={leida})
+    # Otro editor que leyo la misma revision ya no puede escribir
+    with pytest.raises(PrecondicionFallidaException):
+        use_cases.update_task(tarea.id, TareaCreate(title="Pisada", **base), current_user, expected_revisions={leida})
+    with pytest.raises(PrecondicionFallidaException):
+        use_cases.update_list(lista.id, ListaCreate(name="Pisada"), expected_revisions={leida})
+    assert repo.get_task(tarea.id).title == "T"
+    assert repo.get_list(lista.id).name == "Condicional"
+
+    actual = use_cases.get_list_revision(lista.id)
+    assert use_cases.update_list(lista.id, ListaCreate(name="Nueva"), expected_revisions={leida, actual}).name == "Nueva"
+    with pytest.raises(TareaNoEncontradaException):
+        use_cases.update_task_status(uuid4(), task_status[1], expected_revisions={actual})
+
+def test_etags():
+    assert etag_matches('"5"', 5)
+    assert etag_matches('W/"4", "5"', 5)
+    assert etag_matches("*", 5)
+    assert not etag_matches('"4"', 5)
+    assert not etag_matches(None, 5)
+    assert expected_revisions(None) is None
+    assert expected_revisions("*") is None
+    assert expected_revisions('"4", W/"5", "x"') == {4}
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_busqueda_de_texto(tmp_path, backend, monkeypatch):
+    repo = InMemoryRepository() if backend == "memory" else SQLiteRepository(str(tmp_path / "tareas.db"), pool_size=1)
+    monkeypatch.setattr(use_cases, "repository", repo)
+    base = dict(partner="Empresa Ñandú", rol="Diseño", status=task_status[0], progress=task_progress[0], priority=task_priority[0])
+    lista, otra = use_cases.create_list(ListaCreate(name="Busqueda")), use_cases.create_list(ListaCreate(name="Otra"))
+    en_titulo = use_cases.create_task(lista.id, TareaCreate(title="Revisión de código", description="PR 12", **base), current_user)
+    en_descripcion = use_cases.create_task(lista.id, TareaCreate(title="Compras", description="Revisar la revision anual", **base), current_user)
+    en_otra = use_cases.create_task(otra.id, TareaCreate(title="Revision", description="Otra lista", **base), current_user)
+
+    def buscar(query, list_id=None, limit=20):
+        return [r.task.id for r in use_cases.search_tasks(query, list_id, limit)]
+
+    # Sin acentos ni mayusculas, con el titulo pesando mas que la descripcion
+    assert buscar("REVISION", lista.id) == [en_titulo.id, en_descripcion.id]
+    assert set(buscar("revisión")) == {en_titulo.id, en_descripcion.id, en_otra.id}
+    assert buscar("nandu diseno codigo") == [en_titulo.id]
+    assert len(buscar("revision", limit=1)) == 1
+    assert buscar("de la") == []
+    assert use_cases.search_tasks("codigo")[0].list_id == lista.id
+
+    # El indice sigue a las altas, cambios y bajas
+    use_cases.update_task_status(en_titulo.id, task_status[1])
+    assert buscar("codigo") == [en_titulo.id]
+    use_cases.update_task(en_titulo.id, TareaCreate(title="Deploy", description="PR 12", **base), current_user)
+    assert buscar("codigo") == []
+    assert buscar("deploy") == [en_titulo.id]
+    use_cases.delete_task(en_descripcion.id)
+    assert buscar("anual") == []
+    use_cases.delete_list(otra.id)
+    assert buscar("otra lista") == []
+
+    with pytest.raises(ListaNoEncontradaException):
+        use_cases.search_tasks("revision", otra.id)
+
+def test_search_index_corta_sin_perder_el_top():
+    # El corte por cota devuelve los mismos scores que puntuar todas las tareas
+    random.seed(7)
+    palabras = ["alfa", "beta", "gama", "delta"]
+    index = SearchIndex()
+    records = []
+    for i in range(300):
+        record = TareaRecord.from_tarea(Tarea(
+            title=" ".join(random.choices(palabras, k=2)), description=" ".join(random.choices(palabras, k=3)),
+            partner=random.choice(palabras), rol="rol", status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+        ), i)
+        records.append(record)
+        index.add(record)
+    for record in records[::3]:
+        index.remove(record)
+    vivos = {record.id for record in records} - {record.id for record in records[::3]}
+
+    for query in ("alfa", "alfa beta", "rol gama"):
+        completo = index.search(query, limit=len(records))
+        assert {task_id for task_id, _ in completo} <= vivos
+        top = index.search(query, limit=5)
+        assert [score for _, score in top] == [score for _, score in completo[:5]]
+        candidatas = set(list(vivos)[:10])
+        acotado = index.search(query, limit=5, candidates=candidatas)
+        assert [score for _, score in acotado] == [score for task_id, score in completo if task_id in candidatas][:5]
+
+def test_search_index_acota_el_trabajo_por_consulta(monkeypatch):
+    # Con el presupuesto agotado el resultado sigue siendo valido: tareas con todos los terminos, score exacto,
+    # sin repetidas y ordenadas; lo que encontro el recorrido exacto va primero
+    from app.infrastructure import search
+    random.seed(11)
+    palabras = ["alfa", "beta", "gama", "delta", "epsilon"]
+    index = SearchIndex()
+    for i in range(2000):
+        index.add(TareaRecord.from_tarea(Tarea(
+            title=" ".join(random.choices(palabras, k=3)), description=" ".join(random.choices(palabras, k=6)),
+            partner="P", rol="R", status=task_status[0], progress=task_progress[0], priority=task_priority[0]
+        ), i))
+    monkeypatch.setattr(search, "SEARCH_MAX_SCAN", 10 ** 9)
+    monkeypatch.setattr(search, "MAX_TIER_COMBINATIONS", 10 ** 9)
+    exactos = {query: dict(index.search(query, limit=2000)) for query in ("alfa beta", "alfa beta gama delta")}
+
+    monkeypatch.setattr(search, "SEARCH_MAX_SCAN", 50)
+    monkeypatch.setattr(search, "MAX_TIER_COMBINATIONS", 5)
+    monkeypatch.setattr(search, "MAX_FILL_SCAN", 300)
+    for query, todos in exactos.items():
+        top = index.search(query, limit=10)
+        assert len(top) == 10 and len({task_id for task_id, _ in top}) == 10
+        assert all(todos[task_id] == score for task_id, score in top)
+        assert [score for _, score in top] == sorted((score for _, score in top), reverse=True)
+
+def test_usuarios_indexados_por_username(monkeypatch):
+    monkeypatch.setattr(use_cases, "fake_db_users", dict(use_cases.fake_db_users))
+    user = use_cases.create_user(UserCreate(username="ana", full_name="Ana", email="ana@example.com", password="secreta"))
+    assert not hasattr(user, "hashed_password")
+    guardado = use_cases.get_user_by_username("ana")
+    assert guardado.hashed_password != "secreta"
+    assert use_cases.get_user_by_username("admin").email == "admin@example.com"
+    with pytest.raises(UsuarioNoEncontradoException):
+        use_cases.get_user_by_username("nadie")
+
+def test_password_verifier_con_admision_acotada():
+    verifier = PasswordVerifier(workers=1, max_pending=1)
+    hashed = get_password_hash("clave")
+
+    async def verificar():
+        assert await verifier.verify("clave", hashed) is True
+        assert await verifier.verify("otra", hashed) is False
+        # Con el cupo ocupado, el segundo login se rechaza sin encolarse
+        resultados = await asyncio.gather(
+            verifier.verify("clave", hashed), verifier.verify("clave", hashed), return_exceptions=True
+        )
+        return resultados
+
+    try:
+        resultados = asyncio.run(verificar())
+    finally:
+        verifier.close()
+    assert resultados[0] is True
+    assert isinstance(resultados[1], LoginSaturadoException)
+    assert resultados[1].status_code == 503
+    assert (verifier.pending, verifier.rejected) == (0, 1)
+
+def test_authenticate_user_verifica_aunque_el_usuario_no_exista(monkeypatch):
+    verificados = []
+
+    async def verify(password, hashed_password):
+        verificados.append(hashed_password)
+        return False
+
+    monkeypatch.setattr(async_use_cases.password_verifier, "verify", verify)
+    assert asyncio.run(async_use_cases.authenticate_user("nadie", "clave")) is None
+    assert asyncio.run(async_use_cases.authenticate_user("admin", "clave")) is None
+    assert verificados == [async_use_cases.DUMMY_PASSWORD_HASH, use_cases.get_user_by_username("admin").hashed_password]
+    # El hash fijo es un bcrypt valido del mismo costo que el de los usuarios
+    assert async_use_cases.DUMMY_PASSWORD_HASH.startswith("$2b$12$")
+    assert verify_password("clave", async_use_cases.DUMMY_PASSWORD_HASH) is False
+
+def test_benchmarks_micro_y_regresiones():
+    repository = InMemoryRepository()
+    workspace = load_workspace(repository, Profile(lists=3, tasks_per_list=10))
+    assert len(workspace.task_ids) == 30
+    resultados = run_micro(repository, workspace, iterations=3, time_budget=0.1)
+    assert "search_tasks" in resultados and "delete_tasks" in resultados
+    assert all(stats.iterations == 3 and stats.errors == 0 for stats in resultados.values())
+    # El benchmark no deja su repositorio puesto en los casos de uso
+    assert use_cases.repository is not repository
+
+    baseline = {"a": {"p50_us": 100.0, "ops_per_s": 1000.0, "errors": 0}}
+    assert find_regressions({"a": Stats(10, 0, 900.0, 140.0, 200.0)}, baseline, 0.5) == []
+    assert len(find_regressions({"a": Stats(10, 0, 900.0, 160.0, 200.0)}, baseline, 0.5)) == 1
+    assert len(find_regressions({"a": Stats(10, 0, 500.0, 100.0, 200.0)}, baseline, 0.5, check_throughput=True)) == 1
+    assert find_regressions({"a": Stats(10, 0, 900.0, 160.0, 200.0)}, None, 0.5) == []
+
+def test_metricas_formato_prometheus():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ["route"])
+    latencia = registry.histogram("latencia_seconds", "Latencia", ["route"], buckets=[0.1, 1.0])
+    registry.gauge("items", "Items", lambda: [((), 3)])
+    requests.inc('/a"b')
+    for valor in (0.05, 0.1, 0.5, 2.0):
+        latencia.observe(valor, "/a")
+    texto = registry.render()
+    assert 'requests_total{route="/a\\"b"} 1' in texto
+    # Buckets acumulados; un valor igual al limite entra en ese bucket
+    assert 'latencia_seconds_bucket{route="/a",le="0.1"} 2' in texto
+    assert 'latencia_seconds_bucket{route="/a",le="1.0"} 3' in texto
+    assert 'latencia_seconds_bucket{route="/a",le="+Inf"} 4' in texto
+    assert 'latencia_seconds_sum{route="/a"} 2.65' in texto
+    assert 'latencia_seconds_count{route="/a"} 4' in texto
+    assert "# TYPE items gauge\nitems 3" in texto
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Duplicada")
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_estadisticas_del_repositorio(tmp_path, backend):
+    repo = InMemoryRepository() if backend == "memory" else SQLiteRepository(str(tmp_path / "stats.db"))
+    load_workspace(repo, Profile(lists=2, tasks_per_list=5))
+    stats = repo.get_stats()
+    assert (stats["lists"], stats["tasks"]) == (2, 10)
+    if backend == "memory":
+        assert stats["index_entries"]["task_list"] == 10
+        assert stats["index_entries"]["status"] == 10
+        assert stats["index_entries"]["search_terms"] > 0
+
+# Presupuesto para importar la app (sin contar fastapi/pydantic, que se importan antes de medir)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", 500))
+
+def test_import_de_la_app_dentro_del_presupuesto():
+    script = (
+        "import json, sys, time\n"
+        "import fastapi, pydantic\n"
+        "inicio = time.perf_counter()\n"
+        "import app.main\n"
+        "ms = (time.perf_counter() - inicio) * 1000\n"
+        "pesados = ['passlib', 'cProfile', 'pstats', 'smtplib', 'concurrent.futures.process', 'sqlite3']\n"
+        "print(json.dumps({'ms': ms, 'cargados': [m for m in pesados if m in sys.modules]}))\n"
+    )
+    src = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, REPOSITORY_BACKEND="memory", PROFILING_ENABLED="false", NOTIFICATION_SINK="log")
+    salida = subprocess.run([sys.executable, "-c", script], cwd=src, env=env, capture_output=True, text=True, check=True)
+    resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+    # bcrypt, el perfilador, SMTP, el pool de procesos y SQLite se cargan recien cuando se usan
+    assert resultado["cargados"] == []
+    assert resultado["ms"] < IMPORT_BUDGET_MS, f"importar app.main tardo {resultado['ms']:.0f} ms"
+
+def test_crypt_context_se_arma_una_vez():
+    from app.auth import auth_handler
+    assert auth_handler.get_pwd_context() is auth_handler.get_pwd_context()
+    assert auth_handler.verify_password("admin", use_cases.get_user_by_username("admin").hashed_password)
+
+def test_iter_lines_decodifica_de_a_pedazos():
+    texto = "\ufefftitle,description\nCañería,\"dos\nlineas\"\nsin fin"
+    datos = texto.encode("utf-8")
+    # Pedazos de 1 byte: la "ñ" y el BOM quedan partidos entre pedazos
+    lineas = list(iter_lines(datos[i:i + 1] for i in range(len(datos))))
+    assert lineas == ["title,description\n", "Cañería,\"dos\n", "lineas\"\n", "sin fin"]
+
+def test_importacion_por_lotes_con_errores_por_fila(monkeypatch):
+    monkeypatch.setattr(use_cases, "IMPORT_CHUNK_SIZE", 2)
+    lista = use_cases.create_list(ListaCreate(name="Importada"))
+    filas = [
+        "title,description,partner,rol,status,priority,assigned_to,extra\n",
+        "T1,D,P,R,,,,x\n",
+        f"T2,D,P,R,{task_status[1]},Urgente,,\n",
+        "T3,D,P,R,,,nadie,\n",
+        "T4,\"D\n", "multilinea\",P,R,,,admin,\n",
+        "T5,D\n",
+    ]
+    lotes = list(use_cases.import_tasks(lista.id, "csv", filas))
+    assert [lote.rows for lote in lotes] == [2, 2, 1]
+    assert sum(lote.imported for lote in lotes) == 2
+    errores = [(e.line, e.error) for lote in lotes for e in lote.errors]
+    assert [linea for linea, _ in errores] == [3, 4, 7]
+    assert errores[0][1] == PrioridadInvalidaException().detail
+    assert "partner" in errores[2][1]
+    tareas = {t.title: t for t in use_cases.get_tasks(lista.id)}
+    assert tareas["T1"].status == task_status[0] and tareas["T1"].assigned_to is None
+    assert tareas["T4"].description == "D\nmultilinea" and tareas["T4"].assigned_to == "admin"
+
+    ndjson = [
+        json.dumps({"type": "list", "id": str(lista.id), "name": "Importada"}) + "\n",
+        json.dumps({"type": "task", "id": str(uuid4()), "title": "N1", "description": "D", "partner": "P", "rol": "R"}) + "\n",
+        "\n",
+        "{no es json\n",
+        "[1, 2]\n",
+    ]
+    lotes = list(use_cases.import_tasks(lista.id, "ndjson", ndjson))
+    assert sum(lote.imported for lote in lotes) == 1
+    assert [(e.line, e.error) for lote in lotes for e in lote.errors] == [(4, "JSON inválido"), (5, "Se esperaba un objeto JSON")]
+
+    with pytest.raises(FormatoInvalidoException):
+        use_cases.validar_importacion(lista.id, "xml")
+    with pytest.raises(ListaNoEncontradaException):
+        use_cases.validar_importacion(uuid4(), "csv")
+
+def test_import_job_acota_errores_y_corta_si_se_interrumpe(monkeypatch):
+    lista = use_cases.create_list(ListaCreate(name="Job"))
+    # Con 16 bytes en memoria el resto del body pasa al archivo temporal
+    job = ImportJob(lista.id, "ndjson", max_errors=2, spool_memory=16)
+    for _ in range(5):
+        if not job.write_nowait(b"{malo\n"):
+            job.write(b"{malo\n")
+    job.write(b'{"title": "ok", "description": "", "partner": "P", "rol": "R"}')
+    assert job.bytes_received == 92 and job._spool._rolled
+    job.start(lambda lineas: use_cases.import_tasks(lista.id, "ndjson", lineas))
+    assert job.wait(5)
+    estado = job.snapshot()
+    assert (estado.status, estado.rows, estado.imported, estado.failed) == ("done", 6, 1, 5)
+    assert len(estado.errors) == 2 and estado.errors_truncated
+    assert job._spool.closed
+
+    job = ImportJob(lista.id, "ndjson")
+    job.write(b'{"title": "parcial"')
+    job.abort()
+    assert job.finished and job.snapshot().status == "failed" and job._spool.closed
+
+def test_importacion_responde_sin_esperar_al_procesamiento(monkeypatch):
+    lista = use_cases.create_list(ListaCreate(name="Lenta"))
+    seguir = threading.Event()
+    importar = use_cases.import_tasks
+
+    def importar_lento(list_id, format, lineas):
+        seguir.wait(5)
+        return importar(list_id, format, lineas)
+
+    async def body():
+        yield b'{"title": "T", "description": "", "partner": "P", "rol": "R"}\n'
+
+    monkeypatch.setattr(async_use_cases.use_cases, "import_tasks", importar_lento)
+    estado = asyncio.run(async_use_cases.import_tasks(lista.id, "ndjson", body()))
+    assert estado.status == "processing" and estado.bytes_received > 0
+    seguir.set()
+    job = async_use_cases.import_jobs.get(estado.id)
+    assert job.wait(5) and job.snapshot().imported == 1
+
+def test_broker_reparte_a_muchos_suscriptores_sin_frenar_al_que_escribe():
+    async def escenario():
+        broker = EventBroker(buffer=4, heartbeat=60)
+        list_id = uuid4()
+        broker.publish(list_id, "task.created")
+        assert not broker.active
+
+        streams = [broker.subscribe(list_id) for _ in range(1000)]
+        assert all([await stream.__anext__() for stream in streams]) and broker.subscribers(list_id) == 1000
+        # Se publica desde otro hilo: todos los suscriptores reciben el mismo texto ya serializado
+        hilo = threading.Thread(target=broker.publish, args=(list_id, "task.deleted"), kwargs={"task_id": "t1"})
+        hilo.start()
+        recibidos = await asyncio.gather(*(stream.__anext__() for stream in streams))
+        hilo.join()
+        assert len(set(recibidos)) == 1 and "event: task.deleted" in recibidos[0] and '"task_id": "t1"' in recibidos[0]
+        event_id = int(recibidos[0].split("\n")[0][4:])
+        for stream in streams[1:]:
+            await stream.aclose()
+        assert broker.subscribers(list_id) == 1
+
+        # Un suscriptor que no lee no frena a quien publica; al atrasarse mas que el anillo recibe resync
+        lento = streams[0]
+        for i in range(10):
+            broker.publish(list_id, "task.updated", n=i)
+        assert "event: resync" in await lento.__anext__()
+        broker.publish(list_id, "task.updated", n="nuevo")
+        assert '"n": "nuevo"' in await lento.__anext__()
+
+        # Reconexion con Last-Event-ID: si sigue en el anillo se reenvia lo posterior, si no, resync
+        reconectado = broker.subscribe(list_id, last_event_id=event_id + 9)
+        assert await reconectado.__anext__() == RETRY
+        assert '"n": 9' in await reconectado.__anext__()
+        assert '"n": "nuevo"' in await reconectado.__anext__()
+        viejo = broker.subscribe(list_id, last_event_id=event_id)
+        await viejo.__anext__()
+        assert "event: resync" in await viejo.__anext__()
+
+        broker.publish(list_id, "list.deleted")
+        for stream in (lento, reconectado, viejo):
+            assert "event: list.deleted" in await stream.__anext__()
+            with pytest.raises(StopAsyncIteration):
+                await stream.__anext__()
+        assert not broker.active
+
+    asyncio.run(escenario())
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_journal_de_cambios_con_bajas_y_resync(tmp_path, backend, monkeypatch):
+    from app.infrastructure import sqlite_repository
+    monkeypatch.setattr(sqlite_repository, "JOURNAL_TRIM_EVERY", 1)
+    if backend == "memory":
+        repo = InMemoryRepository(journal_size=6)
+    else:
+        repo = SQLiteRepository(str(tmp_path / "journal.db"), journal_size=6)
+
+    base = dict(description="Desc", partner="P", rol="R", progress=task_progress[0], priority=task_priority[0])
+    inicio = repo.get_revision()
+    assert repo.get_changes(inicio).model_dump() == {
+        "revision": inicio, "resync": False, "lists": [], "deleted_lists": [], "tasks": [], "deleted_tasks": []
+    }
+    a, b = Lista(name="A"), Lista(name="B")
+    repo.add_list(a)
+    repo.add_list(b)
+    t1, t2 = Tarea(title="t1", status=task_status[0], **base), Tarea(title="t2", status=task_status[0], **base)
+    repo.add_tasks(a.id, [t1, t2])
+    repo.update_task_status(t1.id, task_status[1])
+    repo.delete_task(t2.id)
+
+    cambios = repo.get_changes(inicio)
+    assert not cambios.resync and cambios.revision == repo.get_revision()
+    assert [(lista.name, lista.task_count) for lista in cambios.lists] == [("A", 1), ("B", 0)]
+    # Una entrada por tarea con su ultimo estado; la borrada queda como baja
+    assert [(c.list_id, c.task.status) for c in cambios.tasks] == [(a.id, task_status[1])]
+    assert [(c.list_id, c.id) for c in cambios.deleted_tasks] == [(a.id, t2.id)]
+    assert repo.get_changes(inicio, list_id=b.id).lists[0].id == b.id
+
+    revision = cambios.revision
+    repo.delete_list(b.id)
+    cambios = repo.get_changes(revision)
+    assert (cambios.deleted_lists, cambios.lists, cambios.tasks) == ([b.id], [], [])
+    assert repo.get_changes(cambios.revision).deleted_lists == []
+
+    # Con el journal recortado (o un since que este servidor no emitio) hay que volver a bajar todo
+    for i in range(6):
+        repo.add_tasks(a.id, [Tarea(title=f"extra {i}", status=task_status[0], **base)])
+    assert repo.get_changes(inicio).resync
+    assert repo.get_changes(repo.get_revision() + 1).resync
+    assert len(repo.get_changes(repo.get_revision() - 3).tasks) == 3